@@ -1,89 +1,191 @@
 import asyncio
+import hashlib
+import heapq
+import os
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from functools import lru_cache
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
 
+import orjson
 import pytz
 from dateutil.parser import isoparse
-from jsonschema import validate, ValidationError
-
-# --- Schema (can be shared from scheduler) ---
-SCHEDULE_SCHEMA = {
-    "type": "object",
-    "properties": {
-        "events": {
-            "type": "array",
-            "items": {
-                "type": "object",
-                "properties": {
-                    "session_id": {"type": "string", "format": "uuid"},
-                    "task_id": {"type": "string"},
-                    "start_time": {"type": "string", "format": "date-time"},
-                    "end_time": {"type": "string", "format": "date-time"},
-                    "status": {"type": "string"},
-                },
-                "required": ["session_id", "task_id", "start_time", "end_time", "status"],
-            },
-        },
-        "conflicts": {
-            "type": "array",
-            "items": {
-                "type": "object",
-                "properties": {
-                    "task_id": {"type": "string"},
-                    "conflict_with": {"type": "string", "format": "uuid"},
-                    "reason": {"type": "string"},
-                },
-                "required": ["task_id", "conflict_with", "reason"],
-            },
-        },
-        "exceptions": {"type": "array"},
-    },
-    "required": ["events", "conflicts", "exceptions"],
-}
-
-
-def _check_overlap(start1: datetime, end1: datetime, start2: datetime, end2: datetime) -> bool:
-    """Checks if two datetime ranges overlap."""
-    return (start1 < end2) and (end1 > start2)
-
-
-def _recompute_conflicts(schedule: Dict[str, Any]) -> None:
+
+from app.schemas import ADAPTED_SCHEDULE_SCHEMA as SCHEDULE_SCHEMA
+from app.scheduling.conflicts import overlapping_pairs
+from app.scheduling.interval_index import IntervalIndex
+from app.timing import span
+from app.validation import ValidationError, validate_output
+
+
+# Conflict state of the schedules this process recently returned, keyed by
+# `_digest`. A client that sends back the schedule it got from the previous
+# adaptation resumes from the stored state instead of re-parsing and
+# re-sweeping every event. Per process; a miss just recomputes.
+STATE_CACHE_SIZE = int(os.environ.get("ADAPTATION_STATE_CACHE_SIZE", 32))
+
+
+class _ConflictState(NamedTuple):
+    positions: Dict[str, int]
+    pairs: List[Tuple[int, int]]
+    index: IntervalIndex
+
+
+_STATES: "OrderedDict[bytes, _ConflictState]" = OrderedDict()
+
+
+@lru_cache(maxsize=65536)
+def _parse_iso(value: str) -> datetime:
+    """isoparse with memoization; the same schedule is usually adapted many times."""
+    return isoparse(value)
+
+
+def _recompute_conflicts(schedule: Dict[str, Any]) -> Tuple[List[Tuple[int, int]], IntervalIndex]:
     """
     Re-evaluates all events in the schedule and updates the conflicts list.
     This function modifies the schedule dict in-place.
+
+    Returns the overlap pairs and an interval index of the active events, which
+    `_update_conflicts` takes to apply further adaptations incrementally.
     """
     events = schedule["events"]
-    schedule["conflicts"] = [] # Reset conflicts
 
-    # First, parse all ISO strings back to datetime objects for comparison
-    for event in events:
-        event["start_time_dt"] = isoparse(event["start_time"])
-        event["end_time_dt"] = isoparse(event["end_time"])
+    positions = []
+    items = []
+    for pos, event in enumerate(events):
+        start, end = _parse_iso(event["start_time"]), _parse_iso(event["end_time"])
         # Reset status to scheduled unless it's a terminal state
         if event["status"] not in ["skipped"]:
-             event["status"] = "scheduled"
+            event["status"] = "scheduled"
+            # Skipped events don't cause conflicts
+            positions.append(pos)
+            items.append((pos, start, end))
 
+    overlaps = overlapping_pairs([(start, end) for _, start, end in items])
+    pairs = [(positions[i], positions[j]) for i, j in overlaps]
+    schedule["conflicts"] = _apply_pairs(events, pairs)
+    return pairs, IntervalIndex(items)
 
-    for i in range(len(events)):
-        for j in range(i + 1, len(events)):
-            event1 = events[i]
-            event2 = events[j]
-            
-            # Skipped events don't cause conflicts
-            if event1["status"] == "skipped" or event2["status"] == "skipped":
-                continue
 
-            if _check_overlap(event1["start_time_dt"], event1["end_time_dt"], event2["start_time_dt"], event2["end_time_dt"]):
-                event1["status"] = "conflict"
-                event2["status"] = "conflict"
-                schedule["conflicts"].append({"task_id": event1["task_id"], "conflict_with": event2["session_id"], "reason": "overlap"})
-                schedule["conflicts"].append({"task_id": event2["task_id"], "conflict_with": event1["session_id"], "reason": "overlap"})
+def _apply_pairs(events: List[Dict[str, Any]], pairs: List[Tuple[int, int]]) -> List[Dict[str, Any]]:
+    """
+    Marks the events in `pairs` as conflicts and builds the conflicts list.
+    `pairs` must be sorted index pairs (i < j), as produced by a pairwise scan.
+    """
+    in_conflict = set()
+    conflicts = []
+    for i, j in pairs:
+        in_conflict.add(i)
+        in_conflict.add(j)
+        conflicts.append({"task_id": events[i]["task_id"], "conflict_with": events[j]["session_id"], "reason": "overlap"})
+        conflicts.append({"task_id": events[j]["task_id"], "conflict_with": events[i]["session_id"], "reason": "overlap"})
+
+    for pos in in_conflict:
+        events[pos]["status"] = "conflict"
+    return conflicts
+
+
+def _digest(schedule: Dict[str, Any]) -> Optional[bytes]:
+    """
+    Fingerprints the whole schedule, or returns None when orjson cannot
+    encode it (the schedule is then simply not cached).
+    """
+    try:
+        return hashlib.sha256(orjson.dumps(schedule)).digest()
+    except TypeError:  # orjson.JSONEncodeError is a TypeError
+        return None
+
 
-    # Clean up temporary datetime objects
-    for event in events:
-        del event["start_time_dt"]
-        del event["end_time_dt"]
+def _remember(
+    schedule: Dict[str, Any],
+    positions: Optional[Dict[str, int]],
+    pairs: List[Tuple[int, int]],
+    index: IntervalIndex,
+) -> None:
+    """
+    Stores the conflict state of a validated schedule that is about to be
+    returned to the client. `positions` is rebuilt from the events when None.
+    """
+    if STATE_CACHE_SIZE <= 0:
+        return
+    events = schedule["events"]
+    if positions is None:
+        positions = {event["session_id"]: pos for pos, event in enumerate(events)}
+        if len(positions) != len(events):
+            return  # duplicate session IDs: lookups by ID would be ambiguous
+    key = _digest(schedule)
+    if key is None:
+        return
+    _STATES[key] = _ConflictState(positions, pairs, index)
+    _STATES.move_to_end(key)
+    while len(_STATES) > STATE_CACHE_SIZE:
+        _STATES.popitem(last=False)
+
+
+def _update_conflicts(
+    schedule: Dict[str, Any],
+    pairs: List[Tuple[int, int]],
+    index: IntervalIndex,
+    pos: int,
+) -> List[Tuple[int, int]]:
+    """
+    Re-evaluates overlaps for the single modified event at `pos` and its
+    former/new neighbours only; everything else is carried over unchanged.
+    Produces the same result as `_recompute_conflicts`.
+
+    `index` is updated in-place; the new overlap pairs are returned so a caller
+    holding on to the index can apply further adaptations.
+    """
+    events = schedule["events"]
+    target = events[pos]
+    conflicts = schedule["conflicts"]
+
+    # Pairs not involving the target keep their existing conflict entries.
+    former = set()
+    kept = []
+    for m, (i, j) in enumerate(pairs):
+        if i == pos or j == pos:
+            former.add(i if j == pos else j)
+        else:
+            kept.append(((i, j), conflicts[2 * m], conflicts[2 * m + 1]))
+
+    index.remove(pos)
+    current: List[int] = []
+    if target["status"] != "skipped":
+        start, end = _parse_iso(target["start_time"]), _parse_iso(target["end_time"])
+        current = index.overlapping(start, end)
+        index.insert(pos, start, end)
+
+    added = []
+    for i, j in sorted((min(pos, other), max(pos, other)) for other in current):
+        added.append((
+            (i, j),
+            {"task_id": events[i]["task_id"], "conflict_with": events[j]["session_id"], "reason": "overlap"},
+            {"task_id": events[j]["task_id"], "conflict_with": events[i]["session_id"], "reason": "overlap"},
+        ))
+
+    merged = list(heapq.merge(kept, added, key=lambda item: item[0]))
+    new_conflicts = []
+    new_pairs = []
+    in_conflict = set(current)
+    touched = former.union(current, [pos])
+    for pair, first, second in merged:
+        new_pairs.append(pair)
+        new_conflicts.append(first)
+        new_conflicts.append(second)
+        if pair[0] in touched:
+            in_conflict.add(pair[0])
+        if pair[1] in touched:
+            in_conflict.add(pair[1])
+    if current:
+        in_conflict.add(pos)
+
+    for other in touched:
+        if events[other]["status"] != "skipped":
+            events[other]["status"] = "conflict" if other in in_conflict else "scheduled"
+    schedule["conflicts"] = new_conflicts
+    return new_pairs
 
 
 async def adapt(payload: dict) -> dict:
@@ -106,10 +208,22 @@ async def adapt(payload: dict) -> dict:
     session_id = request.get("session_id")
     action = request.get("action")
 
-    target_event = next((e for e in schedule.get("events", []) if e["session_id"] == session_id), None)
+    events = schedule.get("events", [])
+
+    # A schedule this process returned earlier resumes from its stored state,
+    # so only the modified session is re-evaluated.
+    with span("adapt.load_conflicts"):
+        key = _digest(schedule)
+        conflict_state = _STATES.get(key) if key is not None else None
 
-    if not target_event:
+    if conflict_state is not None:
+        target_pos = conflict_state.positions.get(session_id) if isinstance(session_id, str) else None
+    else:
+        target_pos = next((pos for pos, e in enumerate(events) if e["session_id"] == session_id), None)
+
+    if target_pos is None:
         raise ValueError(f"Session with ID '{session_id}' not found in the schedule.")
+    target_event = events[target_pos]
 
     # --- Apply Adaptation Action ---
     exception_action = ""
@@ -152,15 +266,34 @@ async def adapt(payload: dict) -> dict:
             "timestamp": datetime.now(pytz.utc).isoformat(),
         })
 
-    _recompute_conflicts(schedule)
+    with span("adapt.conflicts"):
+        if conflict_state is not None:
+            # The index is updated in place, so the entry is consumed here.
+            del _STATES[key]
+            positions, index = conflict_state.positions, conflict_state.index
+            pairs = _update_conflicts(schedule, conflict_state.pairs, index, target_pos)
+        else:
+            positions = None
+            pairs, index = _recompute_conflicts(schedule)
 
     # --- Validate and Return ---
     try:
-        validate(instance=schedule, schema=SCHEDULE_SCHEMA)
-        return schedule
+        with span("adapt.validate"):
+            if conflict_state is not None:
+                # Everything but the target session is byte-for-byte what this
+                # process validated and returned last time; the new conflict
+                # entries only copy ids from validated events.
+                validate_output("AdaptationAgent", {"events": [target_event], "conflicts": [], "exceptions": []})
+            else:
+                # Events come from the client-supplied schedule, so always validate.
+                validate_output("AdaptationAgent", schedule)
     except ValidationError as e:
         raise ValueError(f"Adapted schedule failed schema validation: {e.message}")
 
+    with span("adapt.store_conflicts"):
+        _remember(schedule, positions, pairs, index)
+    return schedule
+
 # --- Example Usage (for testing) ---
 async def main():
     tz = pytz.timezone("America/Mexico_City")
@@ -1,160 +1,185 @@
-import ollama
-import re
+import os
 import json
 import asyncio
-from datetime import datetime, timedelta
-from dateutil.parser import parse as parse_date
-from dateutil.relativedelta import relativedelta
-from jsonschema import validate, ValidationError
-from typing import Dict, Any, List
-
-# --- Output JSON Schema ---
-GOAL_SCHEMA = {
-    "type": "object",
-    "properties": {
-        "type": {"type": "string", "enum": ["fitness", "skill", "project", "other"]},
-        "description": {"type": "string"},
-        "deadline": {"type": ["string", "null"], "format": "date"},
-        "constraints": {
-            "type": "object",
-            "properties": {
-                "days_available": {"type": "array", "items": {"type": "string"}},
-                "time_windows": {"type": "array", "items": {"type": "string"}}
-            },
-            "required": ["days_available", "time_windows"]
-        },
-        "preferences": {"type": "object"}
-    },
-    "required": ["type", "description", "deadline", "constraints", "preferences"]
-}
+from datetime import date
+from typing import Dict, Any
+
+from app.agents import goal_rules
+from app.llm.cache import LLM_CACHE, cache_key
+from app.llm.client import LLM_CLIENT, CircuitOpenError
+from app.llm.hedge import budget_from_env, hedged, report_source
+from app.llm.prompts import PromptTemplate
+from app.log import logger
+from app.schemas import GOAL_SCHEMA
+from app.timing import span
+from app.validation import ValidationError, validate_output
+
+MODEL = "gemma:3n-instruct"
+# Latency budget for the LLM path; unset means wait for it.
+BUDGET_SECONDS = budget_from_env("GOAL_PARSER_BUDGET_MS")
+# Answer single-sentence goals of a recognised type from the rule engine, skipping the LLM.
+RULES_FIRST = os.environ.get("GOAL_PARSER_RULES_FIRST", "false").lower() in ("1", "true", "yes")
 
-# --- Few-shot examples for the prompt ---
-FEW_SHOT_PROMPT = f"""\
-You are an expert at parsing user goals into structured JSON. Convert the user's text into the following JSON format. The `deadline` must be an ISO date (YYYY-MM-DD) or null. The `type` must be one of: fitness, skill, project, other.
+
+# --- Prompt: static few-shot prefix, dynamic date and input last ---
+# The examples carry their own fixed "today" so the prefix never changes;
+# the real date is supplied in the suffix.
+PROMPT = PromptTemplate(
+    name="goal_parser",
+    version="2",
+    prefix="""\
+You are an expert at parsing user goals into structured JSON. Convert the user's text into the following JSON format. The `deadline` must be an ISO date (YYYY-MM-DD) or null, resolved against the given date of today. The `type` must be one of: fitness, skill, project, other.
 
 **Example 1:**
+*Today:* 2025-01-15
 *User input:* "I want to run a 10k in 3 months. I can train on Mondays, Wednesdays, and Saturdays in the evenings."
 *JSON output:*
 ```json
-{{
+{
   "type": "fitness",
   "description": "Run a 10k",
-  "deadline": "{(datetime.now() + relativedelta(months=3)).strftime('%Y-%m-%d')}",
-  "constraints": {{
+  "deadline": "2025-04-15",
+  "constraints": {
     "days_available": ["Monday", "Wednesday", "Saturday"],
     "time_windows": ["evening"]
-  }},
-  "preferences": {{}}
-}}
+  },
+  "preferences": {}
+}
 ```
 
 **Example 2:**
+*Today:* 2025-01-15
 *User input:* "Help me learn Python. I have no deadline, just want to start. I can study on weekends."
 *JSON output:*
 ```json
-{{
+{
   "type": "skill",
   "description": "Learn Python",
   "deadline": null,
-  "constraints": {{
+  "constraints": {
     "days_available": ["Saturday", "Sunday"],
     "time_windows": []
-  }},
-  "preferences": {{}}
-}}
+  },
+  "preferences": {}
+}
 ```
 
 **Example 3:**
+*Today:* 2025-01-15
 *User input:* "I need to build a portfolio website by the end of August. I want an encouraging tone from you."
 *JSON output:*
 ```json
-{{
+{
   "type": "project",
   "description": "Build a portfolio website",
-  "deadline": "{datetime.now().year}-08-31",
-  "constraints": {{
+  "deadline": "2025-08-31",
+  "constraints": {
     "days_available": [],
     "time_windows": []
-  }},
-  "preferences": {{
+  },
+  "preferences": {
     "tone": "encouraging"
-  }}
-}}
+  }
+}
 ```
-"""
 
-async def parse(text: str) -> Dict[str, Any]:
-    """
-    Parses a user's goal text into a structured JSON object.
-    Uses Ollama first, then falls back to a regex-based parser.
-    Validates the output against a JSON schema before returning.
-    """
-    try:
-        # 1. Primary Path: Ollama
-        prompt = f"""\
-        {FEW_SHOT_PROMPT}
+Now, parse the following user input. Respond with ONLY the JSON object.
+
+""",
+    suffix="""\
+*Today:* {today}
+*User input:* "{text}"
+*JSON output:*
+""",
+)
+
+
+def _cache_key(text: str, today: str) -> str:
+    # Relative deadlines ("in 3 months") resolve against today, so the date is
+    # part of the key.
+    return cache_key("goal", text, MODEL, f"{PROMPT.cache_version}:{today}")
+
 
-        Now, parse the following user input. Respond with ONLY the JSON object.
+async def _llm_parse(text: str, today: str, key: str) -> Dict[str, Any]:
+    """
+    Asks Ollama to parse `text`, validates the answer and caches it.
 
-        **User input:** "{text}"
-        **JSON output:**
-        """
-        response = await ollama.chat(
-            model='gemma:3n-instruct',
+    Raises:
+        Exception: On any LLM, JSON or schema failure.
+    """
+    prompt = PROMPT.render(today=today, text=text)
+    with span("parse.llm"):
+        response = await LLM_CLIENT.chat_json(
+            model=MODEL,
             messages=[{'role': 'user', 'content': prompt}],
-            options=ollama.Options(temperature=0.0)
+            options={'temperature': 0.0}
         )
-        
-        # Clean and parse the model's response
+    PROMPT.record(prompt, response)
+
+    # Clean and parse the model's response
+    with span("parse.json"):
         json_string = response['message']['content'].strip()
         json_start = json_string.find('{')
         json_end = json_string.rfind('}') + 1
         json_string = json_string[json_start:json_end]
         goal_data = json.loads(json_string)
 
-    except Exception as e:
-        print(f"[GoalParser] Ollama call failed: {e}. Falling back to rule-based parser.")
-        # 2. Fallback Path: Regex
-        goal_data = _fallback_parser(text)
-
-    # 3. Validation
     try:
-        validate(instance=goal_data, schema=GOAL_SCHEMA)
+        with span("parse.validate"):
+            validate_output("GoalParserAgent", goal_data)
+    except ValidationError as e:
+        raise ValueError(f"Invalid JSON schema after parsing: {e.message}")
+    LLM_CACHE.put(key, goal_data)
+    return goal_data
+
+async def parse(text: str) -> Dict[str, Any]:
+    """
+    Parses a user's goal text into a structured JSON object.
+    With GOAL_PARSER_RULES_FIRST, simple goals are answered by the rule
+    engine. Otherwise uses Ollama (cached, keyed on the normalized text), then
+    falls back to the rule engine if the LLM fails, returns invalid output, or
+    misses GOAL_PARSER_BUDGET_MS. Validates the output against a JSON schema
+    before returning.
+    """
+    # 0. Rule engine, for simple goals when enabled
+    if RULES_FIRST:
+        with span("parse.rules"):
+            extraction = goal_rules.extract(text, date.today())
+        if extraction.confident:
+            report_source("rules")
+            return _validated(extraction.goal)
+
+    today = date.today().isoformat()
+    key = _cache_key(text, today)
+    with span("parse.cache"):
+        cached = await LLM_CACHE.aget(key)
+    if cached is not None:
+        report_source("cache")
+        return cached
+
+    # 1. Primary Path: Ollama, hedged by 2. Fallback Path: rule engine
+    goal_data, source, error = await hedged(_llm_parse(text, today, key), lambda: _fallback_parser(text), BUDGET_SECONDS)
+    if error is not None and not isinstance(error, CircuitOpenError):  # an open circuit already reported the outage
+        logger.warning(f"[GoalParser] Ollama call failed: {error}. Falling back to rule-based parser.")
+    report_source(source)
+    if source == "llm":
         return goal_data
+
+    # 3. Validation (the LLM path validates its own output)
+    return _validated(goal_data)
+
+def _validated(goal_data: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        with span("parse.validate"):
+            validate_output("GoalParserAgent", goal_data, trusted=True)
     except ValidationError as e:
         raise ValueError(f"Invalid JSON schema after parsing: {e.message}")
+    return goal_data
 
 def _fallback_parser(text: str) -> Dict[str, Any]:
-    """A simple regex-based fallback to create a best-effort goal structure."""
-    deadline = None
-    days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-    days_available = [day for day in days if re.search(r'\b' + day + r's?\b', text, re.IGNORECASE)]
-
-    # Date parsing
-    match = re.search(r'in (\d+) (weeks?|months?|days?)', text, re.IGNORECASE)
-    if match:
-        num, unit = match.groups()
-        delta_args = {unit.rstrip('s') + 's': int(num)}
-        deadline = (datetime.now() + relativedelta(**delta_args)).strftime('%Y-%m-%d')
-    else:
-        try:
-            # Try parsing absolute dates like "by August 31st"
-            parsed = parse_date(text, fuzzy=True)
-            if parsed.year != datetime.now().year or parsed.month != datetime.now().month or parsed.day != datetime.now().day:
-                deadline = parsed.strftime('%Y-%m-%d')
-        except (ValueError, TypeError):
-            pass # No deadline found
-
-    return {
-        "type": "other",
-        "description": text, # Use raw text as description
-        "deadline": deadline,
-        "constraints": {
-            "days_available": days_available,
-            "time_windows": []
-        },
-        "preferences": {}
-    }
+    """Best-effort goal structure from the single-pass rule engine."""
+    with span("parse.rules"):
+        return goal_rules.extract(text, date.today()).goal
 
 # --- Example Usage (for testing) ---
 async def main():
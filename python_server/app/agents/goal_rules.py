@@ -0,0 +1,371 @@
+"""
+Single-pass rule-based goal extraction.
+
+The goal parser's fallback, and (with GOAL_PARSER_RULES_FIRST) its first tier
+for simple goals. One precompiled scanner walks the text once; each match is
+dispatched on its named group:
+
+  * days      - weekdays ("Tuesdays", "thurs"), ranges ("Monday to Friday"),
+                "weekends", "weekdays", "weeknights", "every day", "daily"
+  * windows   - "mornings", "after work", "at 7pm", "lunchtime", ...
+  * deadlines - relative ("in 3 months", "within a fortnight", "tomorrow"),
+                period ends ("by the end of August", "this year", "next
+                month", "by spring"), absolute dates ("October 1st",
+                "1 March 2026", "2025-12-24", "12/24"), weekdays after "by",
+                and a few holidays ("by Christmas"). The first one between
+                today and MAX_DEADLINE_YEARS from now wins.
+  * type      - fitness / skill / project keywords; the most frequent type
+                wins, ties going to the first seen.
+  * prefs     - "an encouraging tone", session length ("for 30 minutes",
+                up to MAX_SESSION_MINUTES).
+
+Counts are at most three digits; absurd numbers ("in 99999999999 days") are
+not matched at all.
+
+The description is the first sentence with its lead-in ("I want to", "My goal
+is to") removed, cut where its first scheduling phrase starts (or, when the
+sentence opens with one, the text after it).
+
+Scheduling phrases that match but make no sense ("13pm", "February 30th",
+dates in the past or beyond MAX_DEADLINE_YEARS) are ignored, and the
+extraction is then not confident, so rules-first parsing defers to the LLM.
+"""
+
+import calendar
+import re
+from datetime import date, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from dateutil.relativedelta import relativedelta
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+WINDOWS = ["morning", "midday", "afternoon", "evening", "night"]
+MAX_DEADLINE_YEARS = 10
+MAX_SESSION_MINUTES = 12 * 60
+
+_DAY_STEMS = {
+    "mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6,
+}
+_MONTHS = {name.lower(): n for n, name in enumerate(calendar.month_name) if name}
+_MONTHS.update({name.lower(): n for n, name in enumerate(calendar.month_abbr) if name})
+_MONTHS["sept"] = 9
+_NUMBERS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "a couple of": 2, "a few": 3,
+}
+# (month, day) of the last day of each season, northern hemisphere.
+_SEASON_ENDS = {"spring": (5, 31), "summer": (8, 31), "fall": (11, 30), "autumn": (11, 30), "winter": (2, 28)}
+# Keyed without spaces or apostrophes.
+_HOLIDAYS = {"christmas": (12, 25), "xmas": (12, 25), "newyearseve": (12, 31), "halloween": (10, 31),
+             "valentines": (2, 14), "valentinesday": (2, 14)}
+_WINDOW_WORDS = {
+    "morning": "morning", "before work": "morning", "before school": "morning", "early": "morning",
+    "lunch": "midday", "lunchtime": "midday", "lunch time": "midday", "lunch break": "midday",
+    "lunchbreak": "midday", "noon": "midday", "midday": "midday",
+    "afternoon": "afternoon", "after school": "afternoon",
+    "evening": "evening", "after work": "evening", "tonight": "evening",
+    "night": "night",
+}
+_TONES = "encouraging|supportive|gentle|strict|tough|firm|friendly|motivating|motivational|casual|playful|formal|direct"
+
+# --- Scanner ---
+_DAY = r"(?:mon|tues?|wed(?:nes)?|weds|thu(?:rs?)?|thurs|fri|sat(?:ur)?|sun)"
+_FULL_DAY = r"(?:mon|tues|wednes|thurs|fri|satur|sun)day"
+_MONTH = (r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+          r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)")
+_NUM = r"(?:\d{1,3}|a\s+couple\s+of|a\s+few|an?|one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve)"
+_ORD = r"(?:st|nd|rd|th)?"
+
+_SCANNER_SOURCE = (
+    rf"""
+    # Every token starts a word: one cheap check per position before any
+    # alternative is tried.
+    (?=[a-z0-9])(?<!\w)
+    (?:
+    (?P<relative>(?:in|within|in\s+the\s+next|over\s+the\s+next)\s+(?P<rel_n>{_NUM})\s+
+        (?P<rel_unit>days?|weeks?|fortnights?|months?|years?)\b)
+  | (?P<tomorrow>(?:by\s+)?tomorrow\b)
+  | (?P<next>(?:by\s+)?next\s+(?P<next_what>week(?!ends?)|month|year|{_FULL_DAY}))\b
+  | (?P<period_end>(?:by\s+|before\s+|until\s+)?(?:the\s+)?end\s+of\s+(?:the\s+|this\s+)?
+        (?P<end_what>week|month|year|{_MONTH}|spring|summer|fall|autumn|winter)\b)
+  | (?P<this>(?:by\s+)?this\s+(?P<this_what>week(?!ends?)|month|year|spring|summer|fall|autumn|winter)\b)
+  | (?P<season>(?:by|before|until)\s+(?:the\s+)?(?P<season_name>spring|summer|fall|autumn|winter)\b)
+  | (?P<holiday>(?:by|before|until|for|on)\s+(?P<holiday_name>christmas|xmas|new\s+year'?s\s+eve|halloween|valentine'?s(?:\s+day)?)\b)
+  | (?P<iso>(?:(?:by|before|until|on)\s+)?(?P<iso_y>\d{{4}})-(?P<iso_m>\d{{1,2}})-(?P<iso_d>\d{{1,2}})\b)
+  | (?P<numeric>(?:by|before|until|on)\s+(?P<num_m>\d{{1,2}})/(?P<num_d>\d{{1,2}})(?:/(?P<num_y>\d{{2}}|\d{{4}}))?\b)
+  | (?P<month_day>(?:(?:by|before|until|on)\s+)?(?P<md_month>{_MONTH})\.?\s+(?P<md_day>\d{{1,2}}){_ORD}
+        (?:,?\s+(?P<md_year>\d{{4}}))?\b)
+  | (?P<day_month>(?:(?:by|before|until|on)\s+)?(?:the\s+)?(?P<dm_day>\d{{1,2}}){_ORD}\s+(?:of\s+)?
+        (?P<dm_month>{_MONTH})\b(?:,?\s+(?P<dm_year>\d{{4}}))?)
+  | (?P<by_month>(?:by|before|until|in)\s+(?P<bm_month>{_MONTH})\b(?:\s+(?P<bm_year>\d{{4}}))?)
+  | (?P<by_day>(?:by|before|until)\s+(?P<by_day_name>{_FULL_DAY})\b)
+  | (?P<day_range>(?P<range_from>{_DAY})(?:day)?s?\s*(?:-|–|to|through|thru)\s*(?P<range_to>{_DAY})(?:day)?s?\b)
+  | (?P<weekday>(?P<day_name>{_FULL_DAY}|tues|weds|thurs)s?\b)
+  | (?P<day_group>(?:every\s+other\s+day|every\s+day|each\s+day|everyday|daily|week\s?ends?|week\s?days?|week\s?nights?)\b)
+  | (?P<clock>(?:at\s+)?(?P<clock_h>\d{{1,2}})(?::(?P<clock_min>\d{{2}}))?\s*(?P<clock_ampm>a\.?m\.?|p\.?m\.?)(?!\w))
+  | (?P<window>(?:in\s+the\s+|during\s+the\s+|every\s+|on\s+)?(?P<window_word>mornings?|afternoons?|evenings?|nights?|
+        tonight|lunch\s?(?:time|break)?|noon|midday|before\s+(?:work|school)|after\s+(?:work|school))\b)
+  | (?P<duration>for\s+(?P<dur_n>\d{{1,3}}|an?|one|two|three)\s*(?P<dur_unit>minutes?|mins?|hours?|hrs?)\b)
+  | (?P<tone>(?:an?\s+)?(?P<tone_word>{_TONES})\s+(?:tone|style|coach(?:ing)?)\b)
+  | (?P<fitness>(?:run(?:ning)?|jog(?:ging)?|(?:half[\s-]?)?marathon|\d+k|gym|work\s?outs?|push[\s-]?ups?|pull[\s-]?ups?
+        |sit[\s-]?ups?|squats?|lift(?:ing)?|weights?|swim(?:ming)?|cycl(?:e|ing)|bike|biking|yoga|pilates|exercis(?:e|ing)
+        |fitness|triathlon|steps|stretch(?:ing)?|hik(?:e|ing)|climb(?:ing)?|cardio|fit|in\s+shape|lose\s+weight
+        |(?:pounds|lbs|kilos|kg)|abs|strength|train\s+for|plank)\b)
+  | (?P<skill>(?:learn(?:ing)?|practi[cs](?:e|ing)|study(?:ing)?|master|fluent|conversational|language|spanish|french
+        |german|japanese|chinese|mandarin|italian|korean|portuguese|piano|guitar|ukulele|violin|cello|drums|sing(?:ing)?
+        |instrument|draw(?:ing)?|paint(?:ing)?|cod(?:e|ing)|program(?:ming)?|python|javascript|chess|cook(?:ing)?
+        |photography|knit(?:ting)?|skills?|course|certifi(?:ed|cation)|exam)\b)
+  | (?P<project>(?:build(?:ing)?|creat(?:e|ing)|writ(?:e|ing)|launch(?:ing)?|project|website|app|novel|book|blog
+        |podcast|garden|renovat(?:e|ing)|declutter|organi[sz]e|pc|portfolio|thesis|business|startup|plan\s+and\s+execute)\b)
+    )
+    """
+)
+# Text is lowercased before scanning, which is cheaper than matching
+# case-insensitively; the rare text whose length changes when lowercased
+# (so match offsets would not line up) is scanned as is.
+_SCANNER = re.compile(_SCANNER_SOURCE, re.VERBOSE)
+_SCANNER_ANY_CASE = re.compile(_SCANNER_SOURCE, re.VERBOSE | re.IGNORECASE)
+
+_DAY_KINDS = {"day_range", "weekday", "day_group"}
+_WINDOW_KINDS = {"clock", "window"}
+_DEADLINE_KINDS = {"relative", "tomorrow", "next", "period_end", "this", "season", "holiday",
+                   "iso", "numeric", "month_day", "day_month", "by_month", "by_day"}
+_TYPE_KINDS = ("fitness", "skill", "project")
+# Kinds whose start ends the description.
+_CUT_KINDS = _DAY_KINDS | _WINDOW_KINDS | _DEADLINE_KINDS | {"duration", "tone"}
+
+_SENTENCE_END = re.compile(r"[.!?;](?:\s|$)|\n")
+_LEAD_IN = re.compile(
+    r"""^(?:\s*(?:(?:so|well|ok(?:ay)?|hey|hi|please)[,!]?\s+
+        |i\s+(?:really\s+)?(?:want|wanna|would\s+(?:really\s+)?(?:like|love)|need|plan|hope|aim
+            |intend|am\s+going|will|have|must|should)\s+(?:to\s+)?
+        |i'(?:d|ll)\s+(?:like\s+to\s+|love\s+to\s+)?|i'm\s+going\s+to\s+
+        |my\s+(?:main\s+)?(?:goal|objective|aim|plan|dream)\s+is\s+(?:to\s+)?|help\s+me\s+(?:to\s+)?
+        |let'?s\s+|(?:new\s+)?goal:\s*|to\s+))+""",
+    re.IGNORECASE | re.VERBOSE,
+)
+_TRAILING_FILLER = re.compile(
+    r"(?:[\s,;:\-]+|,\s*\w+ing\b|\b(?:on|by|in|at|every|each|during|before|until|within|for|from|starting|and|or|"
+    r"the|this|of|around|about)\b)+$",
+    re.IGNORECASE,
+)
+
+
+class GoalExtraction(NamedTuple):
+    goal: Dict[str, Any]
+    # A goal type was recognised and the input is a single sentence: simple
+    # enough for the rules to answer without the LLM.
+    confident: bool
+
+
+def _day_index(stem: str) -> int:
+    return _DAY_STEMS[stem[:3].lower()]
+
+
+def _number(word: str) -> int:
+    word = " ".join(word.lower().split())
+    return int(word) if word.isdigit() else _NUMBERS[word]
+
+
+def _month_end(year: int, month: int) -> date:
+    return date(year, month, calendar.monthrange(year, month)[1])
+
+
+def _upcoming(today: date, month: int, day: int, year: Optional[int] = None) -> date:
+    """
+    `month`/`day` in `year`, or the next occurrence on or after today.
+
+    Raises:
+        ValueError: The date does not exist ("February 30th"; "February 29th"
+                    in a common year).
+    """
+    if year is not None:
+        return date(year, month, day)
+    if not 1 <= day <= calendar.monthrange(2000, month)[1]:  # 2000 is a leap year
+        raise ValueError(f"day {day} is out of range for month {month}")
+    year = today.year
+    while True:
+        if day <= calendar.monthrange(year, month)[1]:  # skips years without a February 29th
+            candidate = date(year, month, day)
+            if candidate >= today:
+                return candidate
+        year += 1
+
+
+def _next_weekday(today: date, index: int) -> date:
+    return today + timedelta(days=(index - today.weekday() - 1) % 7 + 1)
+
+
+def _period_end(today: date, what: str) -> date:
+    what = what.lower()
+    if what == "week":
+        return today + timedelta(days=6 - today.weekday())
+    if what == "month":
+        return _month_end(today.year, today.month)
+    if what == "year":
+        return date(today.year, 12, 31)
+    if what in _SEASON_ENDS:
+        month, day = _SEASON_ENDS[what]
+        return _upcoming(today, month, day)
+    month = _MONTHS[what]
+    end = _month_end(today.year, month)
+    return end if end >= today else _month_end(today.year + 1, month)
+
+
+def _deadline(kind: str, m: "re.Match[str]", today: date) -> Optional[date]:
+    if kind == "relative":
+        n, unit = _number(m["rel_n"]), m["rel_unit"].lower().rstrip("s")
+        if unit == "fortnight":
+            n, unit = 2 * n, "week"
+        return today + relativedelta(**{unit + "s": n})
+    if kind == "tomorrow":
+        return today + timedelta(days=1)
+    if kind == "next":
+        what = m["next_what"].lower()
+        if what.endswith("day"):
+            return _next_weekday(today, _day_index(what))
+        return _period_end(today + relativedelta(**{what + "s": 1}), what)
+    if kind == "period_end":
+        return _period_end(today, m["end_what"])
+    if kind == "this":
+        return _period_end(today, m["this_what"])
+    if kind == "season":
+        return _period_end(today, m["season_name"])
+    if kind == "holiday":
+        return _upcoming(today, *_HOLIDAYS[re.sub(r"[\s']", "", m["holiday_name"].lower())])
+    if kind == "iso":
+        return date(int(m["iso_y"]), int(m["iso_m"]), int(m["iso_d"]))
+    if kind == "numeric":
+        year = m["num_y"] and int(m["num_y"]) + (2000 if len(m["num_y"]) == 2 else 0)
+        return _upcoming(today, int(m["num_m"]), int(m["num_d"]), year or None)
+    if kind == "month_day":
+        return _upcoming(today, _MONTHS[m["md_month"].lower()], int(m["md_day"]),
+                         int(m["md_year"]) if m["md_year"] else None)
+    if kind == "day_month":
+        return _upcoming(today, _MONTHS[m["dm_month"].lower()], int(m["dm_day"]),
+                         int(m["dm_year"]) if m["dm_year"] else None)
+    if kind == "by_month":
+        month = _MONTHS[m["bm_month"].lower()]
+        return _month_end(int(m["bm_year"]), month) if m["bm_year"] else _period_end(today, m["bm_month"])
+    if kind == "by_day":
+        return _next_weekday(today, _day_index(m["by_day_name"]))
+    return None
+
+
+def _days(kind: str, m: "re.Match[str]") -> List[int]:
+    if kind == "weekday":
+        return [_day_index(m["day_name"])]
+    if kind == "day_range":
+        start, end = _day_index(m["range_from"]), _day_index(m["range_to"])
+        return [(start + i) % 7 for i in range((end - start) % 7 + 1)]
+    group = re.sub(r"\s+", "", m["day_group"].lower())
+    if group.startswith("weekend"):
+        return [5, 6]
+    if group.startswith(("weekday", "weeknight")):
+        return [0, 1, 2, 3, 4]
+    return list(range(7))
+
+
+def _window(kind: str, m: "re.Match[str]") -> str:
+    """
+    Raises:
+        ValueError: A 12-hour clock time that does not exist ("13pm", "0am", "7:75pm").
+    """
+    if kind == "clock":
+        hour = int(m["clock_h"])
+        if not 1 <= hour <= 12 or (m["clock_min"] and int(m["clock_min"]) > 59):
+            raise ValueError(f"invalid clock time '{m['clock'].strip()}'")
+        hour = hour % 12 + (12 if m["clock_ampm"].lower().startswith("p") else 0)
+        return "morning" if hour < 11 else "midday" if hour < 14 else "afternoon" if hour < 17 \
+            else "evening" if hour < 21 else "night"
+    word = " ".join(m["window_word"].lower().split())
+    return _WINDOW_WORDS[word[:-1] if word.endswith("s") else word]
+
+
+def _description(sentence: str, phrases: List[Tuple[int, int]]) -> str:
+    """
+    The first stretch of `sentence` between scheduling `phrases` (sorted
+    (start, end) spans) that is left non-empty once its lead-in and trailing
+    filler are removed.
+    """
+    start = 0
+    for phrase_start, phrase_end in phrases + [(len(sentence), len(sentence))]:
+        text = _TRAILING_FILLER.sub("", _LEAD_IN.sub("", sentence[start:phrase_start]).strip()).strip()
+        if text:
+            break
+        start = phrase_end
+    else:
+        text = _TRAILING_FILLER.sub("", _LEAD_IN.sub("", sentence)).strip() or sentence.strip()
+    return text[:1].upper() + text[1:]
+
+
+def extract(text: str, today: date) -> GoalExtraction:
+    """Extracts a GOAL_SCHEMA-shaped goal from `text` in one scan; deadlines resolve against `today`."""
+    text = text.strip()
+    end = _SENTENCE_END.search(text)
+    first_sentence_end = end.start() if end else len(text)
+    sentence = text[:first_sentence_end]
+
+    days, windows = set(), set()
+    deadline: Optional[date] = None
+    type_counts = dict.fromkeys(_TYPE_KINDS, 0)
+    first_type: Dict[str, int] = {}
+    preferences: Dict[str, Any] = {}
+    phrases: List[Tuple[int, int]] = []
+    # A scheduling phrase was recognised but could not be interpreted
+    # ("13pm", "February 30th", a date in the past): leave it to the LLM.
+    rejected = False
+
+    latest_deadline = today + relativedelta(years=MAX_DEADLINE_YEARS)
+    lowered = text.lower()
+    scan = _SCANNER.finditer(lowered) if len(lowered) == len(text) else _SCANNER_ANY_CASE.finditer(text)
+    for m in scan:
+        kind = m.lastgroup
+        if kind in _CUT_KINDS and m.start() < len(sentence):
+            phrases.append(m.span())
+        if kind in _DAY_KINDS:
+            days.update(_days(kind, m))
+            if m["day_group"] and "night" in m["day_group"].lower():
+                windows.add("evening")
+        elif kind in _WINDOW_KINDS:
+            try:
+                windows.add(_window(kind, m))
+            except ValueError:
+                rejected = True
+        elif kind in _DEADLINE_KINDS:
+            if deadline is None:
+                try:
+                    candidate = _deadline(kind, m, today)
+                except (ValueError, KeyError, OverflowError):  # e.g. "February 30th", "in 999 years"
+                    candidate = None
+                if candidate is not None and today <= candidate <= latest_deadline:
+                    deadline = candidate
+                else:
+                    rejected = True
+        elif kind == "duration":
+            n, unit = _number(m["dur_n"]), m["dur_unit"].lower()
+            minutes = n * 60 if unit.startswith("h") else n
+            if 0 < minutes <= MAX_SESSION_MINUTES:
+                preferences["session_minutes"] = minutes
+        elif kind == "tone":
+            preferences["tone"] = m["tone_word"].lower()
+        elif kind in type_counts:
+            type_counts[kind] += 1
+            first_type.setdefault(kind, m.start())
+
+    goal_type = "other"
+    if any(type_counts.values()):
+        goal_type = max(_TYPE_KINDS, key=lambda t: (type_counts[t], -first_type.get(t, len(text))))
+
+    goal = {
+        "type": goal_type,
+        "description": _description(sentence, phrases),
+        "deadline": deadline.isoformat() if deadline else None,
+        "constraints": {
+            "days_available": [WEEKDAYS[i] for i in sorted(days)],
+            "time_windows": [w for w in WINDOWS if w in windows],
+        },
+        "preferences": preferences,
+    }
+    single_sentence = not text[first_sentence_end:].strip(" .!?;\n")
+    return GoalExtraction(goal, goal_type != "other" and single_sentence and not rejected)
@@ -5,12 +5,50 @@ Classifies raw user text into one of three intents:
   • adaptation_request  – they ask to skip / postpone / change something
   • general_chat        – anything else
 
-Primary path: LLM via Ollama (Gemma-3n).  Fallback: regex + keyword heuristics.
+Tier 1: scored regex/keyword heuristics.  Inputs whose confidence reaches
+INTENT_CONFIDENCE_THRESHOLD are answered immediately.
+Tier 2: in-process hashed n-gram model (app.agents.intent_model). Answers when
+        its calibrated probability reaches INTENT_MODEL_THRESHOLD and it knows
+        at least INTENT_MODEL_MIN_KNOWN_FEATURES of the input's words.
+Tier 3: LLM via Ollama (Gemma-3n), cached, for the ambiguous remainder.
+        Concurrent LLM-bound inputs are micro-batched into one numbered prompt.
+Fallback: the heuristic's best guess when the LLM fails.
 """
 
+import json
+import os
 import re
-import asyncio
-from typing import Dict
+import threading
+from typing import Dict, List, Sequence, Tuple, Union
+
+from app.agents import intent_model
+from app.llm.batcher import MicroBatcher
+from app.llm.cache import LLM_CACHE, cache_key
+from app.llm.client import LLM_CLIENT
+from app.llm.hedge import budget_from_env, hedged, report_source
+from app.llm.prompts import PromptTemplate
+from app.timing import span
+
+_MODEL = "gemma:3n"
+
+INTENT_NEW_GOAL = "new_goal"
+INTENT_ADAPTATION_REQUEST = "adaptation_request"
+INTENT_GENERAL_CHAT = "general_chat"
+# Also the tie-break order of the heuristic.
+_LABELS = (INTENT_NEW_GOAL, INTENT_ADAPTATION_REQUEST, INTENT_GENERAL_CHAT)
+
+# Heuristic confidence (0..1) at or above which the LLM is skipped.
+# Set above 1 to always ask the LLM.
+CONFIDENCE_THRESHOLD = float(os.environ.get("INTENT_CONFIDENCE_THRESHOLD", 0.5))
+# Model probability at or above which the LLM is skipped; set above 1 to disable the model tier.
+MODEL_THRESHOLD = float(os.environ.get("INTENT_MODEL_THRESHOLD", 0.7))
+# Word uni-/bigrams of the input the model must have seen in training before it is trusted at all.
+MODEL_MIN_KNOWN_FEATURES = int(os.environ.get("INTENT_MODEL_MIN_KNOWN_FEATURES", 2))
+# Latency budget for the LLM tier; unset means wait for it.
+BUDGET_SECONDS = budget_from_env("INTENT_CLASSIFIER_BUDGET_MS")
+# LLM-bound inputs arriving within this window share one prompt; 0 disables batching.
+BATCH_WINDOW_SECONDS = float(os.environ.get("INTENT_BATCH_WINDOW_MS", 5)) / 1000
+BATCH_MAX_SIZE = int(os.environ.get("INTENT_BATCH_MAX_SIZE", 8))
 
 # --------- Few-shot prompt templates (for Gemma path) ----------
 _FEWSHOT = [
@@ -33,43 +71,215 @@ _SYS_PROMPT = (
     "'new_goal', 'adaptation_request', or 'general_chat'."
 )
 
-# ---------- Regex fallback -------------------------------------------------
-_NEW_GOAL_PAT  = re.compile(
-    r"""(?ix)
-    ^\s*
-    (i\s+want\s+to|i'd\s+like\s+to|my\s+goal\s+is|i\s+plan\s+to|
-     i'm\s+going\s+to|i\s+need\s+to|i\s+will)
-    """)
-_ADAPT_PAT     = re.compile(r"(?i)\b(skip|postpone|reschedule|delay|move)\b")
+# Built once: system prompt and shots are the static prefix, the user's text comes last.
+# Bump the version whenever _FEWSHOT or _SYS_PROMPT change.
+PROMPT = PromptTemplate(
+    name="intent_classifier",
+    version="1",
+    prefix=_SYS_PROMPT + "\n\n" + "\n".join([f"USER: {u}\nASSISTANT: {l}" for u, l in _FEWSHOT]) + "\n",
+    suffix="USER: {text}\nASSISTANT:",
+)
+
+# Several inputs at once: numbered in, "<n>: <label>" lines out. Each sentence
+# is a JSON string, so one user's text cannot add lines (or labels) for another's.
+# The shots are interleaved so the example answer is not sorted by label.
+_BATCH_SHOTS = [_FEWSHOT[i] for i in (0, 3, 6, 1, 4, 7, 2, 5, 8)]
+
+
+def _batch_item(n: int, text: str) -> str:
+    return f"{n}. {json.dumps(text, ensure_ascii=False)}"
+
+
+BATCH_PROMPT = PromptTemplate(
+    name="intent_classifier_batch",
+    version="2",
+    prefix=(
+        "You are an intent-classification assistant. "
+        "The USER sends numbered sentences, each one a quoted string. For each one, "
+        "answer on its own line with its number, a colon and one word only: "
+        "'new_goal', 'adaptation_request', or 'general_chat'.\n\n"
+        "USER:\n" + "\n".join(_batch_item(n, u) for n, (u, _) in enumerate(_BATCH_SHOTS, 1)) + "\n"
+        "ASSISTANT:\n" + "\n".join(f"{n}: {l}" for n, (_, l) in enumerate(_BATCH_SHOTS, 1)) + "\n\n"
+    ),
+    suffix="USER:\n{items}\nASSISTANT:\n",
+)
+_BATCH_LINE = re.compile(r"^\s*(\d+)\s*[:.)\-]\s*([A-Za-z_]+)", re.MULTILINE)
+
+# ---------- Scored heuristics (tier 1) -------------------------------------
+# Each matching signal adds its weight to its intent's score.
+_SIGNALS: List[Tuple[re.Pattern, str, float]] = [
+    # new_goal: first-person intention, goal vocabulary, time frames
+    (re.compile(r"""(?ix) ^\s* (let'?s\s+)? (i\s+want\s+to|i'd\s+like\s+to|i\s+would\s+like\s+to|
+        my\s+(goal|objective|aim)\s+is|i\s+plan\s+to|i'm\s+going\s+to|i\s+am\s+going\s+to|
+        i\s+aim\s+to|i\s+will|i\s+hope\s+to|help\s+me)\b"""), INTENT_NEW_GOAL, 0.6),
+    (re.compile(r"(?i)^\s*i\s+need\s+to\b"), INTENT_NEW_GOAL, 0.4),
+    (re.compile(r"""(?ix) \b(learn|run\s+a|train\s+for|get\s+better\s+at|become|build|create|write|
+        read|practi[cs]e|exercise|lose|save|finish|start(\s+planning)?|improve|master|meditate)\b"""),
+     INTENT_NEW_GOAL, 0.3),
+    (re.compile(r"""(?ix) \b(by\s+(the\s+end\s+of|next|christmas|january|february|march|april|may|june|july|
+        august|september|october|november|december)|in\s+(\d+|a|one|two|three|six)\s+(days?|weeks?|months?|years?)|
+        this\s+(month|year)|every\s+day|daily|times\s+a\s+week)\b"""), INTENT_NEW_GOAL, 0.2),
+    # adaptation_request: changing something already scheduled
+    (re.compile(r"(?i)\b(skip|postpone|reschedule|delay|cancel|push\s+back)\b"), INTENT_ADAPTATION_REQUEST, 0.9),
+    (re.compile(r"(?i)\b(move|change|modify|adjust|swap|shift|shorten|extend)\b"), INTENT_ADAPTATION_REQUEST, 0.5),
+    (re.compile(r"""(?ix) \b(today'?s|tonight'?s|tomorrow'?s?|session|workout|meeting|appointment|deadline|
+        practice|task|goal|plan|schedule|project'?s)\b"""), INTENT_ADAPTATION_REQUEST, 0.2),
+    # general_chat: greetings, thanks, small talk
+    (re.compile(r"""(?ix) (^\s*(hi|hello|hey|good\s+(morning|afternoon|evening))\b|\bhello\b|\bthanks?\b|\bthank\s+you\b|
+        \bhow\s+are\s+you\b|\btell\s+me\s+(a|an|some)\b|\bwho\s+(are|made|created|built)\s+you\b|
+        \bwhat('s|\s+is)\s+the\s+(weather|time|date)\b|\bwhat\s+time\b|\bcan\s+you\s+help\b)"""),
+     INTENT_GENERAL_CHAT, 0.9),
+    (re.compile(r"\?\s*$"), INTENT_GENERAL_CHAT, 0.3),
+]
+
+
+def heuristic_scores(text: str) -> Dict[str, float]:
+    """Sums the weights of the signals that match `text`, per intent."""
+    scores = dict.fromkeys(_LABELS, 0.0)
+    for pattern, intent, weight in _SIGNALS:
+        if pattern.search(text):
+            scores[intent] += weight
+    return {intent: round(score, 3) for intent, score in scores.items()}
+
+
+def heuristic_intent(text: str) -> Tuple[str, float]:
+    """
+    Returns the best-scoring intent and a confidence in [0, 1]: the margin
+    between the best and second-best scores. Inputs that match nothing get
+    general_chat with confidence 0.
+    """
+    scores = heuristic_scores(text)
+    ranked = sorted(_LABELS, key=lambda label: -scores[label])  # stable: ties keep _LABELS order
+    if scores[ranked[0]] == 0:
+        return INTENT_GENERAL_CHAT, 0.0
+    return ranked[0], round(min(1.0, scores[ranked[0]] - scores[ranked[1]]), 3)
+
+
+# Loaded once; None if the weights file is missing, which disables the tier.
+_INTENT_MODEL = intent_model.load_default()
+
+
+# ---------- Tier metrics ---------------------------------------------------
+_TIERS = ("heuristic", "model", "cache", "llm", "fallback", "budget")
+_tier_counts = dict.fromkeys(_TIERS, 0)
+_tier_lock = threading.Lock()
+
+
+def _served_by(tier: str) -> None:
+    report_source(tier)
+    with _tier_lock:
+        _tier_counts[tier] += 1
+
+
+def stats() -> Dict[str, object]:
+    """Requests served by each tier, as counts and shares of the total."""
+    with _tier_lock:
+        counts = dict(_tier_counts)
+    total = sum(counts.values())
+    return {
+        "confidence_threshold": CONFIDENCE_THRESHOLD,
+        "model_threshold": MODEL_THRESHOLD if _INTENT_MODEL is not None else None,
+        "model_min_known_features": MODEL_MIN_KNOWN_FEATURES if _INTENT_MODEL is not None else None,
+        "total": total,
+        "counts": counts,
+        "shares": {tier: round(n / total, 4) if total else 0.0 for tier, n in counts.items()},
+        "batching": _BATCHER.stats(),
+    }
+
 
 async def _llm_intent(text: str) -> str:
-    """Call Gemma via Ollama; return intent or raise RuntimeError."""
-    import ollama  # local client
-    shots = "\n".join([f"USER: {u}\nASSISTANT: {l}" for u, l in _FEWSHOT])
-    prompt = f"{_SYS_PROMPT}\n\n{shots}\nUSER: {text}\nASSISTANT:"
-    resp = await asyncio.to_thread(
-        ollama.chat,
-        model="gemma:3n",
+    """Call Gemma via the shared Ollama client; return its lowercased answer or raise."""
+    prompt = PROMPT.render(text=text)
+    resp = await LLM_CLIENT.chat(
+        model=_MODEL,
         messages=[{"role": "user", "content": prompt}],
     )
+    PROMPT.record(prompt, resp)
     return resp["message"]["content"].strip().lower()
 
+
+def parse_batch_labels(answer: str, count: int) -> List[str]:
+    """
+    Splits a batched answer into `count` labels, by item number.
+
+    Raises:
+        ValueError: Unless the answer has exactly one line for each of items
+                    1..count; a garbled answer cannot be attributed item by item.
+    """
+    matches = [(int(match.group(1)), match.group(2).lower()) for match in _BATCH_LINE.finditer(answer)]
+    labels = dict(matches)
+    if len(matches) != count or sorted(labels) != list(range(1, count + 1)):
+        raise ValueError(f"Batched answer numbers {sorted(n for n, _ in matches)}, expected 1..{count}")
+    return [labels[n] for n in range(1, count + 1)]
+
+
+async def _llm_intents(texts: List[str]) -> Sequence[Union[Tuple[str, str], ValueError]]:
+    """
+    One LLM call for every text submitted within a batch window. Returns
+    (label, cache version of the prompt that produced it) per text.
+    """
+    if len(texts) == 1:
+        return [(await _llm_intent(texts[0]), PROMPT.cache_version)]
+    items = "\n".join(_batch_item(n, text) for n, text in enumerate(texts, 1))
+    prompt = BATCH_PROMPT.render(items=items)
+    resp = await LLM_CLIENT.chat(
+        model=_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+    )
+    BATCH_PROMPT.record(prompt, resp)
+    try:
+        labels = parse_batch_labels(resp["message"]["content"], len(texts))
+    except ValueError as e:
+        return [e] * len(texts)
+    return [(label, BATCH_PROMPT.cache_version) for label in labels]
+
+
+_BATCHER = MicroBatcher("intent_classifier", _llm_intents, BATCH_MAX_SIZE, BATCH_WINDOW_SECONDS)
+
+
+async def _llm_label(text: str) -> str:
+    """
+    Asks Gemma and caches the label under the version of the prompt (single or
+    batched) that produced it; raises ValueError on an out-of-set answer.
+    """
+    with span("classify.llm"):
+        label, version = await _BATCHER.submit(text)
+    if label not in _LABELS:
+        raise ValueError(f"Unexpected intent label '{label}'")
+    LLM_CACHE.put(cache_key("intent", text, _MODEL, version), label)
+    return label
+
 async def classify(text: str) -> Dict[str, str]:
     """
     Public entry-point – returns {"intent": "..."}.
-    Falls back to regex heuristics if LLM fails or returns out-of-set label.
+    Answers from the heuristics or the local model when they are confident
+    enough, otherwise asks the LLM; falls back to the heuristic's best guess if the LLM fails,
+    returns an out-of-set label, or misses INTENT_CLASSIFIER_BUDGET_MS.
     """
-    # 1️⃣  Try Gemma
-    try:
-        label = await _llm_intent(text)
-        if label in {"new_goal", "adaptation_request", "general_chat"}:
+    # 1️⃣  Confident heuristics
+    with span("classify.heuristic"):
+        guess, confidence = heuristic_intent(text)
+    if confidence >= CONFIDENCE_THRESHOLD:
+        _served_by("heuristic")
+        return {"intent": guess}
+
+    # 2️⃣  Confident local model
+    if _INTENT_MODEL is not None:
+        with span("classify.model"):
+            [(label, probability)] = _INTENT_MODEL.predict([text])
+            [known] = _INTENT_MODEL.known_features([text])
+        if probability >= MODEL_THRESHOLD and known >= MODEL_MIN_KNOWN_FEATURES:
+            _served_by("model")
             return {"intent": label}
-    except Exception:
-        pass  # swallow and try fallback
-
-    # 2️⃣  Regex heuristic fallback
-    if _NEW_GOAL_PAT.search(text):
-        return {"intent": "new_goal"}
-    if _ADAPT_PAT.search(text):
-        return {"intent": "adaptation_request"}
-    return {"intent": "general_chat"}
\ No newline at end of file
+
+    # 3️⃣  Gemma (cached per normalized text), hedged by
+    # 4️⃣  the heuristic best guess
+    with span("classify.cache"):
+        for template in (PROMPT, BATCH_PROMPT):
+            label = await LLM_CACHE.aget(cache_key("intent", text, _MODEL, template.cache_version))
+            if label is not None:
+                _served_by("cache")
+                return {"intent": label}
+    label, source, _ = await hedged(_llm_label(text), lambda: guess, BUDGET_SECONDS)
+    _served_by(source)
+    return {"intent": label}
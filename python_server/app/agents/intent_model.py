@@ -0,0 +1,256 @@
+"""
+Lightweight in-process intent model: the middle tier of the intent classifier.
+
+Text is turned into hashed features (character 2-4-grams of the padded,
+casefolded text plus word uni- and bigrams, each bucketed with CRC32 into
+`DIM` slots), and a multinomial logistic regression over those features gives
+a probability per intent. Inference never builds the dense feature matrix:
+for a batch it gathers the weight rows of every hashed feature and sums them
+per text with one `np.add.reduceat`, so it runs in tens of microseconds and
+needs neither the network nor Ollama.
+
+The model is trained offline from the classifier's few-shot examples plus the
+labelled corpus in data/intent_corpus.tsv, and its weights are stored as a
+small compressed array file (data/intent_model.npz, float16). Training also
+fits a softmax temperature on cross-validated (out-of-fold) logits, so the
+probabilities match held-out accuracy, and records the vocabulary of word
+uni- and bigrams it saw. A linear model is still confident about inputs
+unlike anything it was trained on (gibberish, empty text: the bias alone
+decides), so `known_features` counts how much of an input's vocabulary the
+model has seen, and the classifier does not trust it below a minimum.
+Retrain after editing the corpus:
+
+    python -m app.agents.intent_model
+"""
+
+import math
+import re
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.log import logger
+
+DIM = 2 ** 12
+NGRAMS = (2, 3, 4)
+
+DATA_DIR = Path(__file__).parent / "data"
+CORPUS_PATH = DATA_DIR / "intent_corpus.tsv"
+WEIGHTS_PATH = DATA_DIR / "intent_model.npz"
+
+_WORD = re.compile(r"\w+|[^\w\s]")
+
+# gram -> bucket; CRC32 of a short string costs more than a dict lookup.
+_bucket_of: Dict[str, int] = {}
+_BUCKET_MEMO_SIZE = 200_000
+
+
+def _bucket(gram: str) -> int:
+    bucket = _bucket_of.get(gram)
+    if bucket is None:
+        if len(_bucket_of) >= _BUCKET_MEMO_SIZE:
+            _bucket_of.clear()
+        bucket = _bucket_of[gram] = zlib.crc32(gram.encode("utf-8")) % DIM
+    return bucket
+
+
+def _word_grams(text: str) -> List[str]:
+    """Word uni- and bigram features of casefolded, whitespace-collapsed text."""
+    words = _WORD.findall(text)
+    return ["w:" + w for w in words] + [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def _buckets(text: str) -> List[int]:
+    """Hashed feature ids of one text (with repeats)."""
+    text = " ".join(text.casefold().split())
+    padded = f" {text} "
+    grams = [padded[i:i + n] for n in NGRAMS for i in range(len(padded) - n + 1)]
+    grams += _word_grams(text)
+    return [_bucket_of[gram] if gram in _bucket_of else _bucket(gram) for gram in grams]
+
+
+def _vocabulary_ids(text: str) -> np.ndarray:
+    """Unbucketed CRC32s of the distinct word features of one text."""
+    grams = set(_word_grams(" ".join(text.casefold().split())))
+    return np.array(sorted(zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.uint32)
+
+
+def _sparse(texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Distinct feature ids of all texts concatenated, their L2-normalized counts,
+    and the offset where each text starts.
+    """
+    cols: List[int] = []
+    values: List[float] = []
+    starts: List[int] = []
+    for text in texts:
+        starts.append(len(cols))
+        counts = Counter(_buckets(text)) or Counter([0])
+        norm = math.sqrt(sum(c * c for c in counts.values()))
+        cols.extend(counts)
+        values.extend(c / norm for c in counts.values())
+    return np.array(cols, dtype=np.intp), np.array(values, dtype=np.float32), np.array(starts, dtype=np.intp)
+
+
+def features(texts: Sequence[str]) -> np.ndarray:
+    """(len(texts), DIM) float32 matrix of L2-normalized hashed feature counts."""
+    cols, values, starts = _sparse(texts)
+    rows = np.repeat(np.arange(len(texts)), np.diff(np.append(starts, len(cols))))
+    matrix = np.zeros((len(texts), DIM), dtype=np.float32)
+    matrix[rows, cols] = values
+    return matrix
+
+
+class IntentModel:
+    """Linear softmax classifier over hashed n-gram features."""
+
+    def __init__(
+        self,
+        labels: Sequence[str],
+        weights: np.ndarray,
+        bias: np.ndarray,
+        temperature: float = 1.0,
+        vocabulary: Optional[np.ndarray] = None,
+    ):
+        self.labels = tuple(labels)
+        self.weights = weights.astype(np.float32)
+        self.bias = bias.astype(np.float32)
+        self.temperature = float(temperature)
+        # Sorted CRC32s of the word features seen in training.
+        self.vocabulary = np.zeros(0, np.uint32) if vocabulary is None else np.asarray(vocabulary, np.uint32)
+
+    @classmethod
+    def load(cls, path: Path = WEIGHTS_PATH) -> "IntentModel":
+        with np.load(path) as data:
+            if int(data["dim"]) != DIM:
+                raise ValueError(f"{path} was trained with dim={int(data['dim'])}, expected {DIM}")
+            return cls(
+                [str(label) for label in data["labels"]],
+                data["weights"],
+                data["bias"],
+                float(data["temperature"]),
+                data["vocabulary"],
+            )
+
+    def save(self, path: Path = WEIGHTS_PATH) -> None:
+        np.savez_compressed(
+            path,
+            labels=np.array(self.labels),
+            weights=self.weights.astype(np.float16),
+            bias=self.bias.astype(np.float16),
+            temperature=np.array(self.temperature),
+            vocabulary=self.vocabulary,
+            dim=np.array(DIM),
+        )
+
+    def logits(self, texts: Sequence[str]) -> np.ndarray:
+        """(len(texts), len(labels)) uncalibrated logits."""
+        cols, values, starts = _sparse(texts)
+        return np.add.reduceat(self.weights[cols] * values[:, None], starts, axis=0) + self.bias
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        """(len(texts), len(labels)) calibrated probabilities."""
+        return _softmax(self.logits(texts) / self.temperature)
+
+    def known_features(self, texts: Sequence[str]) -> List[int]:
+        """How many distinct word uni- and bigrams of each text the model saw in training."""
+        return [int(np.isin(_vocabulary_ids(text), self.vocabulary).sum()) for text in texts]
+
+    def predict(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        """Best label and its probability for each text."""
+        proba = self.predict_proba(texts)
+        best = proba.argmax(axis=1)
+        return [(self.labels[i], round(float(p), 4)) for i, p in zip(best, proba[np.arange(len(best)), best])]
+
+
+def train(
+    examples: Iterable[Tuple[str, str]],
+    labels: Sequence[str],
+    epochs: int = 300,
+    learning_rate: float = 1.0,
+    l2: float = 1e-3,
+) -> IntentModel:
+    """Fits the softmax regression with full-batch gradient descent. The temperature is left at 1; see `calibrate`."""
+    texts, targets = zip(*examples)
+    x = features(texts)
+    y = np.zeros((len(texts), len(labels)), dtype=np.float32)
+    y[np.arange(len(texts)), [labels.index(t) for t in targets]] = 1.0
+    vocabulary = np.unique(np.concatenate([_vocabulary_ids(text) for text in texts]))
+    model = IntentModel(
+        labels, np.zeros((DIM, len(labels)), np.float32), np.zeros(len(labels), np.float32), vocabulary=vocabulary
+    )
+    for _ in range(epochs):
+        grad = (_softmax(x @ model.weights + model.bias) - y) / len(texts)
+        model.weights -= learning_rate * (x.T @ grad + l2 * model.weights)
+        model.bias -= learning_rate * grad.sum(axis=0)
+    return model
+
+
+def calibrate(
+    examples: Sequence[Tuple[str, str]], labels: Sequence[str], folds: int = 5, seed: int = 0, **train_kwargs
+) -> float:
+    """
+    Temperature scaling: trains `folds` models, each without one fold, and
+    returns the temperature that minimizes the negative log-likelihood of the
+    held-out folds' labels.
+    """
+    order = np.random.default_rng(seed).permutation(len(examples))
+    logits = np.zeros((len(examples), len(labels)), np.float32)
+    for k in range(folds):
+        held_out = order[k::folds]
+        kept = np.setdiff1d(order, held_out)
+        model = train([examples[i] for i in kept], labels, **train_kwargs)
+        logits[held_out] = model.logits([examples[i][0] for i in held_out])
+    targets = np.array([labels.index(label) for _, label in examples])
+
+    def nll(temperature: float) -> float:
+        proba = _softmax(logits / temperature)
+        return float(-np.log(proba[np.arange(len(targets)), targets] + 1e-12).mean())
+
+    return float(min(np.linspace(0.25, 5.0, 96), key=nll))
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def load_corpus(path: Path = CORPUS_PATH) -> List[Tuple[str, str]]:
+    """(text, label) pairs from a `label<TAB>text` file; '#' lines are comments."""
+    examples = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if line.strip() and not line.startswith("#"):
+            label, text = line.split("\t", 1)
+            examples.append((text.strip(), label.strip()))
+    return examples
+
+
+def load_default(path: Path = WEIGHTS_PATH) -> Optional[IntentModel]:
+    """The shipped model, or None (with a warning) if its weights are missing or stale."""
+    try:
+        return IntentModel.load(path)
+    except (OSError, KeyError, ValueError) as exc:
+        logger.warning(f"[IntentModel] Model tier disabled: {exc}")
+        return None
+
+
+def main() -> None:
+    from app.agents import intent_classifier  # the few-shot examples and label order
+
+    examples = load_corpus() + list(intent_classifier._FEWSHOT)
+    model = train(examples, intent_classifier._LABELS)
+    model.temperature = calibrate(examples, intent_classifier._LABELS)
+    model.save()
+    texts, expected = zip(*examples)
+    accuracy = np.mean([label == e for (label, _), e in zip(model.predict(texts), expected)])
+    print(f"Trained on {len(examples)} examples; training accuracy {accuracy:.1%}.")
+    print(f"Temperature {model.temperature:.2f}; vocabulary of {len(model.vocabulary)} word features.")
+    print(f"Wrote {WEIGHTS_PATH} ({WEIGHTS_PATH.stat().st_size / 1024:.1f} KiB).")
+
+
+if __name__ == "__main__":
+    main()
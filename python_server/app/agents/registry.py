@@ -0,0 +1,99 @@
+"""
+Lazy agent registry.
+
+Maps agent names to `"module:function"` specs and imports an agent's module
+the first time the agent is looked up. A worker therefore only pays for the
+dependencies (ollama, dateutil, jsonschema, pytz) and the prompt templates
+of the agents it actually serves. `warm_up()` imports agents eagerly, for
+deployments that prefer paying the cost at startup.
+
+The registry is a mutable mapping: `registry[name]` returns the agent
+function, and tests can still swap one with `monkeypatch.setitem`.
+"""
+
+import importlib
+import time
+from collections.abc import MutableMapping
+from types import ModuleType
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, Optional
+
+AgentFunc = Callable[..., Awaitable[Dict[str, Any]]]
+
+
+class AgentRegistry(MutableMapping):
+    def __init__(self, specs: Dict[str, str]):
+        for name, spec in specs.items():
+            if spec.count(":") != 1:
+                raise ValueError(f"Agent '{name}' spec '{spec}' must look like 'package.module:function'.")
+        self._specs: Dict[str, Optional[str]] = dict(specs)
+        self._loaded: Dict[str, AgentFunc] = {}
+        self._load_ms: Dict[str, float] = {}
+
+    def __getitem__(self, name: str) -> AgentFunc:
+        func = self._loaded.get(name)
+        if func is None:
+            func = self._load(name)
+        return func
+
+    def __setitem__(self, name: str, func: AgentFunc) -> None:
+        self._specs.setdefault(name, None)
+        self._loaded[name] = func
+
+    def __delitem__(self, name: str) -> None:
+        if self._specs[name] is None:  # registered as a function, not a spec
+            del self._specs[name]
+        self._loaded.pop(name, None)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._specs  # without importing the agent
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._specs)
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+    def _load(self, name: str) -> AgentFunc:
+        module_name, attr = self._specs[name].split(":")
+        started = time.perf_counter()
+        func = getattr(importlib.import_module(module_name), attr)
+        self._load_ms[name] = (time.perf_counter() - started) * 1000
+        self._loaded[name] = func
+        return func
+
+    def module(self, name: str) -> ModuleType:
+        """The module an agent is defined in, imported if needed (for its stats and helpers)."""
+        spec = self._specs[name]
+        if spec is None:
+            raise KeyError(f"Agent '{name}' was registered as a function and has no module.")
+        self[name]
+        return importlib.import_module(spec.split(":")[0])
+
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """
+        Imports the given agents (all by default) now instead of on first use.
+
+        Returns:
+            Milliseconds each agent's import took. Agents that were already
+            loaded report 0; agents share dependencies, so later ones are cheaper.
+
+        Raises:
+            ValueError: For an unknown agent name.
+        """
+        names = list(self._specs if names is None else names)
+        unknown = [name for name in names if name not in self._specs]
+        if unknown:
+            raise ValueError(f"Unknown agent(s) to warm up: {', '.join(unknown)}.")
+        timings = {}
+        for name in names:
+            loaded = name in self._loaded
+            self[name]
+            timings[name] = 0.0 if loaded else round(self._load_ms.get(name, 0.0), 3)
+        return timings
+
+    def stats(self) -> Dict[str, Any]:
+        """Which agents are loaded and how long each import took."""
+        return {
+            "loaded": {name: round(ms, 3) for name, ms in self._load_ms.items()},
+            "pending": [name for name in self._specs if name not in self._loaded],
+        }
@@ -1,57 +1,46 @@
 import asyncio
 import uuid
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List, Optional
 
 import pytz
-from dateutil.rrule import rrulestr, rrule
-from jsonschema import validate, ValidationError
-
-# --- Output JSON Schema ---
-SCHEDULE_SCHEMA = {
-    "type": "object",
-    "properties": {
-        "events": {
-            "type": "array",
-            "items": {
-                "type": "object",
-                "properties": {
-                    "session_id": {"type": "string", "format": "uuid"},
-                    "task_id": {"type": "string"},
-                    "start_time": {"type": "string", "format": "date-time"},
-                    "end_time": {"type": "string", "format": "date-time"},
-                    "status": {"type": "string", "enum": ["scheduled", "conflict"]},
-                },
-                "required": ["session_id", "task_id", "start_time", "end_time", "status"],
-            },
-        },
-        "conflicts": {
-            "type": "array",
-            "items": {
-                "type": "object",
-                "properties": {
-                    "task_id": {"type": "string"},
-                    "conflict_with": {"type": "string", "format": "uuid"},
-                    "reason": {"type": "string"},
-                },
-                "required": ["task_id", "conflict_with", "reason"],
-            },
-        },
-        "exceptions": {"type": "array"},
-    },
-    "required": ["events", "conflicts", "exceptions"],
-}
+
+from app.schemas import SCHEDULE_SCHEMA
+from app.scheduling.conflicts import conflict_entries, overlapping_pairs_array
+from app.scheduling.expansion import (
+    DEFAULT_HORIZON_DAYS,
+    MAX_HORIZON_DAYS,
+    MAX_PAGE_SIZE,
+    check_durations,
+    decode_cursor,
+    encode_cursor,
+    iter_schedule,
+)
+from app.scheduling.vectorized import expand_tasks, format_iso
+from app.timing import span
+from app.validation import ValidationError, validate_output
+
+SCHEDULER_TZ = "America/Mexico_City"
+
+
+def _horizon_days(task_list: dict) -> int:
+    """Reads the optional `horizon_days` input, defaulting to 30 days."""
+    horizon = task_list.get("horizon_days", DEFAULT_HORIZON_DAYS)
+    if not isinstance(horizon, int) or isinstance(horizon, bool) or not 1 <= horizon <= MAX_HORIZON_DAYS:
+        raise ValueError(f"'horizon_days' must be an integer between 1 and {MAX_HORIZON_DAYS}.")
+    return horizon
 
 
-def _check_overlap(start1: datetime, end1: datetime, start2: datetime, end2: datetime) -> bool:
-    """Checks if two datetime ranges overlap."""
-    return (start1 < end2) and (end1 > start2)
+def _today() -> datetime:
+    """Midnight today in the scheduler's timezone."""
+    tz = pytz.timezone(SCHEDULER_TZ)
+    return datetime.now(tz).replace(hour=0, minute=0, second=0, microsecond=0)
 
 
 async def schedule(task_list: dict) -> dict:
     """
-    Expands task recurrence rules into concrete calendar events for the next 30 days,
-    detecting any scheduling conflicts.
+    Expands task recurrence rules into concrete calendar events for the next 30 days
+    (or `horizon_days`, if given), detecting any scheduling conflicts.
 
     Args:
         task_list: A dictionary containing a list of tasks, matching the
@@ -61,70 +50,40 @@ async def schedule(task_list: dict) -> dict:
         A dictionary containing a list of scheduled events, conflicts, and exceptions.
 
     Raises:
-        ValueError: If the final generated payload fails schema validation.
+        ValueError: If the horizon is invalid or the final generated payload
+                    fails schema validation.
     """
     # --- Setup ---
-    all_events: List[Dict[str, Any]] = []
-    conflicts: List[Dict[str, Any]] = []
-    tz = pytz.timezone("America/Mexico_City")
-    today = datetime.now(tz).replace(hour=0, minute=0, second=0, microsecond=0)
-    until_date = today + timedelta(days=30)
+    tasks = task_list.get("tasks", [])
+    today = _today()
+    until_date = today + timedelta(days=_horizon_days(task_list))
+    # Set default start time for recurrences
+    dtstart = today.replace(hour=9, minute=0)
 
     # --- 1. Expand RRULEs into concrete events ---
-    for task in task_list.get("tasks", []):
-        task_id = task.get("task_id")
-        duration_minutes = task.get("estimated_minutes", 60)
-        
-        # Set default start time for recurrences
-        dtstart = today.replace(hour=9, minute=0)
-
-        try:
-            rule = rrulestr(task["recurrence_rule"], dtstart=dtstart)
-            occurrences = rule.between(today, until_date, inc=True)
-
-            for start_time in occurrences:
-                end_time = start_time + timedelta(minutes=duration_minutes)
-                all_events.append({
-                    "session_id": str(uuid.uuid4()),
-                    "task_id": task_id,
-                    "start_time": start_time,
-                    "end_time": end_time,
-                    "status": "scheduled", # Tentative status
-                })
-        except (ValueError, KeyError) as e:
-            print(f"Warning: Could not parse rrule for task {task_id}: {e}")
-            continue
+    # Simple DAILY/WEEKLY rules are expanded as datetime64 arrays in one step;
+    # everything else goes through dateutil.
+    with span("schedule.expand"):
+        task_index, starts, ends = expand_tasks(tasks, dtstart, today, until_date)
+
+    with span("schedule.events"):
+        all_events: List[Dict[str, Any]] = [
+            {
+                "session_id": str(uuid.uuid4()),
+                "task_id": tasks[idx].get("task_id"),
+                "start_time": start_time,
+                "end_time": end_time,
+                "status": "scheduled", # Tentative status
+            }
+            for idx, start_time, end_time in zip(task_index, format_iso(starts, dtstart), format_iso(ends, dtstart))
+        ]
 
     # --- 2. Detect Conflicts ---
-    # A simple O(n^2) check is sufficient for a small number of events.
-    for i in range(len(all_events)):
-        for j in range(i + 1, len(all_events)):
-            event1 = all_events[i]
-            event2 = all_events[j]
-
-            if _check_overlap(event1["start_time"], event1["end_time"], event2["start_time"], event2["end_time"]):
-                # Mark both events as having a conflict
-                event1["status"] = "conflict"
-                event2["status"] = "conflict"
-
-                # Add conflict entries for both tasks
-                conflicts.append({
-                    "task_id": event1["task_id"],
-                    "conflict_with": event2["session_id"],
-                    "reason": "overlap",
-                })
-                conflicts.append({
-                    "task_id": event2["task_id"],
-                    "conflict_with": event1["session_id"],
-                    "reason": "overlap",
-                })
+    # Sweep over the start-sorted arrays: O(n log n + k) for k overlapping pairs.
+    with span("schedule.conflicts"):
+        conflicts = conflict_entries(all_events, overlapping_pairs_array(starts, ends))
 
     # --- 3. Finalize and Validate ---
-    # Convert datetimes to ISO 8601 strings for the final payload
-    for event in all_events:
-        event["start_time"] = event["start_time"].isoformat()
-        event["end_time"] = event["end_time"].isoformat()
-
     result = {
         "events": all_events,
         "conflicts": conflicts,
@@ -132,12 +91,70 @@ async def schedule(task_list: dict) -> dict:
     }
 
     try:
-        validate(instance=result, schema=SCHEDULE_SCHEMA)
+        # The event list is built entirely by the server.
+        with span("schedule.validate"):
+            validate_output("SchedulerAgent", result, trusted=True)
         return result
     except ValidationError as e:
         raise ValueError(f"Invalid JSON schema for schedule: {e.message}")
 
 
+def stream_schedule(task_list: dict) -> Iterator[Dict[str, Any]]:
+    """
+    Streaming variant of `schedule` for long horizons.
+
+    Events are produced lazily in time order, one record at a time, so memory
+    stays bounded regardless of the horizon. Session IDs are deterministic,
+    which lets a client resume from a cursor and get the same sessions back.
+
+    Args:
+        task_list: The TaskDecomposerAgent output, plus optional
+                   `horizon_days`, `page_size` and `cursor` fields.
+
+    Returns:
+        An iterator of records: {"type": "event"|"conflict", "data": {...}}
+        followed by one {"type": "page", "data": {"count", "next_cursor"}}.
+        `next_cursor` is None once the horizon is exhausted.
+
+    Raises:
+        ValueError: If the horizon, page size, cursor or a task's
+                    `estimated_minutes` is invalid. Raised eagerly, before the
+                    first record is produced.
+    """
+    tasks = task_list.get("tasks", [])
+    check_durations(tasks)
+    page_size = task_list.get("page_size")
+    if page_size is not None and (
+        not isinstance(page_size, int) or isinstance(page_size, bool) or not 1 <= page_size <= MAX_PAGE_SIZE
+    ):
+        raise ValueError(f"'page_size' must be an integer between 1 and {MAX_PAGE_SIZE}.")
+
+    cursor = task_list.get("cursor")
+    if cursor:
+        window_start, until_date, after = decode_cursor(cursor, tasks)
+    else:
+        window_start = _today()
+        until_date = window_start + timedelta(days=_horizon_days(task_list))
+        after = None
+
+    def records() -> Iterator[Dict[str, Any]]:
+        stream = iter_schedule(tasks, window_start, until_date, after)
+        count = 0
+        next_cursor: Optional[str] = None
+        for key, event, conflicts in stream:
+            if page_size is not None and count == page_size:
+                next_cursor = encode_cursor(tasks, window_start, until_date, last_key)
+                break
+            yield {"type": "event", "data": event}
+            for conflict in conflicts:
+                yield {"type": "conflict", "data": conflict}
+            count += 1
+            last_key = key
+        yield {"type": "page", "data": {"count": count, "next_cursor": next_cursor}}
+
+    return records()
+
+
 # --- Example Usage (for testing) ---
 async def main():
     test_tasks = {
@@ -1,208 +1,359 @@
 
-import ollama
+import os
 import re
 import json
 import asyncio
 import uuid
-from datetime import datetime, timedelta
-from typing import Dict, Any, List
-from jsonschema import validate, ValidationError
-
-# --- Output JSON Schema ---
-TASK_LIST_SCHEMA = {
-    "type": "object",
-    "properties": {
-        "tasks": {
-            "type": "array",
-            "items": {
-                "type": "object",
-                "properties": {
-                    "task_id": {"type": "string", "format": "uuid"},
-                    "goal_id": {"type": ["string", "null"], "format": "uuid"},
-                    "description": {"type": "string"},
-                    "recurrence_rule": {"type": "string"},
-                    "estimated_minutes": {"type": "number"},
-                    "dependencies": {"type": "array", "items": {"type": "string", "format": "uuid"}}
-                },
-                "required": ["task_id", "goal_id", "description", "recurrence_rule", "estimated_minutes", "dependencies"]
-            }
-        }
-    },
-    "required": ["tasks"]
-}
+from datetime import date, timedelta
+from typing import Dict, Any, List, Optional
+
+from app.llm.cache import LLM_CACHE_PATH, LLMCache, cache_key, normalize_text
+from app.llm.client import LLM_CLIENT, CircuitOpenError
+from app.llm.hedge import budget_from_env, hedged, report_source
+from app.llm.prompts import PromptTemplate
+from app.log import logger
+from app.schemas import TASK_LIST_SCHEMA
+from app.timing import span
+from app.validation import ValidationError, validate_output
 
-# --- Few-shot examples for the prompt ---
-FEW_SHOT_PROMPT = f"""\
+MODEL = "gemma:3n-instruct"
+# Latency budget for the LLM path; unset means wait for it.
+BUDGET_SECONDS = budget_from_env("TASK_DECOMPOSER_BUDGET_MS")
+
+# Decompositions of similar goals are reused; see goal_signature.
+DECOMPOSITION_CACHE = LLMCache(
+    maxsize=int(os.environ.get("DECOMPOSITION_CACHE_SIZE", 512)),
+    ttl_seconds=float(os.environ.get("DECOMPOSITION_CACHE_TTL_SECONDS", 7 * 24 * 60 * 60)),
+    path=LLM_CACHE_PATH,
+    table="decomposition_cache",
+)
+
+
+# --- Prompt: static few-shot prefix, the goal JSON last ---
+PROMPT = PromptTemplate(
+    name="task_decomposer",
+    version="2",
+    prefix="""\
 You are an expert at decomposing a high-level goal into a list of concrete, recurring tasks. Based on the user's parsed goal (in JSON), generate a `tasks` array. Return ONLY the JSON object.
 
 **Example 1: Fitness Goal**
 *Input Goal JSON:*
 ```json
-{{
+{
   "type": "fitness",
   "description": "Run a 10k in 3 months",
-  "deadline": "{(datetime.now() + timedelta(days=90)).strftime('%Y-%m-%d')}",
-  "constraints": {{
+  "deadline": "2025-04-15",
+  "constraints": {
     "days_available": ["Tuesday", "Thursday", "Saturday"],
     "time_windows": ["morning"]
-  }},
-  "preferences": {{}}
-}}
+  },
+  "preferences": {}
+}
 ```
 *Output Tasks JSON:*
 ```json
-{{
+{
   "tasks": [
-    {{
-      "task_id": "{uuid.uuid4()}",
+    {
+      "task_id": "00000000-0000-4000-8000-000000000001",
       "goal_id": null,
       "description": "Long run (increase distance by 10% each week)",
       "recurrence_rule": "RRULE:FREQ=WEEKLY;BYDAY=SA",
       "estimated_minutes": 60,
       "dependencies": []
-    }},
-    {{
-      "task_id": "{uuid.uuid4()}",
+    },
+    {
+      "task_id": "00000000-0000-4000-8000-000000000002",
       "goal_id": null,
       "description": "Interval training session",
       "recurrence_rule": "RRULE:FREQ=WEEKLY;BYDAY=TU",
       "estimated_minutes": 45,
       "dependencies": []
-    }},
-    {{
-      "task_id": "{uuid.uuid4()}",
+    },
+    {
+      "task_id": "00000000-0000-4000-8000-000000000003",
       "goal_id": null,
       "description": "Tempo run",
       "recurrence_rule": "RRULE:FREQ=WEEKLY;BYDAY=TH",
       "estimated_minutes": 45,
       "dependencies": []
-    }}
+    }
   ]
-}}
+}
 ```
 
 **Example 2: Skill Goal**
 *Input Goal JSON:*
 ```json
-{{
+{
   "type": "skill",
   "description": "Learn Python",
   "deadline": null,
-  "constraints": {{
+  "constraints": {
     "days_available": ["Saturday", "Sunday"],
     "time_windows": []
-  }},
-  "preferences": {{}}
-}}
+  },
+  "preferences": {}
+}
 ```
 *Output Tasks JSON:*
 ```json
-{{
+{
   "tasks": [
-    {{
-      "task_id": "{uuid.uuid4()}",
+    {
+      "task_id": "00000000-0000-4000-8000-000000000004",
       "goal_id": null,
       "description": "Complete one chapter of Python textbook",
       "recurrence_rule": "RRULE:FREQ=WEEKLY;BYDAY=SA",
       "estimated_minutes": 90,
       "dependencies": []
-    }},
-    {{
-      "task_id": "{uuid.uuid4()}",
+    },
+    {
+      "task_id": "00000000-0000-4000-8000-000000000005",
       "goal_id": null,
       "description": "Work on a small Python coding project",
       "recurrence_rule": "RRULE:FREQ=WEEKLY;BYDAY=SU",
       "estimated_minutes": 120,
       "dependencies": []
-    }}
+    }
   ]
-}}
+}
 ```
 
 **Example 3: Project Goal**
 *Input Goal JSON:*
 ```json
-{{
+{
   "type": "project",
   "description": "Build a portfolio website",
-  "deadline": "{datetime.now().year}-12-31",
-  "constraints": {{}},
-  "preferences": {{ "tone": "encouraging" }}
-}}
+  "deadline": "2025-12-31",
+  "constraints": {},
+  "preferences": { "tone": "encouraging" }
+}
 ```
 *Output Tasks JSON:*
 ```json
-{{
+{
   "tasks": [
-    {{
-      "task_id": "{uuid.uuid4()}",
+    {
+      "task_id": "00000000-0000-4000-8000-000000000006",
       "goal_id": null,
       "description": "Phase 1: Research and Design",
       "recurrence_rule": "RRULE:FREQ=ONCE",
       "estimated_minutes": 240,
       "dependencies": []
-    }},
-    {{
-      "task_id": "{uuid.uuid4()}",
+    },
+    {
+      "task_id": "00000000-0000-4000-8000-000000000007",
       "goal_id": null,
       "description": "Phase 2: Development",
       "recurrence_rule": "RRULE:FREQ=ONCE",
       "estimated_minutes": 600,
-      "dependencies": ["<task_id_from_phase_1>"]
-    }}
+      "dependencies": ["00000000-0000-4000-8000-000000000006"]
+    }
   ]
-}}
+}
 ```
-"""
 
-async def decompose(parsed_goal: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+Now, decompose the following user goal. Respond with ONLY the JSON object containing the 'tasks' array.
+
+""",
+    suffix="""\
+*Input Goal JSON:*
+```json
+{goal_json}
+```
+*Output Tasks JSON:*
+""",
+)
+
+# --- Decomposition reuse ---
+_WEEKDAY_ORDER = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+_NON_WORD = re.compile(r"[^\w\s]")
+_FILLER_WORDS = {"a", "an", "the", "my", "to"}
+# Upper bounds, in days until the deadline, of the deadline buckets.
+_DEADLINE_BUCKETS = [(7, "1w"), (31, "1m"), (92, "3m"), (183, "6m"), (366, "1y")]
+_UNTIL = re.compile(r"(?i)(UNTIL=)(\d{8})")
+
+
+def _deadline_date(deadline: Any) -> Optional[date]:
+    if not deadline:
+        return None
+    try:
+        return date.fromisoformat(str(deadline)[:10])
+    except ValueError:
+        return None
+
+
+def _deadline_bucket(deadline: Optional[str], today: date) -> str:
+    deadline_date = _deadline_date(deadline)
+    if deadline_date is None:
+        return "none"
+    days = (deadline_date - today).days
+    if days < 0:
+        return "past"
+    return next((name for limit, name in _DEADLINE_BUCKETS if days <= limit), "long")
+
+
+def goal_signature(parsed_goal: Dict[str, Any], today: Optional[date] = None) -> Dict[str, Any]:
     """
-    Decomposes a parsed goal into a list of tasks.
+    What a decomposition depends on: type, normalized description (case,
+    punctuation and filler words dropped), available days in weekday order,
+    sorted time windows, preferences (session length, tone, ...) and how far
+    away the deadline is. Goals with the same signature share a cached
+    decomposition; its UNTIL dates are moved to the reusing goal's deadline.
     """
-    goal_id = parsed_goal.get("goal_id") # Or however the ID is passed
+    constraints = parsed_goal.get("constraints") or {}
+    days = {str(day).strip().lower() for day in constraints.get("days_available") or []}
+    words = _NON_WORD.sub(" ", normalize_text(str(parsed_goal.get("description") or ""))).split()
+    return {
+        "type": str(parsed_goal.get("type") or "other").lower(),
+        "description": " ".join(word for word in words if word not in _FILLER_WORDS),
+        "days_available": sorted(days, key=lambda d: (_WEEKDAY_ORDER.index(d) if d in _WEEKDAY_ORDER else 7, d)),
+        "time_windows": sorted({str(w).strip().lower() for w in constraints.get("time_windows") or []}),
+        "preferences": {
+            str(name).strip().lower(): value.strip().lower() if isinstance(value, str) else value
+            for name, value in (parsed_goal.get("preferences") or {}).items()
+        },
+        "deadline": _deadline_bucket(parsed_goal.get("deadline"), today or date.today()),
+    }
+
 
+def _cache_key(parsed_goal: Dict[str, Any]) -> str:
+    signature = json.dumps(goal_signature(parsed_goal), sort_keys=True)
+    return cache_key("decomposition", signature, MODEL, PROMPT.cache_version)
+
+
+def _until_offset(task: Dict[str, Any], deadline: Optional[date]) -> Optional[int]:
+    """Days from `deadline` to the UNTIL date of the task's recurrence rule, if both exist."""
+    match = _UNTIL.search(str(task.get("recurrence_rule") or ""))
+    if match is None or deadline is None:
+        return None
     try:
-        # 1. Primary Path: Ollama
-        prompt = f"""\
-        {FEW_SHOT_PROMPT}
-
-        Now, parse the following user goal. Respond with ONLY the JSON object containing the 'tasks' array.
-
-        **User input:**
-        ```json
-        {json.dumps(parsed_goal, indent=2)}
-        ```
-        **JSON output:**
-        """
-        response = await ollama.chat(
-            model='gemma:3n-instruct',
+        return (date(int(match[2][:4]), int(match[2][4:6]), int(match[2][6:])) - deadline).days
+    except ValueError:
+        return None
+
+
+def _template(task_data: Dict[str, Any], deadline: Optional[date]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    The id-free shape of a decomposition: task fields without ids,
+    dependencies as indices into the task list (unknown ids are dropped), and
+    each UNTIL date as an offset in days from the goal's deadline.
+    """
+    tasks = task_data["tasks"]
+    index = {task.get("task_id"): n for n, task in enumerate(tasks) if task.get("task_id") is not None}
+    template = []
+    for task in tasks:
+        entry = {
+            **{k: v for k, v in task.items() if k not in ("task_id", "goal_id", "dependencies")},
+            "dependencies": [index[dep] for dep in task.get("dependencies") or [] if dep in index],
+        }
+        offset = _until_offset(task, deadline)
+        if offset is not None:
+            entry["until_offset_days"] = offset
+        template.append(entry)
+    return {"tasks": template}
+
+
+def _instantiate(template: Dict[str, Any], goal_id: Any, deadline: Optional[date]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    A decomposition from `template` with fresh task_ids, `goal_id`, remapped
+    dependencies and UNTIL dates re-derived from `deadline`.
+    """
+    task_ids = [str(uuid.uuid4()) for _ in template["tasks"]]
+    tasks = []
+    for task, task_id in zip(template["tasks"], task_ids):
+        fields = {k: v for k, v in task.items() if k != "until_offset_days"}
+        offset = task.get("until_offset_days")
+        if offset is not None and deadline is not None:
+            until = (deadline + timedelta(days=offset)).strftime("%Y%m%d")
+            fields["recurrence_rule"] = _UNTIL.sub(lambda m: m[1] + until, fields["recurrence_rule"])
+        tasks.append({
+            **fields,
+            "task_id": task_id,
+            "goal_id": goal_id,
+            "dependencies": [task_ids[n] for n in task["dependencies"]],
+        })
+    return {"tasks": tasks}
+
+
+async def _llm_decompose(parsed_goal: Dict[str, Any], goal_id: Any, key: str) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Asks Ollama to decompose `parsed_goal`, validates the answer and caches its template.
+
+    Raises:
+        Exception: On any LLM, JSON or schema failure.
+    """
+    prompt = PROMPT.render(goal_json=json.dumps(parsed_goal, indent=2))
+    with span("decompose.llm"):
+        response = await LLM_CLIENT.chat_json(
+            model=MODEL,
             messages=[{'role': 'user', 'content': prompt}],
-            options=ollama.Options(temperature=0.1)
+            options={'temperature': 0.1}
         )
-        
+    PROMPT.record(prompt, response)
+
+    with span("decompose.json"):
         json_string = response['message']['content'].strip()
         json_start = json_string.find('{')
         json_end = json_string.rfind('}') + 1
         json_string = json_string[json_start:json_end]
-        task_data = json.loads(json_string)
+        # Replace the model's task ids with UUIDs, keeping its dependencies intact
+        deadline = _deadline_date(parsed_goal.get("deadline"))
+        template = _template(json.loads(json_string), deadline)
+        task_data = _instantiate(template, goal_id, deadline)
 
-        # Add UUIDs to the tasks from the model
-        for task in task_data.get("tasks", []):
-            task["task_id"] = str(uuid.uuid4())
-            task["goal_id"] = goal_id
+    try:
+        with span("decompose.validate"):
+            validate_output("TaskDecomposerAgent", task_data)
+    except ValidationError as e:
+        raise ValueError(f"Invalid JSON schema for tasks: {e.message}")
+    DECOMPOSITION_CACHE.put(key, template)
+    return task_data
 
-    except Exception as e:
-        print(f"[TaskDecomposer] Ollama call failed: {e}. Falling back to rule-based decomposer.")
-        # 2. Fallback Path: Rules
-        task_data = _fallback_decomposer(parsed_goal)
+async def decompose(parsed_goal: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Decomposes a parsed goal into a list of tasks.
+    Reuses the cached decomposition of a goal with the same signature, else
+    uses Ollama and falls back to rule-based tasks if the LLM fails, returns
+    invalid output, or misses TASK_DECOMPOSER_BUDGET_MS.
+    """
+    goal_id = parsed_goal.get("goal_id") # Or however the ID is passed
+
+    # 0. Decomposition of a goal with the same signature
+    with span("decompose.cache"):
+        key = _cache_key(parsed_goal)
+        template = await DECOMPOSITION_CACHE.aget(key)
+    if template is not None:
+        report_source("cache")
+        return _validated(_instantiate(template, goal_id, _deadline_date(parsed_goal.get("deadline"))))
 
-    # 3. Validation
+    # 1. Primary Path: Ollama, hedged by 2. Fallback Path: Rules.
+    task_data, source, error = await hedged(
+        _llm_decompose(parsed_goal, goal_id, key), lambda: _timed_fallback(parsed_goal), BUDGET_SECONDS
+    )
+    if error is not None and not isinstance(error, CircuitOpenError):  # an open circuit already reported the outage
+        logger.warning(f"[TaskDecomposer] Ollama call failed: {error}. Falling back to rule-based decomposer.")
+    report_source(source)
+    if source == "llm":
+        return task_data
+
+    # 3. Validation (the LLM path validates its own output)
+    return _validated(task_data)
+
+def _validated(task_data: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
     try:
-        validate(instance=task_data, schema=TASK_LIST_SCHEMA)
+        with span("decompose.validate"):
+            validate_output("TaskDecomposerAgent", task_data, trusted=True)
         return task_data
     except ValidationError as e:
         raise ValueError(f"Invalid JSON schema for tasks: {e.message}")
 
+def _timed_fallback(parsed_goal: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    with span("decompose.rules"):
+        return _fallback_decomposer(parsed_goal)
+
 def _fallback_decomposer(parsed_goal: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
     """A simple rule-based fallback to create a basic task list."""
     days_map = {
@@ -0,0 +1,117 @@
+"""
+Server launch settings, read from the environment (and `.env`).
+
+  * SERVER_MODE                      - `development` (default): one worker with
+                                       the file-watching reloader.
+                                       `production`: pre-forked workers, no reloader.
+  * HOST / PORT                      - bind address (default 0.0.0.0:8000).
+  * SERVER_WORKERS                   - production worker processes; 0 (default)
+                                       means one per CPU.
+  * SERVER_LOOP                      - event loop: `uvloop` (default), `asyncio` or `auto`.
+  * SERVER_HTTP                      - HTTP parser: `httptools` (default), `h11` or `auto`.
+  * SERVER_PRELOAD                   - import the app (and the AGENT_PRELOAD agents)
+                                       once before forking, so workers share those
+                                       pages copy-on-write (default true).
+  * SERVER_GRACEFUL_TIMEOUT_SECONDS  - on shutdown, how long in-flight requests may
+                                       take to finish, and then again how long
+                                       background LLM calls may take (default 30 each).
+  * SERVER_BACKLOG                   - listen backlog (default 2048).
+  * SERVER_KEEPALIVE_SECONDS         - HTTP keep-alive timeout (default 5).
+
+uvloop and httptools come with `uvicorn[standard]`. If one is not
+installed, the launcher falls back to the pure-Python equivalent and logs it.
+
+The launcher (`app.server`) rejects invalid settings. `SETTINGS`, which the
+app reads when started some other way (e.g. `uvicorn app.main:app`), falls back
+to the defaults with a warning instead, so a bad SERVER_* variable cannot stop
+the app from importing.
+"""
+
+import importlib.util
+import os
+from dataclasses import dataclass, replace
+from typing import Mapping
+
+from dotenv import load_dotenv
+
+from app.log import logger
+
+MODES = ("development", "production")
+LOOPS = ("uvloop", "asyncio", "auto")
+HTTP_PARSERS = ("httptools", "h11", "auto")
+
+load_dotenv()
+
+
+def _bool(value: str) -> bool:
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True)
+class ServerSettings:
+    mode: str = "development"
+    host: str = "0.0.0.0"
+    port: int = 8000
+    workers: int = 0
+    loop: str = "uvloop"
+    http: str = "httptools"
+    preload: bool = True
+    graceful_timeout_seconds: float = 30.0
+    backlog: int = 2048
+    keepalive_seconds: int = 5
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str] = os.environ) -> "ServerSettings":
+        """
+        Raises:
+            ValueError: For an unknown mode, loop or parser, or a negative number.
+        """
+        env = environ.get
+        settings = cls(
+            mode=env("SERVER_MODE", cls.mode).strip().lower(),
+            host=env("HOST", cls.host),
+            port=int(env("PORT", cls.port)),
+            workers=int(env("SERVER_WORKERS", cls.workers)),
+            loop=env("SERVER_LOOP", cls.loop).strip().lower(),
+            http=env("SERVER_HTTP", cls.http).strip().lower(),
+            preload=_bool(env("SERVER_PRELOAD", str(cls.preload))),
+            graceful_timeout_seconds=float(env("SERVER_GRACEFUL_TIMEOUT_SECONDS", cls.graceful_timeout_seconds)),
+            backlog=int(env("SERVER_BACKLOG", cls.backlog)),
+            keepalive_seconds=int(env("SERVER_KEEPALIVE_SECONDS", cls.keepalive_seconds)),
+        )
+        settings.validate()
+        return settings
+
+    def validate(self) -> None:
+        if self.mode not in MODES:
+            raise ValueError(f"SERVER_MODE must be one of {', '.join(MODES)}, not '{self.mode}'.")
+        if self.loop not in LOOPS:
+            raise ValueError(f"SERVER_LOOP must be one of {', '.join(LOOPS)}, not '{self.loop}'.")
+        if self.http not in HTTP_PARSERS:
+            raise ValueError(f"SERVER_HTTP must be one of {', '.join(HTTP_PARSERS)}, not '{self.http}'.")
+        if min(self.workers, self.graceful_timeout_seconds, self.backlog, self.keepalive_seconds) < 0:
+            raise ValueError("Server worker count, timeouts and backlog must not be negative.")
+
+    @property
+    def worker_count(self) -> int:
+        """Worker processes to run: one in development, SERVER_WORKERS (or one per CPU) in production."""
+        if self.mode == "development":
+            return 1
+        return self.workers or os.cpu_count() or 1
+
+    def resolved(self) -> "ServerSettings":
+        """These settings with uvloop / httptools replaced by their fallbacks if not installed."""
+        loop = "asyncio" if self.loop == "uvloop" and importlib.util.find_spec("uvloop") is None else self.loop
+        http = "h11" if self.http == "httptools" and importlib.util.find_spec("httptools") is None else self.http
+        return replace(self, loop=loop, http=http)
+
+
+def _load_settings() -> ServerSettings:
+    try:
+        return ServerSettings.from_env()
+    except ValueError as e:
+        logger.warning(f"Invalid server settings: {e} Using the defaults.")
+        return ServerSettings()
+
+
+SETTINGS = _load_settings()
@@ -0,0 +1,111 @@
+"""
+Micro-batching of concurrent LLM requests.
+
+Concurrent callers `submit` items; the first item of a batch opens a window
+of `window_seconds`, and when it closes (or `max_size` distinct items are
+waiting) everything collected is handed to `run_batch` as one list. Identical
+items in a window share one slot. `run_batch` returns one entry per item: a
+value, or an exception that is raised to that item's callers only. If
+`run_batch` itself raises, every caller in the batch gets the exception.
+
+A caller that stops waiting (e.g. cancelled by a latency budget) does not
+affect the others; its item is dropped if the batch has not been sent yet.
+A window of 0 or a `max_size` of 1 disables batching: each item is run alone.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Sequence, Set
+
+
+class MicroBatcher:
+    """Collects items submitted within a short window and runs them as one batch."""
+
+    def __init__(
+        self,
+        name: str,
+        run_batch: Callable[[List[Any]], Awaitable[Sequence[Any]]],
+        max_size: int,
+        window_seconds: float,
+    ):
+        self.name = name
+        self.run_batch = run_batch
+        self.max_size = max_size
+        self.window_seconds = window_seconds
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[Hashable, List["asyncio.Future[Any]"]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: Set["asyncio.Task[Any]"] = set()
+        self._lock = threading.Lock()
+        self._stats = {"batches": 0, "items": 0, "callers": 0, "failed_items": 0, "largest_batch": 0}
+
+    async def submit(self, item: Hashable) -> Any:
+        """Waits for `item`'s result from the batch it lands in."""
+        with self._lock:
+            self._stats["callers"] += 1
+        if self.window_seconds <= 0 or self.max_size <= 1:
+            result = (await self._run([item]))[0]
+        else:
+            result = await self._batched(item)
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    async def _batched(self, item: Hashable) -> Any:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:  # a new event loop (tests, reloads): start clean
+            self._loop, self._pending, self._timer = loop, {}, None
+        future = loop.create_future()
+        self._pending.setdefault(item, []).append(future)
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch = {item: futures for item, futures in self._pending.items() if not all(f.done() for f in futures)}
+        self._pending = {}
+        if batch:
+            task = asyncio.ensure_future(self._deliver(batch))
+            self._running.add(task)  # keep a reference until it is done
+            task.add_done_callback(self._running.discard)
+
+    async def _deliver(self, batch: Dict[Hashable, List["asyncio.Future[Any]"]]) -> None:
+        items = list(batch)
+        try:
+            results: Sequence[Any] = await self._run(items)
+        except Exception as exc:
+            results = [exc] * len(items)
+        for item, result in zip(items, results):
+            for future in batch[item]:
+                if not future.done():
+                    future.set_result(result)
+
+    async def _run(self, items: List[Any]) -> Sequence[Any]:
+        failed = len(items)
+        try:
+            results = await self.run_batch(items)
+            if len(results) != len(items):
+                raise ValueError(f"{self.name}: batch of {len(items)} returned {len(results)} results")
+            failed = sum(isinstance(r, BaseException) for r in results)
+        finally:
+            with self._lock:
+                self._stats["batches"] += 1
+                self._stats["items"] += len(items)
+                self._stats["failed_items"] += failed
+                self._stats["largest_batch"] = max(self._stats["largest_batch"], len(items))
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        return {
+            "max_size": self.max_size,
+            "window_ms": round(self.window_seconds * 1000, 3),
+            "avg_batch_size": round(stats["items"] / stats["batches"], 2) if stats["batches"] else 0.0,
+            **stats,
+        }
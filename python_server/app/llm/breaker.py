@@ -0,0 +1,134 @@
+"""
+Circuit breakers for the Ollama models.
+
+While Ollama is down or overloaded every LLM call would otherwise wait for a
+connection error or a timeout before the agent falls back to its rule-based
+path. A breaker per model watches the outcomes of recent generations:
+
+  * closed    - calls go through. Once at least `min_calls` of the last
+                `window` calls are recorded and the share of failures (errors,
+                timeouts, or calls slower than `slow_call_seconds`) reaches
+                `failure_rate`, the breaker opens.
+  * open      - calls fail immediately with `CircuitOpenError`, so agents go
+                straight to their fallbacks. After `open_seconds` the breaker
+                turns half-open.
+  * half_open - a single probe call is let through. Success closes the
+                breaker, failure opens it again for another `open_seconds`.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict
+
+from app.log import logger
+
+BREAKER_WINDOW = int(os.environ.get("OLLAMA_BREAKER_WINDOW", 20))
+BREAKER_MIN_CALLS = int(os.environ.get("OLLAMA_BREAKER_MIN_CALLS", 5))
+BREAKER_FAILURE_RATE = float(os.environ.get("OLLAMA_BREAKER_FAILURE_RATE", 0.5))
+BREAKER_SLOW_CALL_SECONDS = float(os.environ.get("OLLAMA_BREAKER_SLOW_CALL_SECONDS", 10))
+BREAKER_OPEN_SECONDS = float(os.environ.get("OLLAMA_BREAKER_OPEN_SECONDS", 30))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+_TRANSITION_HISTORY = 20
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a model whose breaker is open."""
+
+
+class CircuitBreaker:
+    """Thread-safe error-rate / slow-call circuit breaker for one model."""
+
+    def __init__(
+        self,
+        name: str,
+        window: int = BREAKER_WINDOW,
+        min_calls: int = BREAKER_MIN_CALLS,
+        failure_rate: float = BREAKER_FAILURE_RATE,
+        slow_call_seconds: float = BREAKER_SLOW_CALL_SECONDS,
+        open_seconds: float = BREAKER_OPEN_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._outcomes: Deque[bool] = deque(maxlen=window)  # True = failure
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._rejected = 0
+        self._transitions: Deque[Dict[str, Any]] = deque(maxlen=_TRANSITION_HISTORY)
+
+    def _move(self, state: str, reason: str) -> None:
+        log = logger.warning if state == OPEN else logger.info
+        log(f"[CircuitBreaker] {self.name}: {self._state} -> {state} ({reason})")
+        self._transitions.append({"from": self._state, "to": state, "reason": reason, "at": time.time()})
+        self._state = state
+        if state == OPEN:
+            self._opened_at = self._clock()
+        if state == CLOSED:
+            self._outcomes.clear()
+
+    def before_call(self) -> None:
+        """
+        Admits a call or rejects it.
+
+        Raises:
+            CircuitOpenError: While open, or while half-open with a probe already in flight.
+        """
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.open_seconds:
+                self._move(HALF_OPEN, "open period elapsed")
+            if self._state == CLOSED:
+                return
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            self._rejected += 1
+        raise CircuitOpenError(f"Circuit for '{self.name}' is {self._state}; skipping the LLM call.")
+
+    def record(self, ok: bool, seconds: float) -> None:
+        """Records the outcome of an admitted call."""
+        failed = not ok or seconds >= self.slow_call_seconds
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probe_in_flight = False
+                if failed:
+                    self._move(OPEN, "probe failed" if not ok else f"probe took {seconds:.1f}s")
+                else:
+                    self._move(CLOSED, "probe succeeded")
+                return
+            self._outcomes.append(failed)
+            failures = sum(self._outcomes)
+            if (
+                self._state == CLOSED
+                and len(self._outcomes) >= self.min_calls
+                and failures / len(self._outcomes) >= self.failure_rate
+            ):
+                self._move(OPEN, f"{failures}/{len(self._outcomes)} recent calls failed or were slow")
+
+    def release(self) -> None:
+        """Forgets an admitted call that ended without an outcome (e.g. it was cancelled)."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probe_in_flight = False
+
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self._state,
+                "recent_calls": len(self._outcomes),
+                "recent_failures": sum(self._outcomes),
+                "rejected": self._rejected,
+                "transitions": list(self._transitions),
+            }
@@ -0,0 +1,274 @@
+"""
+Content-addressed cache of LLM results.
+
+Much of our traffic repeats the same few phrases ("skip today's workout",
+"I want to run a 5k"), so agents look up an LLM answer here before calling
+Ollama. Entries are keyed by a hash of:
+
+  * a namespace (which agent is asking),
+  * the normalized input text (Unicode NFKC, case-folded, whitespace
+    collapsed, trailing punctuation dropped),
+  * the model name,
+  * the prompt-template version, so editing a prompt invalidates old answers.
+
+Entries live in an in-memory LRU with a TTL. If `LLM_CACHE_PATH` is set they
+are also written to a SQLite file and survive restarts; a memory miss then
+falls back to the file before counting as a miss. Disk I/O stays off the
+event loop: writes are queued for a background writer thread, which commits
+whatever has queued up in one transaction, and `aget` reads the file on a
+worker thread. `flush_all` waits for the queued writes (at shutdown, and in
+tests).
+
+Values are stored as JSON text, so callers always get a fresh copy. Other
+agent-level caches reuse `LLMCache` with their own size, TTL and SQLite table.
+"""
+
+import asyncio
+import atexit
+import hashlib
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.log import logger
+
+LLM_CACHE_SIZE = int(os.environ.get("LLM_CACHE_SIZE", 1024))
+LLM_CACHE_TTL_SECONDS = float(os.environ.get("LLM_CACHE_TTL_SECONDS", 24 * 60 * 60))
+LLM_CACHE_PATH = os.environ.get("LLM_CACHE_PATH") or None
+
+_WHITESPACE = re.compile(r"\s+")
+# Every cache that has a writer thread, for `flush_all`.
+_WRITERS: "weakref.WeakSet[LLMCache]" = weakref.WeakSet()
+_TRAILING_PUNCTUATION = ".!?…"
+
+
+def normalize_text(text: str) -> str:
+    """Reduces `text` to the form that is hashed into cache keys."""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return _WHITESPACE.sub(" ", text).strip().rstrip(_TRAILING_PUNCTUATION).rstrip()
+
+
+def cache_key(namespace: str, text: str, model: str, prompt_version: str) -> str:
+    """SHA-256 key of an LLM call's normalized input, model and prompt version."""
+    payload = json.dumps([namespace, normalize_text(text), model, prompt_version], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Thread-safe LRU + TTL cache of JSON-serializable LLM results, optionally backed by SQLite."""
+
+    def __init__(
+        self,
+        maxsize: int = LLM_CACHE_SIZE,
+        ttl_seconds: float = LLM_CACHE_TTL_SECONDS,
+        path: Optional[str] = LLM_CACHE_PATH,
+        clock: Callable[[], float] = time.time,
+        table: str = "llm_cache",
+    ):
+        if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", table):
+            raise ValueError(f"Invalid cache table name '{table}'")
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.table = table
+        self._clock = clock
+        self._data: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()  # serializes use of the connection; never held with `_lock` on the loop
+        self._path = path
+        self._pid = os.getpid()
+        self._writes: "queue.Queue[Tuple[str, Tuple]]" = queue.Queue()
+        self._writer_pid: Optional[int] = None
+        if path:
+            self._open(path)
+
+    # --- Persistence ---
+    def _open(self, path: str) -> None:
+        try:
+            db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                " key TEXT PRIMARY KEY, expires_at REAL NOT NULL, value TEXT NOT NULL)"
+            )
+            db.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (self._clock(),))
+        except sqlite3.Error as e:
+            logger.warning(f"[LLMCache] Could not open '{path}': {e}. Using the in-memory cache only.")
+            return
+        self._db = db
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """This process's connection to the backing file. Call with `_db_lock` held."""
+        if self._db is not None and self._pid != os.getpid():
+            # Forked worker: SQLite connections must not cross fork().
+            self._pid, self._db = os.getpid(), None
+            self._open(self._path)
+        return self._db
+
+    def _disable(self, error: sqlite3.Error) -> None:
+        logger.warning(f"[LLMCache] SQLite error: {error}. Disabling persistence.")
+        self._db = None
+
+    def _db_read(self, key: str) -> Optional[Tuple]:
+        """Reads one row from the backing file, disabling persistence on failure."""
+        with self._db_lock:
+            db = self._connection()
+            if db is None:
+                return None
+            try:
+                return db.execute(f"SELECT expires_at, value FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            except sqlite3.Error as e:
+                self._disable(e)
+                return None
+
+    def _enqueue_write(self, sql: str, params: Tuple) -> None:
+        """Queues a statement for the writer thread, starting one in this process if needed."""
+        if self._db is None:
+            return
+        if self._writer_pid != os.getpid():
+            # A forked worker inherits the queue but not the thread that drained it.
+            self._writes, self._writer_pid = queue.Queue(), os.getpid()
+            threading.Thread(
+                target=self._write_loop, args=(self._writes,), name=f"{self.table}-writer", daemon=True
+            ).start()
+            _WRITERS.add(self)
+        self._writes.put((sql, params))
+
+    def _write_loop(self, writes: "queue.Queue[Tuple[str, Tuple]]") -> None:
+        """Commits queued statements, batching everything queued so far into one transaction."""
+        while True:
+            batch = [writes.get()]
+            while True:
+                try:
+                    batch.append(writes.get_nowait())
+                except queue.Empty:
+                    break
+            with self._db_lock:
+                db = self._connection()
+                if db is not None:
+                    try:
+                        db.execute("BEGIN")
+                        for sql, params in batch:
+                            db.execute(sql, params)
+                        db.execute("COMMIT")
+                    except sqlite3.Error as e:
+                        if db.in_transaction:
+                            db.execute("ROLLBACK")
+                        self._disable(e)
+            for _ in batch:
+                writes.task_done()
+
+    def flush(self) -> None:
+        """Blocks until every queued write has been committed."""
+        if self._writer_pid == os.getpid():
+            self._writes.join()
+
+    # --- Memory tier ---
+    def _remember(self, key: str, expires_at: float, value: str) -> None:
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def _from_memory(self, key: str, now: float) -> Optional[str]:
+        """The encoded value of `key` in the memory tier, counting a hit, or None."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._data[key]
+                self._counters["expirations"] += 1
+                entry = None
+            if entry is None:
+                return None
+            self._data.move_to_end(key)
+            self._counters["hits"] += 1
+            return entry[1]
+
+    def _from_disk(self, key: str, now: float) -> Optional[str]:
+        """Loads `key` from the backing file into the memory tier, counting a disk hit or a miss."""
+        row = self._db_read(key)
+        with self._lock:
+            if key in self._data:  # put() while the file was read; that value is newer
+                return self._data[key][1]
+            if row is not None and row[0] > now:
+                self._remember(key, row[0], row[1])
+                self._counters["disk_hits"] += 1
+                return row[1]
+            self._counters["misses"] += 1
+            return None
+
+    # --- Public API ---
+    def get(self, key: str) -> Optional[Any]:
+        """Returns the cached value for `key`, or None if it is missing or expired."""
+        now = self._clock()
+        encoded = self._from_memory(key, now)
+        if encoded is None:
+            encoded = self._from_disk(key, now)
+        return None if encoded is None else json.loads(encoded)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """`get` for coroutines: on a memory miss the file is read on a worker thread."""
+        now = self._clock()
+        encoded = self._from_memory(key, now)
+        if encoded is None:
+            if self._db is not None:
+                encoded = await asyncio.to_thread(self._from_disk, key, now)
+            else:
+                encoded = self._from_disk(key, now)
+        return None if encoded is None else json.loads(encoded)
+
+    def put(self, key: str, value: Any) -> None:
+        """Stores a JSON-serializable `value` under `key` for `ttl_seconds`; the disk write happens in the background."""
+        expires_at = self._clock() + self.ttl_seconds
+        encoded = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._remember(key, expires_at, encoded)
+            self._enqueue_write(
+                f"INSERT OR REPLACE INTO {self.table} (key, expires_at, value) VALUES (?, ?, ?)",
+                (key, expires_at, encoded),
+            )
+
+    def clear(self) -> None:
+        """Drops every entry, in memory and on disk, and resets the counters."""
+        with self._lock:
+            self._data.clear()
+            self._enqueue_write(f"DELETE FROM {self.table}", ())
+            for name in self._counters:
+                self._counters[name] = 0
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            size, persistent = len(self._data), self._db is not None
+        lookups = counters["hits"] + counters["disk_hits"] + counters["misses"]
+        return {
+            "size": size,
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl_seconds,
+            "persistent": persistent,
+            "hit_rate": round((counters["hits"] + counters["disk_hits"]) / lookups, 4) if lookups else 0.0,
+            **counters,
+        }
+
+
+def flush_all() -> None:
+    """Waits until every cache in this process has committed its queued writes."""
+    for cache in list(_WRITERS):
+        cache.flush()
+
+
+atexit.register(flush_all)
+
+# Shared by every agent in this process.
+LLM_CACHE = LLMCache()
@@ -0,0 +1,312 @@
+"""
+Shared async Ollama client.
+
+Every LLM-backed agent goes through `LLM_CLIENT.chat(...)` instead of calling
+`ollama.chat` itself, so that:
+
+  * one `ollama.AsyncClient` (one httpx connection pool with keep-alive) is
+    reused by all requests instead of a new connection or a worker thread
+    per call;
+  * at most `OLLAMA_MODEL_CONCURRENCY` generations per model are in flight,
+    and the rest wait their turn instead of piling onto Ollama;
+  * connect / read timeouts and an overall deadline are set in one place;
+  * concurrent calls with the same (model, messages, options) share a single
+    in-flight generation (single-flight) instead of each starting their own,
+    e.g. when the mobile client retries or several users send the same text;
+  * JSON-producing agents use `chat_json`, which streams the answer and
+    stops the generation once the first JSON object is complete;
+  * each model has a circuit breaker (see `app.llm.breaker`), so while
+    Ollama is failing calls raise `CircuitOpenError` at once and agents go
+    straight to their rule-based fallbacks.
+
+The pool and the semaphores belong to an event loop, so they are created
+lazily on first use and rebuilt if a call comes from a different loop (for
+example, a fresh loop per test).
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional
+
+import httpx
+import ollama
+
+from app.llm.breaker import CircuitBreaker, CircuitOpenError
+from app.llm.json_stream import JsonObjectScanner
+from app.metrics import LLM_CALLS, LLM_LATENCY
+
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST") or None
+OLLAMA_MODEL_CONCURRENCY = int(os.environ.get("OLLAMA_MODEL_CONCURRENCY", 4))
+OLLAMA_MAX_CONNECTIONS = int(os.environ.get("OLLAMA_MAX_CONNECTIONS", 32))
+OLLAMA_KEEPALIVE_EXPIRY_SECONDS = float(os.environ.get("OLLAMA_KEEPALIVE_EXPIRY_SECONDS", 60))
+OLLAMA_CONNECT_TIMEOUT_SECONDS = float(os.environ.get("OLLAMA_CONNECT_TIMEOUT_SECONDS", 2))
+OLLAMA_READ_TIMEOUT_SECONDS = float(os.environ.get("OLLAMA_READ_TIMEOUT_SECONDS", 30))
+# How long Ollama keeps a model loaded after a request, e.g. "10m"; unset uses the server default.
+OLLAMA_MODEL_KEEP_ALIVE = os.environ.get("OLLAMA_MODEL_KEEP_ALIVE") or None
+# `chat_json` reads 1 in N streams to the end to measure what stopping early saves; 0 disables.
+LLM_STREAM_AUDIT_RATE = int(os.environ.get("LLM_STREAM_AUDIT_RATE", 20))
+_audit_counter = itertools.count(1)
+
+
+def _default_client() -> ollama.AsyncClient:
+    return ollama.AsyncClient(
+        host=OLLAMA_HOST,
+        timeout=httpx.Timeout(OLLAMA_READ_TIMEOUT_SECONDS, connect=OLLAMA_CONNECT_TIMEOUT_SECONDS),
+        limits=httpx.Limits(
+            max_connections=OLLAMA_MAX_CONNECTIONS,
+            max_keepalive_connections=OLLAMA_MAX_CONNECTIONS,
+            keepalive_expiry=OLLAMA_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+    )
+
+
+class OllamaPool:
+    """One pooled `ollama.AsyncClient` per event loop, with per-model concurrency limits."""
+
+    def __init__(
+        self,
+        model_concurrency: int = OLLAMA_MODEL_CONCURRENCY,
+        timeout_seconds: Optional[float] = OLLAMA_CONNECT_TIMEOUT_SECONDS + OLLAMA_READ_TIMEOUT_SECONDS,
+        client_factory: Callable[[], Any] = _default_client,
+        breaker_factory: Callable[[str], CircuitBreaker] = CircuitBreaker,
+    ):
+        self.model_concurrency = model_concurrency
+        self.timeout_seconds = timeout_seconds
+        self._client_factory = client_factory
+        self._breaker_factory = breaker_factory
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Any = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._in_flight: Dict[str, "asyncio.Future[Any]"] = {}
+        self._waiters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def _bind(self, model: str):
+        """Returns (client, semaphore) for the running loop, creating them if needed."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._client = self._client_factory()
+            self._semaphores = {}
+            self._in_flight = {}
+            self._waiters = {}
+        semaphore = self._semaphores.get(model)
+        if semaphore is None:
+            semaphore = self._semaphores[model] = asyncio.Semaphore(self.model_concurrency)
+        return self._client, semaphore
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(model)
+            if breaker is None:
+                breaker = self._breakers[model] = self._breaker_factory(model)
+            return breaker
+
+    def _count(self, model: str, name: str, delta: int = 1) -> None:
+        with self._lock:
+            counters = self._counters.setdefault(
+                model, {"calls": 0, "coalesced": 0, "errors": 0, "in_flight": 0, "waiting": 0}
+            )
+            counters[name] += delta
+
+    async def chat(
+        self,
+        model: str,
+        messages: List[Mapping[str, Any]],
+        options: Optional[Mapping[str, Any]] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        Sends one non-streaming chat request through the shared pool. If an
+        identical request is already in flight, waits for its result instead.
+        Cancelling the last caller waiting on a generation cancels it.
+
+        Raises:
+            CircuitOpenError: If the model's circuit breaker is not letting calls through.
+            asyncio.TimeoutError: If the call takes longer than `timeout_seconds`
+                                  (time spent waiting for a model slot excluded).
+            Exception: Whatever the Ollama client raises (connection errors,
+                       `ollama.ResponseError`, ...).
+        """
+        def request(client):
+            return client.chat(
+                model=model, messages=messages, options=options, keep_alive=OLLAMA_MODEL_KEEP_ALIVE, **kwargs
+            )
+
+        return await self._single_flight(model, ["chat", model, messages, options, kwargs], request)
+
+    async def chat_json(
+        self,
+        model: str,
+        messages: List[Mapping[str, Any]],
+        options: Optional[Mapping[str, Any]] = None,
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        """
+        Like `chat`, but streams the answer and stops the generation as soon as
+        the first JSON object in it is complete (see `app.llm.json_stream`).
+
+        Returns:
+            A chat-response-shaped dict whose message content is the JSON
+            object's text (or the whole answer if no object was found), plus
+            the streaming stats documented in `_stream_json`.
+
+        Raises:
+            The same exceptions as `chat`.
+        """
+        def request(client):
+            return _stream_json(client, model, messages, options, kwargs)
+
+        return await self._single_flight(model, ["chat_json", model, messages, options, kwargs], request)
+
+    async def _single_flight(self, model: str, identity: List[Any], request: Callable[[Any], Awaitable[Any]]) -> Any:
+        client, semaphore = self._bind(model)
+        key = json.dumps(identity, sort_keys=True, default=str)
+        flight = self._in_flight.get(key)
+        if flight is not None:
+            self._count(model, "coalesced")
+        else:
+            self.breaker(model).before_call()
+            flight = asyncio.ensure_future(self._generate(client, semaphore, model, request))
+            self._in_flight[key] = flight
+            flight.add_done_callback(lambda done: self._land(key, done))
+        # Shielded so one caller giving up does not cancel the others' generation;
+        # the generation is only cancelled once every caller has given up.
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(flight)
+        except asyncio.CancelledError:
+            if self._waiters[key] == 1 and not flight.done():
+                flight.cancel()
+            raise
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+
+    def _land(self, key: str, flight: "asyncio.Future[Any]") -> None:
+        if self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+        if not flight.cancelled():
+            flight.exception()  # mark retrieved even if every caller went away
+
+    async def _generate(self, client, semaphore, model: str, request: Callable[[Any], Awaitable[Any]]) -> Any:
+        breaker = self.breaker(model)
+        self._count(model, "waiting")
+        try:
+            async with semaphore:
+                self._count(model, "waiting", -1)
+                self._count(model, "in_flight")
+                self._count(model, "calls")
+                started = time.monotonic()
+                try:
+                    response = await asyncio.wait_for(request(client), self.timeout_seconds)
+                except Exception:
+                    elapsed = time.monotonic() - started
+                    self._count(model, "errors")
+                    LLM_CALLS.labels(model, "error").inc()
+                    LLM_LATENCY.labels(model).observe(elapsed)
+                    breaker.record(False, elapsed)
+                    raise
+                finally:
+                    self._count(model, "in_flight", -1)
+                elapsed = time.monotonic() - started
+                LLM_CALLS.labels(model, "success").inc()
+                LLM_LATENCY.labels(model).observe(elapsed)
+                breaker.record(True, elapsed)
+                return response
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+
+    async def aclose(self) -> None:
+        """Closes the pooled connections of the current loop's client."""
+        client, self._client, self._loop = self._client, None, None
+        http = getattr(client, "_client", None)  # ollama.AsyncClient has no public close()
+        if http is not None:
+            await http.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "model_concurrency": self.model_concurrency,
+                "timeout_seconds": self.timeout_seconds,
+                "models": {model: dict(counters) for model, counters in self._counters.items()},
+            }
+
+    def breaker_stats(self) -> Dict[str, Any]:
+        """State, recent outcomes and transition history of every model's breaker."""
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {
+            "endpoint": OLLAMA_HOST or "http://localhost:11434",
+            "models": {model: breaker.stats() for model, breaker in breakers.items()},
+        }
+
+
+async def _stream_json(client, model, messages, options, kwargs) -> Dict[str, Any]:
+    """
+    Streams a chat answer until its first JSON object is complete, then closes
+    the stream, which makes Ollama stop generating. The chunk after the object
+    is read first: only if it is not the final (`done`) one was the answer
+    actually cut short, which is what `stopped_early` reports.
+
+    One call in `LLM_STREAM_AUDIT_RATE` is read to the end instead, to measure
+    what stopping early saves: the tokens and milliseconds generated after the
+    object closed.
+
+    Returns:
+        {"message": {"role", "content"}, "prompt_eval_count", "eval_count",
+         "streamed_tokens", "json_tokens", "json_ms", "stopped_early",
+         "trailing_tokens", "trailing_ms"} - streamed counts are chunks, which
+        Ollama emits one per token; the trailing fields are set on audited calls.
+    """
+    audit = LLM_STREAM_AUDIT_RATE > 0 and next(_audit_counter) % LLM_STREAM_AUDIT_RATE == 0
+    started = time.monotonic()
+    stream = await client.chat(
+        model=model, messages=messages, options=options, keep_alive=OLLAMA_MODEL_KEEP_ALIVE, stream=True, **kwargs
+    )
+    scanner = JsonObjectScanner()
+    pieces: List[str] = []
+    found: Optional[str] = None
+    result: Dict[str, Any] = {
+        "prompt_eval_count": None, "eval_count": None, "streamed_tokens": 0, "json_tokens": None,
+        "json_ms": None, "stopped_early": False, "trailing_tokens": None, "trailing_ms": None,
+    }
+    try:
+        async for chunk in stream:
+            piece = chunk["message"]["content"] or ""
+            if piece:
+                result["streamed_tokens"] += 1
+            if chunk.get("done"):
+                result["prompt_eval_count"] = chunk.get("prompt_eval_count")
+                result["eval_count"] = chunk.get("eval_count")
+            if found is not None:
+                if audit:
+                    continue
+                result["stopped_early"] = not chunk.get("done")
+                break
+            pieces.append(piece)
+            found = scanner.feed(piece)
+            if found is not None:
+                result["json_tokens"] = result["streamed_tokens"]
+                result["json_ms"] = round((time.monotonic() - started) * 1000, 3)
+    finally:
+        close = getattr(stream, "aclose", None)
+        if close is not None:
+            await close()
+    if audit and found is not None:
+        result["trailing_tokens"] = result["streamed_tokens"] - result["json_tokens"]
+        result["trailing_ms"] = round((time.monotonic() - started) * 1000 - result["json_ms"], 3)
+    result["message"] = {"role": "assistant", "content": found if found is not None else "".join(pieces)}
+    return result
+
+
+# Shared by every agent in this process.
+LLM_CLIENT = OllamaPool()
@@ -0,0 +1,136 @@
+"""
+Latency-budgeted hedging of LLM calls against rule-based fallbacks.
+
+For interactive calls a good-enough answer in a few hundred milliseconds
+beats a perfect one seconds later. `hedged` starts the agent's LLM coroutine,
+computes the deterministic fallback while the request is on the wire, and
+returns whichever result is usable when the budget runs out:
+
+  * source "llm"      - the LLM answered within the budget.
+  * source "fallback" - the LLM failed (error, open circuit, bad output).
+  * source "budget"   - the LLM missed the deadline.
+
+If the fallback itself raises, the budget no longer buys anything and the
+LLM is awaited for as long as it takes. A late LLM call is either cancelled
+or, with `LLM_LATE_RESULT_POLICY=warm` (the default), left to finish so it
+can fill the agent's result cache for the next identical request.
+
+Agents also report where their answer came from with `report_source`, and
+the API layer copies it into the response envelope.
+"""
+
+import asyncio
+import os
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, NamedTuple, Optional, Set
+
+from app.log import logger
+
+LLM_LATE_RESULT_POLICY = os.environ.get("LLM_LATE_RESULT_POLICY", "warm").lower()
+if LLM_LATE_RESULT_POLICY not in ("warm", "cancel"):
+    raise ValueError("LLM_LATE_RESULT_POLICY must be 'warm' or 'cancel'.")
+
+_source: ContextVar[Optional[str]] = ContextVar("agent_result_source", default=None)
+_late_calls: Set["asyncio.Task[Any]"] = set()  # late LLM calls still warming a cache
+_NO_FALLBACK = object()
+
+
+def budget_from_env(name: str) -> Optional[float]:
+    """Reads a budget in milliseconds from `name`; unset or 0 means no budget. Returns seconds."""
+    value = float(os.environ.get(name) or 0)
+    return value / 1000 if value > 0 else None
+
+
+def report_source(source: str) -> None:
+    """Records which path produced the current agent call's result."""
+    _source.set(source)
+
+
+def reset_source() -> None:
+    _source.set(None)
+
+
+def reported_source() -> Optional[str]:
+    return _source.get()
+
+
+class HedgeResult(NamedTuple):
+    value: Any
+    source: str
+    error: Optional[BaseException] = None
+
+
+def _discard(task: "asyncio.Task[Any]") -> None:
+    _late_calls.discard(task)
+    if not task.cancelled():
+        task.exception()  # a late failure has nobody left to report it to
+
+
+async def hedged(
+    llm_call: Awaitable[Any],
+    fallback: Callable[[], Any],
+    budget_seconds: Optional[float],
+    keep_late: bool = LLM_LATE_RESULT_POLICY == "warm",
+) -> HedgeResult:
+    """
+    Races `llm_call` against `budget_seconds`, with `fallback()` as the answer
+    if the LLM fails or is late. Without a budget the LLM is awaited for as
+    long as it takes.
+
+    Args:
+        llm_call: Coroutine producing the LLM-backed result; any exception
+                  it raises selects the fallback.
+        fallback: Cheap, deterministic function producing a usable result.
+        budget_seconds: Deadline for the LLM, or None.
+        keep_late: Let a late LLM call finish in the background (to warm a
+                   cache) instead of cancelling it.
+
+    Returns:
+        HedgeResult(value, source, error), `error` being the LLM's exception if any.
+
+    Raises:
+        Exception: Whatever `fallback()` raises, if the LLM failed as well.
+    """
+    task = asyncio.ensure_future(llm_call)
+    fallback_value: Any = _NO_FALLBACK
+    try:
+        await asyncio.sleep(0)  # let the request go out before doing CPU work
+        if budget_seconds is not None:
+            try:
+                fallback_value = fallback()
+            except Exception as e:
+                logger.warning(f"[hedge] Fallback failed: {e!r}. Waiting for the LLM instead.")
+                budget_seconds = None
+        done, _ = await asyncio.wait({task}, timeout=budget_seconds)
+    except BaseException:
+        task.cancel()
+        raise
+    if not done:
+        if not keep_late:
+            task.cancel()
+        else:
+            _late_calls.add(task)
+        task.add_done_callback(_discard)
+        return HedgeResult(fallback_value, "budget")
+
+    error = task.exception()
+    if error is not None:
+        return HedgeResult(fallback() if fallback_value is _NO_FALLBACK else fallback_value, "fallback", error)
+    return HedgeResult(task.result(), "llm")
+
+
+async def drain(timeout_seconds: float) -> int:
+    """
+    Waits up to `timeout_seconds` for late LLM calls still running in the
+    background (LLM_LATE_RESULT_POLICY=warm), then cancels the rest. Called on
+    shutdown so those calls can finish warming the caches.
+
+    Returns:
+        How many calls were cancelled.
+    """
+    pending = {task for task in _late_calls if not task.done()}
+    if pending and timeout_seconds > 0:
+        _, pending = await asyncio.wait(pending, timeout=timeout_seconds)
+    for task in pending:
+        task.cancel()
+    return len(pending)
@@ -0,0 +1,61 @@
+"""
+Incremental scanner for the first complete JSON object in a token stream.
+
+The JSON-producing agents only need the object the model writes; whatever
+follows it (closing code fences, explanations) is paid for in tokens and
+time but thrown away. `JsonObjectScanner` is fed the streamed text piece by
+piece and returns the object's text as soon as its top-level braces balance
+and it parses, so the caller can stop the generation there.
+"""
+
+import json
+from typing import List, Optional
+
+
+class JsonObjectScanner:
+    """Finds the first balanced, parseable `{...}` in text fed in arbitrary pieces."""
+
+    def __init__(self):
+        self._parts: List[str] = []  # pieces of the object seen so far
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, piece: str) -> Optional[str]:
+        """Consumes `piece`; returns the object's text once it is complete, else None."""
+        start = 0
+        for index, char in enumerate(piece):
+            if self._depth == 0:
+                if char == "{":  # text before the object is skipped
+                    start, self._depth, self._parts = index, 1, []
+                continue
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    text = "".join(self._parts) + piece[start:index + 1]
+                    self._parts = []
+                    if _parses(text):
+                        return text
+                    # Balanced but not JSON (e.g. a template placeholder); keep looking.
+        if self._depth > 0:
+            self._parts.append(piece[start:])
+        return None
+
+
+def _parses(text: str) -> bool:
+    try:
+        json.loads(text)
+    except ValueError:
+        return False
+    return True
@@ -0,0 +1,138 @@
+"""
+Versioned prompt templates with a byte-identical static prefix.
+
+Ollama keeps the KV cache of the previous prompt for a loaded model and only
+evaluates the tokens after the longest common prefix. To make the most of
+that, every LLM prompt is built from a `PromptTemplate`:
+
+  * `prefix` - instructions and few-shot examples. Fixed at import time and
+               never formatted, so it is the same bytes on every call
+               (no `datetime.now()`, no fresh UUIDs, no per-call indentation).
+  * `suffix` - a `str.format` template holding everything dynamic (today's
+               date, the user's input). It always comes last.
+
+Each template carries a `version`. `cache_version` adds a digest of the
+prefix, so cached LLM answers are invalidated when the prompt text changes
+even if nobody remembered to bump the version.
+
+Per-template stats report approximate prompt sizes (a word/punctuation
+count; we do not ship the model's tokenizer) and, from the
+`prompt_eval_count` Ollama returns, how often the prefix was served from the
+model's cache: a call whose evaluated prompt is shorter than the prefix
+cannot have re-evaluated it. The prefix length used for that is measured, not
+estimated: the largest `prompt_eval_count` seen is taken as a cold call, and
+the prefix's share of that call's estimated tokens scales it to the model's
+real token count, chat-template tokens included. Until a cold call has been
+seen, warm calls are undercounted. Streamed calls (`LLM_CLIENT.chat_json`) only get
+that count when they are read to the end.
+
+For streamed calls the stats also cover output: tokens generated, how often
+the stream was cut short after the JSON object, and - from the calls that were
+read to the end as an audit - the average tokens and time generated after the
+object, which is what each early stop saves.
+"""
+
+import hashlib
+import re
+import threading
+from typing import Any, Dict, Mapping, Optional
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+_REGISTRY: Dict[str, "PromptTemplate"] = {}
+_registry_lock = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: words and punctuation marks."""
+    return len(_TOKEN.findall(text))
+
+
+class PromptTemplate:
+    """A static prefix plus a dynamic suffix; registered by name for stats."""
+
+    def __init__(self, name: str, version: str, prefix: str, suffix: str):
+        self.name = name
+        self.version = version
+        self.prefix = prefix
+        self.suffix = suffix
+        self.prefix_tokens = estimate_tokens(prefix)
+        self.cache_version = f"{version}:{hashlib.sha256(prefix.encode('utf-8')).hexdigest()[:12]}"
+        self._lock = threading.Lock()
+        self._cold_eval_tokens = 0  # largest prompt_eval_count seen: a call that evaluated everything
+        self._prefix_eval_tokens = 0.0  # the prefix's share of it, in the model's tokens
+        self._stats = {
+            "calls": 0,
+            "prompt_tokens_estimate": 0,
+            "calls_with_eval_count": 0,
+            "prompt_eval_tokens": 0,
+            "prefix_hits": 0,
+            "streamed_calls": 0,
+            "output_tokens": 0,
+            "early_stops": 0,
+            "audited_calls": 0,
+            "trailing_tokens": 0,
+            "trailing_ms": 0.0,
+        }
+        with _registry_lock:
+            _REGISTRY[name] = self
+
+    def render(self, **dynamic: Any) -> str:
+        """The prompt for one call: the static prefix, then the formatted suffix."""
+        return self.prefix + self.suffix.format(**dynamic)
+
+    def record(self, prompt: str, response: Optional[Mapping[str, Any]]) -> None:
+        """Accounts one call made with `prompt` (as returned by `render`) and its response."""
+        evaluated = response.get("prompt_eval_count") if response is not None else None
+        estimate = estimate_tokens(prompt)
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["prompt_tokens_estimate"] += estimate
+            if evaluated is not None:
+                if evaluated > self._cold_eval_tokens:
+                    self._cold_eval_tokens = evaluated
+                    self._prefix_eval_tokens = evaluated * self.prefix_tokens / max(estimate, 1)
+                self._stats["calls_with_eval_count"] += 1
+                self._stats["prompt_eval_tokens"] += evaluated
+                self._stats["prefix_hits"] += evaluated < self._prefix_eval_tokens
+            if response is not None and "streamed_tokens" in response:
+                self._stats["streamed_calls"] += 1
+                self._stats["output_tokens"] += response["streamed_tokens"]
+                self._stats["early_stops"] += bool(response.get("stopped_early"))
+                if response.get("trailing_tokens") is not None:
+                    self._stats["audited_calls"] += 1
+                    self._stats["trailing_tokens"] += response["trailing_tokens"]
+                    self._stats["trailing_ms"] += response["trailing_ms"]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            prefix_eval_tokens = self._prefix_eval_tokens
+        calls, counted = stats["calls"], stats["calls_with_eval_count"]
+        audited = stats.pop("audited_calls")
+        trailing_tokens = stats.pop("trailing_tokens") / audited if audited else None
+        trailing_ms = stats.pop("trailing_ms") / audited if audited else None
+        # An early stop still reads one token past the object before closing the stream.
+        saved_share = max(trailing_tokens - 1, 0) / trailing_tokens if trailing_tokens else 0.0
+        return {
+            "version": self.version,
+            "cache_version": self.cache_version,
+            "prefix_tokens_estimate": self.prefix_tokens,
+            "prefix_tokens_measured": round(prefix_eval_tokens) if counted else None,
+            "avg_prompt_tokens_estimate": round(stats["prompt_tokens_estimate"] / calls, 1) if calls else 0.0,
+            "avg_prompt_eval_tokens": round(stats["prompt_eval_tokens"] / counted, 1) if counted else None,
+            "prefix_reuse_rate": round(stats["prefix_hits"] / counted, 4) if counted else None,
+            "audited_calls": audited,
+            "avg_trailing_tokens": round(trailing_tokens, 1) if audited else None,
+            "avg_trailing_ms": round(trailing_ms, 1) if audited else None,
+            "estimated_tokens_saved": round(stats["early_stops"] * trailing_tokens * saved_share) if audited else None,
+            "estimated_ms_saved": round(stats["early_stops"] * trailing_ms * saved_share, 1) if audited else None,
+            **stats,
+        }
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    """Stats of every registered template, by name."""
+    with _registry_lock:
+        templates = dict(_REGISTRY)
+    return {name: template.stats() for name, template in sorted(templates.items())}
@@ -0,0 +1,62 @@
+"""
+Non-blocking logging for the request path.
+
+`logger` puts records on an in-memory queue. A background listener thread
+formats them and writes them to stdout, so a request never waits on terminal
+or pipe I/O. The line format matches the old `print` logger:
+
+    [2025-01-15T09:30:00.123456] [python_inference] [INFO] message
+
+`LOG_LEVEL` (default INFO) sets the minimum level. The listener starts on
+import, restarts in forked worker processes, and is flushed and stopped at
+interpreter exit.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+
+
+class _Formatter(logging.Formatter):
+    def formatTime(self, record, datefmt=None):
+        return datetime.fromtimestamp(record.created, timezone.utc).replace(tzinfo=None).isoformat()
+
+
+_stream = logging.StreamHandler(sys.stdout)
+_stream.setFormatter(_Formatter("[%(asctime)s] [python_inference] [%(levelname)s] %(message)s"))
+_handler = QueueHandler(queue.SimpleQueue())
+_listener: QueueListener
+
+logger = logging.getLogger("python_inference")
+logger.setLevel(LOG_LEVEL)
+logger.addHandler(_handler)
+logger.propagate = False
+
+
+def _start() -> None:
+    """Starts a listener thread on a fresh queue. Threads do not survive fork(), so forked workers call it again."""
+    global _listener
+    _handler.queue = queue.SimpleQueue()
+    _listener = QueueListener(_handler.queue, _stream, respect_handler_level=False)
+    _listener.start()
+
+
+def stop() -> None:
+    """Writes the queued records and stops the listener thread."""
+    _listener.stop()
+
+
+def queue_depth() -> int:
+    """Records waiting to be written."""
+    return _handler.queue.qsize()
+
+
+_start()
+atexit.register(stop)
+os.register_at_fork(after_in_child=_start)
@@ -1,41 +1,80 @@
 
 import os
-import uvicorn
-from datetime import datetime
+import sys
+import time
+import asyncio
+import json
+import orjson
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
-from typing import Dict, Any, Optional, Callable, Awaitable
+from typing import Dict, Any, List, Optional, Tuple, Union
 from dotenv import load_dotenv
 
-# --- Agent Imports ---
-from app.agents.intent_classifier import classify as intent_classifier_agent
-from app.agents.goal_parser import parse as goal_parser_agent
-from app.agents.task_decomposer import decompose as task_decomposer_agent
-from app.agents.scheduler import schedule as scheduler_agent
-from app.agents.adaptation import adapt as adaptation_agent
+# --- Imports ---
+# Agents, and with them ollama, dateutil, jsonschema and pytz, are imported
+# lazily by the AGENTS registry below.
+from app.agents.registry import AgentRegistry
+from app.config import SETTINGS
+from app.llm.cache import LLM_CACHE, flush_all
+from app.llm import prompts
+from app.llm import hedge
+from app.llm.hedge import reported_source, reset_source
+from app.log import logger, queue_depth
+from app.metrics import AGENT_LATENCY, AGENT_RESULTS, AGENTS_IN_FLIGHT, CONTENT_TYPE, REGISTRY, STAGE_LATENCY
+from app.timing import server_timing, start_trace, summarize
 
 # --- Environment Loading ---
 load_dotenv()
 
 # --- Configuration ---
-PORT = os.environ.get("PORT", 8000)
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", 64))
+BATCH_MAX_CONCURRENCY = int(os.environ.get("BATCH_MAX_CONCURRENCY", 8))
+# "all", or comma-separated agent names to import at startup instead of on first use.
+AGENT_PRELOAD = os.environ.get("AGENT_PRELOAD", "").strip()
 
 # --- Logging ---
 def log_info(message: str):
-    """Simple structured INFO logger."""
-    print(f"[{datetime.utcnow().isoformat()}] [python_inference] [INFO] {message}")
+    """INFO log line. Queued and written by a background thread (see app.log)."""
+    logger.info(message)
 
 def log_error(message: str):
-    """Simple structured ERROR logger."""
-    print(f"[{datetime.utcnow().isoformat()}] [python_inference] [ERROR] {message}")
+    """ERROR log line. Queued and written by a background thread (see app.log)."""
+    logger.error(message)
+
+# --- Metrics ---
+def _loaded_llm_client():
+    """The shared Ollama client if an agent has imported it, else None."""
+    module = sys.modules.get("app.llm.client")
+    return module.LLM_CLIENT if module is not None else None
+
+def _runtime_metrics():
+    """Scrape-time gauges read from the LLM client, the agent registry and the log queue."""
+    client = _loaded_llm_client()
+    models = client.stats()["models"] if client is not None else {}
+    breakers = client.breaker_stats()["models"] if client is not None else {}
+    return [
+        ("kira_llm_waiting", "gauge", "LLM calls waiting for a model slot.",
+         [({"model": model}, counters["waiting"]) for model, counters in models.items()]),
+        ("kira_llm_in_flight", "gauge", "LLM generations currently running.",
+         [({"model": model}, counters["in_flight"]) for model, counters in models.items()]),
+        ("kira_llm_breaker_open", "gauge", "1 while the model's circuit breaker is open.",
+         [({"model": model}, int(breaker["state"] == "open")) for model, breaker in breakers.items()]),
+        ("kira_log_queue_depth", "gauge", "Log records waiting to be written.", [({}, queue_depth())]),
+        ("kira_agent_import_seconds", "gauge", "How long importing each loaded agent took.",
+         [({"agent": agent}, ms / 1000) for agent, ms in AGENTS.stats()["loaded"].items()]),
+    ]
+
+REGISTRY.register_collector(_runtime_metrics)
 
 # --- Pydantic Schemas ---
 
 class AgentRequest(BaseModel):
     agent_name: str = Field(..., description="The name of the agent to invoke.")
     input_data: Dict[str, Any] = Field(..., description="Agent-specific input data.")
+    debug: bool = Field(False, description="Return the call's timing spans in the response's `debug` field.")
 
 class AgentError(BaseModel):
     code: str
@@ -45,26 +84,140 @@ class AgentSuccessResponse(BaseModel):
     status: str = "success"
     agent_name: str
     output_data: Dict[str, Any]
+    source: Optional[str] = Field(
+        None, description="Which path produced output_data, e.g. llm, cache, heuristic, fallback or budget."
+    )
+    debug: Optional[Dict[str, Any]] = Field(
+        None, description="Timing spans ({name, duration_ms}) and total_ms, when the request set `debug`."
+    )
 
 class AgentErrorResponse(BaseModel):
     status: str = "error"
     agent_name: str
     error: AgentError
 
+class BatchAgentRequest(BaseModel):
+    requests: List[AgentRequest] = Field(
+        ..., min_length=1, max_length=BATCH_MAX_SIZE, description="Agent calls to run."
+    )
+    max_concurrency: Optional[int] = Field(
+        None, ge=1, description="Maximum number of calls to run at once (capped by the server)."
+    )
+
+class BatchAgentResponse(BaseModel):
+    results: List[Union[AgentSuccessResponse, AgentErrorResponse]]
+
+class GoalPipelineRequest(BaseModel):
+    text: str = Field(..., min_length=1, description="The user's message.")
+
+class StageTiming(BaseModel):
+    agent_name: str
+    duration_ms: float
+    source: Optional[str] = None
+
+class GoalPipelineResponse(BaseModel):
+    status: str = "success"
+    intent: str
+    output_data: Dict[str, Any]
+    stages: List[StageTiming]
+
+class GoalPipelineErrorResponse(AgentErrorResponse):
+    stages: List[StageTiming]
+
+class ScheduleStreamRequest(BaseModel):
+    input_data: Dict[str, Any] = Field(
+        ..., description="Task list plus optional horizon_days, page_size and cursor."
+    )
+
 class HealthResponse(BaseModel):
     status: str = "ok"
 
+def _plain(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, list) and value and isinstance(value[0], BaseModel):
+        return [item.model_dump() for item in value]
+    return value
+
+def _envelope(model: BaseModel) -> Dict[str, Any]:
+    """
+    A response model as a dict for `EnvelopeResponse`. Top-level fields are
+    taken as they are, so pydantic never walks a large `output_data`; only
+    small nested models (error, stages) are dumped.
+    """
+    return {name: _plain(value) for name, value in model.__dict__.items()}
+
+def _dumps(content: Any) -> bytes:
+    """
+    orjson, falling back to the stdlib encoder for content orjson rejects but
+    `json` accepts, such as integers wider than 64 bits from client input.
+
+    Raises:
+        TypeError, ValueError: Neither encoder can write the content.
+    """
+    try:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    except orjson.JSONEncodeError:
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+class EnvelopeResponse(ORJSONResponse):
+    """`ORJSONResponse` that encodes with `_dumps`; the body is rendered on construction."""
+
+    def render(self, content: Any) -> bytes:
+        return _dumps(content)
+
+def _unencodable(agent_name: str, error: Exception) -> Tuple[int, AgentErrorResponse]:
+    """The 500 error envelope for an agent result that cannot be written as JSON."""
+    return _error_response(agent_name, RuntimeError(f"Response could not be encoded as JSON: {error}"))
+
 # --- Agent Dispatch Table ---
-AGENTS: Dict[str, Callable[..., Awaitable[Dict[str, Any]]]] = {
-    "IntentClassifierAgent": intent_classifier_agent,
-    "GoalParserAgent": goal_parser_agent,
-    "TaskDecomposerAgent": task_decomposer_agent,
-    "SchedulerAgent": scheduler_agent,
-    "AdaptationAgent": adaptation_agent,
-}
+# Each agent's module is imported on first use (see app.agents.registry).
+AGENTS = AgentRegistry({
+    "IntentClassifierAgent": "app.agents.intent_classifier:classify",
+    "GoalParserAgent": "app.agents.goal_parser:parse",
+    "TaskDecomposerAgent": "app.agents.task_decomposer:decompose",
+    "SchedulerAgent": "app.agents.scheduler:schedule",
+    "AdaptationAgent": "app.agents.adaptation:adapt",
+})
+
+def warm_up(agents: str = AGENT_PRELOAD) -> Dict[str, float]:
+    """
+    Imports agents now instead of on first use.
+
+    Args:
+        agents: "all", or comma-separated agent names. Empty means none.
+
+    Returns:
+        Milliseconds each agent's import took.
+    """
+    if not agents:
+        return {}
+    names = None if agents == "all" else [name.strip() for name in agents.split(",") if name.strip()]
+    timings = AGENTS.warm_up(names)
+    log_info(f"Warmed up {len(timings)} agent(s): " + ", ".join(f"{n} {ms:.0f} ms" for n, ms in timings.items()))
+    return timings
 
 # --- FastAPI Application ---
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Startup / shutdown hooks. Imports the AGENT_PRELOAD agents on startup (a
+    no-op if the launcher already preloaded them). On shutdown, gives late LLM
+    calls still warming caches up to SERVER_GRACEFUL_TIMEOUT_SECONDS to
+    finish, then closes the pooled Ollama connections and waits for queued
+    cache writes to reach disk.
+    """
+    warm_up()
+    yield
+    cancelled = await hedge.drain(SETTINGS.graceful_timeout_seconds)
+    if cancelled:
+        log_error(f"Cancelled {cancelled} late LLM call(s) still running at shutdown.")
+    client = _loaded_llm_client()
+    if client is not None:
+        await client.aclose()
+    await asyncio.to_thread(flush_all)
+
+app = FastAPI(lifespan=lifespan, default_response_class=EnvelopeResponse)
 
 # --- Middleware ---
 app.add_middleware(
@@ -82,6 +235,144 @@ async def health_check():
     """Returns a 200 OK status if the server is healthy."""
     return HealthResponse()
 
+@app.get("/cache_stats", summary="Cache statistics")
+async def cache_stats():
+    """
+    Returns size, hit rate and hit/miss/eviction counters of the in-process
+    caches. Imports the modules that own them if no agent has yet.
+    """
+    from app.scheduling.rrule_cache import RECURRENCE_CACHE
+
+    return {
+        "recurrence": RECURRENCE_CACHE.stats(),
+        "llm": LLM_CACHE.stats(),
+        "decomposition": AGENTS.module("TaskDecomposerAgent").DECOMPOSITION_CACHE.stats(),
+    }
+
+@app.get("/metrics", summary="Prometheus metrics")
+async def metrics():
+    """
+    Returns per-agent and per-stage latency histograms, agent results by
+    source, LLM call and schema validation counters, and in-flight / queue
+    gauges in the Prometheus text format.
+    """
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+
+@app.get("/intent_stats", summary="Intent classifier tier statistics")
+async def intent_stats():
+    """Returns how many intent requests each tier (heuristic, cache, llm, fallback) served."""
+    return AGENTS.module("IntentClassifierAgent").stats()
+
+@app.get("/llm_stats", summary="LLM client statistics")
+async def llm_stats():
+    """
+    Returns per-model call, coalesced, error, in-flight and waiting counts of
+    the shared Ollama client, the state and recent transitions of each
+    model's circuit breaker, and prompt size / prefix-reuse stats per template.
+    """
+    from app.llm.client import LLM_CLIENT
+
+    return {
+        "client": LLM_CLIENT.stats(),
+        "breakers": LLM_CLIENT.breaker_stats(),
+        "prompts": prompts.stats(),
+    }
+
+async def _call_agent(agent_name: str, input_data: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[str]]:
+    """
+    Calls an agent in-process with the argument shape it expects.
+
+    Returns:
+        The agent's output and the source it reported (None if it reports none).
+
+    Raises:
+        KeyError: If no agent is registered under `agent_name`.
+        ValueError: For bad input or agent-level failures.
+    """
+    agent_func = AGENTS[agent_name]
+    reset_source()
+    in_flight = AGENTS_IN_FLIGHT.labels(agent_name)
+    in_flight.inc()
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        if agent_name in ["TaskDecomposerAgent", "SchedulerAgent", "AdaptationAgent"]:
+            output_data = await agent_func(input_data)
+        else:
+            user_text = input_data.get("text")
+            if not user_text:
+                raise ValueError(f"Missing 'text' field in input_data for {agent_name}")
+            output_data = await agent_func(user_text)
+        outcome = "success"
+    finally:
+        in_flight.dec()
+        AGENT_LATENCY.labels(agent_name).observe(time.perf_counter() - started)
+        AGENT_RESULTS.labels(agent_name, outcome, reported_source() or "none").inc()
+    return output_data, reported_source()
+
+def _error_response(agent_name: str, error: Exception) -> Tuple[int, AgentErrorResponse]:
+    """Maps an exception raised by an agent to an HTTP status code and error envelope."""
+    if isinstance(error, ValueError):
+        error_code = "bad_request"
+        if agent_name == "TaskDecomposerAgent":
+            error_code = "DecomposeFailure"
+        elif agent_name == "SchedulerAgent":
+            error_code = "ScheduleFailure"
+        elif agent_name == "AdaptationAgent":
+            error_code = "AdaptationFailure"
+        
+        error_message = f"Bad Request: {str(error)}"
+        log_error(error_message)
+        return status.HTTP_400_BAD_REQUEST, AgentErrorResponse(
+            agent_name=agent_name,
+            error=AgentError(code=error_code, message=str(error))
+        )
+
+    error_message = f"Internal Server Error while processing agent '{agent_name}': {str(error)}"
+    log_error(error_message)
+    return status.HTTP_500_INTERNAL_SERVER_ERROR, AgentErrorResponse(
+        agent_name=agent_name,
+        error=AgentError(code="internal_server_error", message="An unexpected error occurred.")
+    )
+
+async def _dispatch(request: AgentRequest) -> Tuple[int, Union[AgentSuccessResponse, AgentErrorResponse], str]:
+    """
+    Runs one agent call and returns its HTTP status code, response envelope
+    and `Server-Timing` header value. Never raises; failures are reported as
+    an `AgentErrorResponse`.
+    """
+    spans = start_trace()
+    started = time.perf_counter()
+    status_code, response = await _run_agent(request)
+    total_ms = (time.perf_counter() - started) * 1000
+    if request.debug and isinstance(response, AgentSuccessResponse):
+        response.debug = {"spans": summarize(spans), "total_ms": round(total_ms, 3)}
+    return status_code, response, server_timing(spans, total_ms)
+
+async def _run_agent(request: AgentRequest) -> Tuple[int, Union[AgentSuccessResponse, AgentErrorResponse]]:
+    log_info(f"Received request for agent: {request.agent_name}")
+
+    if request.agent_name not in AGENTS:
+        error_message = f"Agent '{request.agent_name}' not found."
+        log_error(error_message)
+        return status.HTTP_400_BAD_REQUEST, AgentErrorResponse(
+            agent_name=request.agent_name,
+            error=AgentError(code="agent_not_found", message=error_message)
+        )
+
+    try:
+        output_data, source = await _call_agent(request.agent_name, request.input_data)
+    except Exception as e:
+        return _error_response(request.agent_name, e)
+
+    log_info(f"Successfully processed agent '{request.agent_name}'.")
+    # output_data comes straight from the agent, which validated it; skip pydantic's copy.
+    return status.HTTP_200_OK, AgentSuccessResponse.model_construct(
+        agent_name=request.agent_name,
+        output_data=output_data,
+        source=source,
+    )
+
 @app.post(
     "/invoke_agent",
     response_model=AgentSuccessResponse,
@@ -93,70 +384,166 @@ async def health_check():
 )
 async def invoke_agent(request: AgentRequest):
     """
-    Invokes a specified agent with the given input data.
+    Invokes a specified agent with the given input data. The `Server-Timing`
+    header breaks the call down into the agent's spans (LLM call, JSON
+    extraction, rrule expansion, conflict detection, validation, ...).
+    The envelope is written straight to bytes with orjson, without
+    revalidating it against the response model.
     """
-    log_info(f"Received request for agent: {request.agent_name}")
+    status_code, envelope, timing = await _dispatch(request)
+    headers = {"Server-Timing": timing}
+    try:
+        return EnvelopeResponse(status_code=status_code, content=_envelope(envelope), headers=headers)
+    except (TypeError, ValueError) as e:
+        status_code, error = _unencodable(request.agent_name, e)
+        return EnvelopeResponse(status_code=status_code, content=_envelope(error), headers=headers)
 
-    agent_func = AGENTS.get(request.agent_name)
+@app.post(
+    "/invoke_agents",
+    response_model=BatchAgentResponse,
+    summary="Invoke several agents in one request",
+)
+async def invoke_agents(batch: BatchAgentRequest):
+    """
+    Runs a batch of agent calls concurrently (at most `max_concurrency` at a
+    time) and returns one envelope per call, in request order. A failing call
+    does not affect the others; its envelope carries the error instead.
+    """
+    limit = min(batch.max_concurrency or BATCH_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY)
+    semaphore = asyncio.Semaphore(limit)
+    log_info(f"Received batch of {len(batch.requests)} agent calls (concurrency {limit}).")
 
-    if not agent_func:
-        error_message = f"Agent '{request.agent_name}' not found."
-        log_error(error_message)
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            content=AgentErrorResponse(
-                agent_name=request.agent_name,
-                error=AgentError(code="agent_not_found", message=error_message)
-            ).dict(),
-        )
+    async def run(request: AgentRequest):
+        async with semaphore:
+            _, response, _ = await _dispatch(request)
+            return response
 
+    results = await asyncio.gather(*(run(request) for request in batch.requests))
+    envelopes = [_envelope(result) for result in results]
     try:
-        # --- Agent Logic ---
-        if request.agent_name in ["TaskDecomposerAgent", "SchedulerAgent", "AdaptationAgent"]:
-            output_data = await agent_func(request.input_data)
-        else:
-            user_text = request.input_data.get("text")
-            if not user_text:
-                raise ValueError(f"Missing 'text' field in input_data for {request.agent_name}")
-            output_data = await agent_func(user_text)
-            
-        log_info(f"Successfully processed agent '{request.agent_name}'.")
+        return EnvelopeResponse({"results": envelopes})
+    except (TypeError, ValueError):
+        pass
+    # Only the calls whose output cannot be encoded are replaced by an error.
+    for n, request in enumerate(batch.requests):
+        try:
+            _dumps(envelopes[n])
+        except (TypeError, ValueError) as e:
+            envelopes[n] = _envelope(_unencodable(request.agent_name, e)[1])
+    return EnvelopeResponse({"results": envelopes})
 
-        return AgentSuccessResponse(
-            agent_name=request.agent_name,
-            output_data=output_data
+@app.post(
+    "/goal_pipeline",
+    response_model=GoalPipelineResponse,
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"model": GoalPipelineErrorResponse},
+        status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": GoalPipelineErrorResponse},
+    },
+    summary="Run the new-goal pipeline in one request",
+)
+async def goal_pipeline(request: GoalPipelineRequest):
+    """
+    Chains IntentClassifierAgent -> GoalParserAgent -> TaskDecomposerAgent ->
+    SchedulerAgent in-process, handing each stage's output object straight to
+    the next. Stops after classification unless the intent is `new_goal`.
+    Every response reports how long each stage that ran took and which path
+    (llm, cache, heuristic, fallback, budget) produced its result, and the
+    `Server-Timing` header carries every stage's spans.
+    """
+    log_info("Received goal pipeline request.")
+    spans = start_trace()
+    pipeline_started = time.perf_counter()
+    stages: List[StageTiming] = []
+    output_data: Dict[str, Any] = {}
+
+    async def run_stage(agent_name: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        source = None
+        try:
+            output, source = await _call_agent(agent_name, input_data)
+            return output
+        finally:
+            elapsed = time.perf_counter() - started
+            STAGE_LATENCY.labels(agent_name).observe(elapsed)
+            stages.append(StageTiming(
+                agent_name=agent_name,
+                duration_ms=round(elapsed * 1000, 3),
+                source=source,
+            ))
+
+    agent_name = "IntentClassifierAgent"
+    try:
+        intent = (await run_stage(agent_name, {"text": request.text}))["intent"]
+        output_data["intent"] = intent
+        if intent == "new_goal":
+            agent_name = "GoalParserAgent"
+            output_data["goal"] = await run_stage(agent_name, {"text": request.text})
+            agent_name = "TaskDecomposerAgent"
+            output_data["tasks"] = (await run_stage(agent_name, output_data["goal"]))["tasks"]
+            agent_name = "SchedulerAgent"
+            output_data["schedule"] = await run_stage(agent_name, {"tasks": output_data["tasks"]})
+    except Exception as e:
+        status_code, error = _error_response(agent_name, e)
+        return EnvelopeResponse(
+            status_code=status_code,
+            content=_envelope(GoalPipelineErrorResponse(
+                agent_name=error.agent_name, error=error.error, stages=stages
+            )),
+            headers={"Server-Timing": server_timing(spans, (time.perf_counter() - pipeline_started) * 1000)},
         )
 
+    log_info(f"Goal pipeline finished after {len(stages)} stage(s) with intent '{output_data['intent']}'.")
+    headers = {"Server-Timing": server_timing(spans, (time.perf_counter() - pipeline_started) * 1000)}
+    try:
+        return EnvelopeResponse(
+            content=_envelope(GoalPipelineResponse.model_construct(
+                intent=output_data["intent"], output_data=output_data, stages=stages
+            )),
+            headers=headers,
+        )
+    except (TypeError, ValueError) as e:
+        status_code, error = _unencodable(stages[-1].agent_name, e)
+        return EnvelopeResponse(
+            status_code=status_code,
+            content=_envelope(GoalPipelineErrorResponse(
+                agent_name=error.agent_name, error=error.error, stages=stages
+            )),
+            headers=headers,
+        )
+
+@app.post(
+    "/stream_schedule",
+    responses={
+        status.HTTP_200_OK: {"content": {"application/x-ndjson": {}}},
+        status.HTTP_400_BAD_REQUEST: {"model": AgentErrorResponse},
+    },
+    summary="Stream a long-horizon schedule as NDJSON",
+)
+async def stream_schedule_endpoint(request: ScheduleStreamRequest):
+    """
+    Streams SchedulerAgent output one JSON record per line, in time order.
+    The final `page` record carries the cursor for the next page, if any.
+    """
+    log_info("Received streaming schedule request.")
+    try:
+        records = AGENTS.module("SchedulerAgent").stream_schedule(request.input_data)
     except ValueError as e:
-        error_code = "bad_request"
-        if request.agent_name == "TaskDecomposerAgent":
-            error_code = "DecomposeFailure"
-        elif request.agent_name == "SchedulerAgent":
-            error_code = "ScheduleFailure"
-        elif request.agent_name == "AdaptationAgent":
-            error_code = "AdaptationFailure"
-        
-        error_message = f"Bad Request: {str(e)}"
-        log_error(error_message)
-        return JSONResponse(
+        log_error(f"Bad Request: {str(e)}")
+        return EnvelopeResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
-            content=AgentErrorResponse(
-                agent_name=request.agent_name,
-                error=AgentError(code=error_code, message=str(e))
-            ).dict(),
-        )
-    except Exception as e:
-        error_message = f"Internal Server Error while processing agent '{request.agent_name}': {str(e)}"
-        log_error(error_message)
-        return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            content=AgentErrorResponse(
-                agent_name=request.agent_name,
-                error=AgentError(code="internal_server_error", message="An unexpected error occurred.")
-            ).dict(),
+            content=_envelope(AgentErrorResponse(
+                agent_name="SchedulerAgent",
+                error=AgentError(code="ScheduleFailure", message=str(e))
+            )),
         )
 
+    return StreamingResponse(
+        (_dumps(record) + b"\n" for record in records),
+        media_type="application/x-ndjson",
+    )
+
 # --- Server Entrypoint ---
 if __name__ == "__main__":
-    log_info(f"Starting server on http://0.0.0.0:{PORT}")
-    uvicorn.run("app.main:app", host="0.0.0.0", port=int(PORT), reload=True)
+    from app.server import main
+
+    main()
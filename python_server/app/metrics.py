@@ -0,0 +1,248 @@
+"""
+In-process metrics with a Prometheus text exposition.
+
+A small, dependency-free subset of the Prometheus client model:
+  * Counter   - monotonically increasing totals.
+  * Gauge     - values that go up and down (in-flight requests).
+  * Histogram - cumulative latency buckets plus sum and count, from which
+                Prometheus derives p50/p99 with `histogram_quantile`.
+
+Each metric has fixed label names; `metric.labels(*values)` returns the child
+to update, created on first use. Recording is one lock acquisition and, for
+histograms, one bisect, so it is cheap enough for the request path.
+
+Values that already live elsewhere (LLM queue depth, cache sizes) are not
+copied into metrics; `REGISTRY.register_collector` adds a callback that reads
+them at scrape time instead.
+"""
+
+import abc
+import bisect
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from app.log import logger
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# (metric name, type, help, [(label dict, value[, name suffix]), ...])
+Family = Tuple[str, str, str, List[tuple]]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class _Metric(abc.ABC):
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values: str):
+        """Returns the child for these label values, in `labelnames` order."""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}.")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    @abc.abstractmethod
+    def _new_child(self):
+        """A fresh child holding the value(s) for one set of label values."""
+
+    def _label_dict(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def collect(self) -> Family:
+        with self._lock:
+            children = list(self._children.items())
+        samples = []
+        for key, child in children:
+            samples.extend(child._samples(self._label_dict(key)))
+        return self.name, self.type, self.help, samples
+
+
+class _Value:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self.value = value
+
+    def _samples(self, labels):
+        return [(labels, self.value, "")]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+
+class _HistogramValue:
+    def __init__(self, bounds: Tuple[float, ...]):
+        self._lock = threading.Lock()
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def _samples(self, labels):
+        with self._lock:
+            counts, total, count = list(self._counts), self.sum, self.count
+        samples = []
+        cumulative = 0
+        for bound, bucket in zip(self._bounds + (math.inf,), counts):
+            cumulative += bucket
+            samples.append(({**labels, "le": _format_value(bound)}, cumulative, "_bucket"))
+        samples.append((labels, total, "_sum"))
+        samples.append((labels, count, "_count"))
+        return samples
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+
+class Registry:
+    """Holds metrics and scrape-time collectors and renders them as Prometheus text."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def _add(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric '{metric.name}' is already registered.")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, help, labelnames))
+
+    def histogram(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], Iterable[Family]]) -> None:
+        """Adds a callback returning metric families computed at scrape time."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def collect(self) -> List[Family]:
+        with self._lock:
+            metrics, collectors = list(self._metrics.values()), list(self._collectors)
+        families = [metric.collect() for metric in metrics]
+        for collector in collectors:
+            try:
+                families.extend(collector())
+            except Exception as exc:  # a broken collector must not break the scrape
+                logger.warning(f"[Metrics] Collector {collector!r} failed: {exc}")
+        return families
+
+    def render(self) -> str:
+        """The Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for name, kind, help, samples in self.collect():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample in samples:
+                labels, value = sample[0], sample[1]
+                suffix = sample[2] if len(sample) > 2 else ""
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REGISTRY = Registry()
+
+# --- Request path ---
+AGENT_LATENCY = REGISTRY.histogram(
+    "kira_agent_duration_seconds", "Time spent in an agent call.", ("agent",)
+)
+AGENT_RESULTS = REGISTRY.counter(
+    "kira_agent_results_total",
+    "Agent calls by outcome and by the path that produced the answer (llm, cache, heuristic, fallback, ...).",
+    ("agent", "status", "source"),
+)
+AGENTS_IN_FLIGHT = REGISTRY.gauge(
+    "kira_agent_in_flight", "Agent calls currently running.", ("agent",)
+)
+STAGE_LATENCY = REGISTRY.histogram(
+    "kira_pipeline_stage_duration_seconds", "Time spent in each /goal_pipeline stage.", ("stage",)
+)
+
+# --- LLM ---
+LLM_LATENCY = REGISTRY.histogram(
+    "kira_llm_call_duration_seconds", "Ollama generation time, excluding time waiting for a model slot.", ("model",)
+)
+LLM_CALLS = REGISTRY.counter(
+    "kira_llm_calls_total", "Ollama generations by outcome (success or error).", ("model", "outcome")
+)
+
+# --- Validation ---
+VALIDATIONS = REGISTRY.counter(
+    "kira_schema_validations_total", "Output schema checks by result (passed, failed or skipped).", ("agent", "result")
+)
@@ -0,0 +1,143 @@
+"""
+Overlap detection for calendar events.
+
+Two events overlap when ``start1 < end2 and end1 > start2``. The sweep-line
+detector sorts events by start time once and keeps a min-heap of the events
+that are still "open", so it runs in O(n log n + k) for k overlapping pairs
+instead of comparing every pair of events. `overlapping_pairs_array` does
+the same on NumPy arrays of start/end times.
+"""
+
+import heapq
+from datetime import datetime
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+Interval = Tuple[datetime, datetime]
+
+
+def check_overlap(start1: datetime, end1: datetime, start2: datetime, end2: datetime) -> bool:
+    """Checks if two datetime ranges overlap."""
+    return (start1 < end2) and (end1 > start2)
+
+
+def overlapping_pairs(intervals: Sequence[Interval]) -> List[Tuple[int, int]]:
+    """
+    Finds every pair of overlapping intervals with a sweep line.
+
+    Args:
+        intervals: A sequence of (start, end) tuples.
+
+    Returns:
+        A list of index pairs (i, j) with i < j, sorted in the same order a
+        nested ``for i / for j > i`` loop would visit them.
+    """
+    order = sorted(range(len(intervals)), key=lambda idx: intervals[idx][0])
+    active: List[Tuple[Any, int]] = []  # min-heap of (end, index)
+    pairs: List[Tuple[int, int]] = []
+
+    for idx in order:
+        start, end = intervals[idx]
+        # Anything that ended at or before this start can't overlap it, nor
+        # anything that starts later.
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        for _, other in active:
+            # Active intervals started no later than `start` and end after it;
+            # only a zero/negative length interval can still miss them.
+            if intervals[other][0] < end:
+                pairs.append((other, idx) if other < idx else (idx, other))
+        heapq.heappush(active, (end, idx))
+
+    pairs.sort()
+    return pairs
+
+
+def overlapping_pairs_array(starts: np.ndarray, ends: np.ndarray) -> List[Tuple[int, int]]:
+    """
+    Vectorized `overlapping_pairs` for index-aligned arrays of start and end times.
+
+    After sorting by start, an event overlaps exactly the events that start
+    before it ends, which `searchsorted` finds for all events at once. That
+    only holds when every event has a positive length; otherwise this falls
+    back to the heap-based sweep.
+    """
+    n = len(starts)
+    if n == 0:
+        return []
+    if not (ends > starts).all():
+        return overlapping_pairs(list(zip(starts.tolist(), ends.tolist())))
+
+    order = np.argsort(starts, kind="stable")
+    sorted_starts = starts[order]
+    first_after = np.searchsorted(sorted_starts, ends[order], side="left")
+    counts = np.maximum(first_after - np.arange(1, n + 1), 0)
+    total = int(counts.sum())
+    if total == 0:
+        return []
+
+    left = np.repeat(np.arange(n), counts)
+    rank = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    right = left + 1 + rank
+    a, b = order[left], order[right]
+    first, second = np.minimum(a, b), np.maximum(a, b)
+    by_pair = np.lexsort((second, first))
+    return list(zip(first[by_pair].tolist(), second[by_pair].tolist()))
+
+
+def naive_overlapping_pairs(intervals: Sequence[Interval]) -> List[Tuple[int, int]]:
+    """Reference O(n^2) implementation of `overlapping_pairs`, kept for tests and benchmarks."""
+    pairs: List[Tuple[int, int]] = []
+    for i in range(len(intervals)):
+        for j in range(i + 1, len(intervals)):
+            if check_overlap(intervals[i][0], intervals[i][1], intervals[j][0], intervals[j][1]):
+                pairs.append((i, j))
+    return pairs
+
+
+def mark_conflicts(
+    events: List[Dict[str, Any]],
+    intervals: Sequence[Interval],
+) -> List[Dict[str, Any]]:
+    """
+    Marks overlapping events as conflicts and builds the conflict entries.
+
+    Args:
+        events: Event dicts, modified in-place (``status`` is set to "conflict").
+        intervals: The (start, end) datetimes of each event, index-aligned with `events`.
+
+    Returns:
+        The conflicts list, two entries per overlapping pair.
+    """
+    return conflict_entries(events, overlapping_pairs(intervals))
+
+
+def conflict_entries(events: List[Dict[str, Any]], pairs: Sequence[Tuple[int, int]]) -> List[Dict[str, Any]]:
+    """
+    Marks the events of each overlapping pair as conflicts and builds the conflict entries.
+
+    Args:
+        events: Event dicts, modified in-place (``status`` is set to "conflict").
+        pairs: Sorted (i, j) index pairs, as returned by `overlapping_pairs`.
+
+    Returns:
+        The conflicts list, two entries per overlapping pair.
+    """
+    conflicts: List[Dict[str, Any]] = []
+    for i, j in pairs:
+        event1 = events[i]
+        event2 = events[j]
+        event1["status"] = "conflict"
+        event2["status"] = "conflict"
+        conflicts.append({
+            "task_id": event1["task_id"],
+            "conflict_with": event2["session_id"],
+            "reason": "overlap",
+        })
+        conflicts.append({
+            "task_id": event2["task_id"],
+            "conflict_with": event1["session_id"],
+            "reason": "overlap",
+        })
+    return conflicts
@@ -0,0 +1,235 @@
+"""
+Generator-based expansion of task recurrence rules.
+
+`iter_schedule` merges the lazily expanded occurrences of every task into a
+single stream ordered by (start_time, task index) and annotates conflicts on
+the fly. An event is only released once the stream has moved past its end
+time, so its status is final when it is yielded; the look-ahead buffer holds
+just the events that can still overlap, which keeps memory bounded by the
+number of tasks and the longest event, not by the length of the horizon.
+`check_durations` caps the longest event at MAX_EVENT_MINUTES so that bound
+holds for client-supplied task lists.
+"""
+
+import base64
+import hashlib
+import heapq
+import json
+import uuid
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from dateutil.parser import isoparse
+
+from app.log import logger
+from app.scheduling.rrule_cache import RECURRENCE_CACHE
+
+DEFAULT_HORIZON_DAYS = 30
+MAX_HORIZON_DAYS = 366
+MAX_PAGE_SIZE = 10_000
+# Longest session a task may ask for; bounds the look-ahead buffer of iter_schedule.
+MAX_EVENT_MINUTES = 24 * 60
+
+# Deterministic session IDs, so a resumed stream re-creates the same IDs.
+_SESSION_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "kira/scheduler/session")
+
+# (start_time, task index) - the total order of the stream and the cursor position.
+StreamKey = Tuple[datetime, int]
+
+
+def session_id_for(task_id: Any, start_time: datetime) -> str:
+    """Returns the stable session ID of a task occurrence."""
+    return str(uuid.uuid5(_SESSION_NAMESPACE, f"{task_id}|{start_time.isoformat()}"))
+
+
+def check_durations(tasks: Sequence[Dict[str, Any]]) -> None:
+    """
+    Checks that every task's `estimated_minutes` (default 60) is a number in
+    (0, MAX_EVENT_MINUTES].
+
+    Raises:
+        ValueError: If a task's duration is not a number within those bounds.
+    """
+    for task in tasks:
+        minutes = task.get("estimated_minutes", 60)
+        if (
+            not isinstance(minutes, (int, float)) or isinstance(minutes, bool)
+            or not 0 < minutes <= MAX_EVENT_MINUTES
+        ):
+            raise ValueError(
+                f"'estimated_minutes' of task {task.get('task_id')!r} must be a number "
+                f"greater than 0 and at most {MAX_EVENT_MINUTES}."
+            )
+
+
+def _expand_task(
+    task: Dict[str, Any],
+    task_idx: int,
+    dtstart: datetime,
+    resume_from: datetime,
+    until: datetime,
+) -> Iterator[Tuple[datetime, int, datetime]]:
+    """Lazily yields (start, task index, end) for one task within [resume_from, until]."""
+    duration = timedelta(minutes=task.get("estimated_minutes", 60))
+    try:
+        rule = RECURRENCE_CACHE.rule(task["recurrence_rule"], dtstart)
+    except (ValueError, KeyError) as e:
+        logger.warning(f"Could not parse rrule for task {task.get('task_id')}: {e}")
+        return
+
+    for start_time in rule.xafter(resume_from, inc=True):
+        if start_time > until:
+            break
+        yield start_time, task_idx, start_time + duration
+
+
+def iter_occurrences(
+    tasks: Sequence[Dict[str, Any]],
+    window_start: datetime,
+    until: datetime,
+    resume_from: Optional[datetime] = None,
+) -> Iterator[Tuple[datetime, int, datetime]]:
+    """
+    Merges every task's occurrences into one (start, task index, end) stream
+    ordered by (start, task index).
+    """
+    dtstart = window_start.replace(hour=9, minute=0)
+    resume_from = max(resume_from or window_start, window_start)
+    streams = [
+        _expand_task(task, task_idx, dtstart, resume_from, until)
+        for task_idx, task in enumerate(tasks)
+    ]
+    return heapq.merge(*streams)
+
+
+def iter_schedule(
+    tasks: Sequence[Dict[str, Any]],
+    window_start: datetime,
+    until: datetime,
+    after: Optional[StreamKey] = None,
+) -> Iterator[Tuple[StreamKey, Dict[str, Any], List[Dict[str, Any]]]]:
+    """
+    Streams conflict-annotated events in time order.
+
+    Pending events wait until the stream passes their end, so the buffer
+    grows with the longest duration; callers streaming client task lists
+    should `check_durations` first.
+
+    Args:
+        tasks: The task list, as produced by the TaskDecomposerAgent.
+        window_start: Start of the scheduling window (midnight, scheduler timezone).
+        until: End of the scheduling window.
+        after: Resume position; only events ordered after this key are yielded.
+               Earlier events that can still overlap them are re-expanded so
+               statuses stay correct across pages.
+
+    Yields:
+        (key, event, conflicts) where `conflicts` holds the entries for every
+        pair in which this event comes first. Pairs whose first event was
+        yielded on an earlier page are not repeated.
+    """
+    resume_from = None
+    if after is not None:
+        longest = max((timedelta(minutes=t.get("estimated_minutes", 60)) for t in tasks), default=timedelta(0))
+        resume_from = after[0] - max(longest, timedelta(0))
+
+    # Each pending entry: [key, end, event, later overlapping entries, emit?]
+    pending: deque = deque()
+
+    def release(entry):
+        key, _, event, partners, _ = entry
+        conflicts = []
+        for other in partners:
+            conflicts.append({"task_id": event["task_id"], "conflict_with": other[2]["session_id"], "reason": "overlap"})
+            conflicts.append({"task_id": other[2]["task_id"], "conflict_with": event["session_id"], "reason": "overlap"})
+        return key, event, conflicts
+
+    for start_time, task_idx, end_time in iter_occurrences(tasks, window_start, until, resume_from):
+        while pending and pending[0][1] <= start_time:
+            entry = pending.popleft()
+            if entry[4]:
+                yield release(entry)
+
+        task_id = tasks[task_idx].get("task_id")
+        key = (start_time, task_idx)
+        event = {
+            "session_id": session_id_for(task_id, start_time),
+            "task_id": task_id,
+            "start_time": start_time.isoformat(),
+            "end_time": end_time.isoformat(),
+            "status": "scheduled",
+        }
+        entry = [key, end_time, event, [], after is None or key > after]
+
+        for other in pending:
+            # `other` started no later than this event.
+            if other[0][0] < end_time and other[1] > start_time:
+                other[2]["status"] = "conflict"
+                event["status"] = "conflict"
+                other[3].append(entry)
+        pending.append(entry)
+
+    while pending:
+        entry = pending.popleft()
+        if entry[4]:
+            yield release(entry)
+
+
+# --- Resumable cursors ---
+
+def _tasks_fingerprint(tasks: Sequence[Dict[str, Any]]) -> str:
+    """Short digest of the fields that shape the stream, to reject cursors from another task list."""
+    digest = hashlib.sha1()
+    for task in tasks:
+        digest.update(json.dumps(
+            [task.get("task_id"), task.get("recurrence_rule"), task.get("estimated_minutes", 60)],
+        ).encode())
+    return digest.hexdigest()[:16]
+
+
+def encode_cursor(
+    tasks: Sequence[Dict[str, Any]],
+    window_start: datetime,
+    until: datetime,
+    after: StreamKey,
+) -> str:
+    """Builds an opaque cursor that resumes the stream right after `after`."""
+    state = {
+        "window_start": window_start.isoformat(),
+        "until": until.isoformat(),
+        "after": [after[0].isoformat(), after[1]],
+        "tasks": _tasks_fingerprint(tasks),
+    }
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode()).decode()
+
+
+def decode_cursor(cursor: str, tasks: Sequence[Dict[str, Any]]) -> Tuple[datetime, datetime, StreamKey]:
+    """
+    Decodes a cursor from `encode_cursor` into (window_start, until, after).
+
+    Cursors are not signed, so the decoded window is held to the same
+    MAX_HORIZON_DAYS limit as a fresh request.
+
+    Raises:
+        ValueError: If the cursor is malformed, spans more than MAX_HORIZON_DAYS
+                    or was issued for a different task list.
+    """
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        window_start = isoparse(state["window_start"])
+        until = isoparse(state["until"])
+        after = (isoparse(state["after"][0]), int(state["after"][1]))
+        fingerprint = state["tasks"]
+        in_window = (
+            window_start < until <= window_start + timedelta(days=MAX_HORIZON_DAYS)
+            and window_start <= after[0] <= until
+            and 0 <= after[1] < len(tasks)
+        )
+    except (ValueError, KeyError, IndexError, TypeError, OverflowError) as e:
+        raise ValueError(f"Invalid schedule cursor: {e}")
+    if not in_window:
+        raise ValueError(f"Invalid schedule cursor: the window must span at most {MAX_HORIZON_DAYS} days.")
+    if fingerprint != _tasks_fingerprint(tasks):
+        raise ValueError("Schedule cursor does not match the given task list.")
+    return window_start, until, after
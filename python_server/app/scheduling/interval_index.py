@@ -0,0 +1,62 @@
+"""
+A small interval index for incremental overlap queries.
+
+Intervals are kept in a list sorted by (start, key). Because every stored
+interval is at most `max_length` long, anything overlapping [start, end) must
+begin inside (start - max_length, end), so a query is two bisects plus a scan
+of that window instead of a pass over the whole schedule.
+"""
+
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class IntervalIndex:
+    """Sorted index of (start, end) intervals addressed by a key."""
+
+    def __init__(self, items: Iterable[Tuple[Hashable, datetime, datetime]] = ()):
+        self._spans: Dict[Hashable, Tuple[datetime, datetime]] = {}
+        self._sorted: List[Tuple[datetime, Hashable]] = []
+        self._max_length = timedelta(0)
+        for key, start, end in items:
+            self._spans[key] = (start, end)
+            self._max_length = max(self._max_length, end - start)
+        self._sorted = sorted((start, key) for key, (start, _) in self._spans.items())
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._spans
+
+    def get(self, key: Hashable) -> Optional[Tuple[datetime, datetime]]:
+        """Returns the (start, end) stored for `key`, or None."""
+        return self._spans.get(key)
+
+    def insert(self, key: Hashable, start: datetime, end: datetime) -> None:
+        """Adds an interval, replacing any interval already stored under `key`."""
+        self.remove(key)
+        self._spans[key] = (start, end)
+        insort(self._sorted, (start, key))
+        # The bound only ever grows; a stale (too large) bound is still correct.
+        self._max_length = max(self._max_length, end - start)
+
+    def remove(self, key: Hashable) -> Optional[Tuple[datetime, datetime]]:
+        """Removes the interval stored under `key` and returns it, if any."""
+        span = self._spans.pop(key, None)
+        if span is not None:
+            pos = bisect_left(self._sorted, (span[0], key))
+            del self._sorted[pos]
+        return span
+
+    def overlapping(self, start: datetime, end: datetime) -> List[Hashable]:
+        """Returns the keys of all intervals overlapping [start, end), in start order."""
+        lo = bisect_left(self._sorted, (start - self._max_length,))
+        hi = bisect_left(self._sorted, (end,))
+        keys = []
+        for other_start, key in self._sorted[lo:hi]:
+            other_end = self._spans[key][1]
+            if other_start < end and other_end > start:
+                keys.append(key)
+        return keys
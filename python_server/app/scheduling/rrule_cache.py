@@ -0,0 +1,148 @@
+"""
+Process-wide cache of compiled recurrence rules and their expansions.
+
+Almost every task carries one of a handful of rule strings (the fallback
+decomposer and the LLM both emit `RRULE:FREQ=WEEKLY;BYDAY=...`), so two
+bounded LRU tiers are kept:
+
+  * rules   - `rrulestr` results keyed by (rule string, dtstart).
+  * offsets - occurrences within a window, stored as offsets from dtstart and
+              keyed by (rule string, dtstart time of day, timezone, window).
+              For rules whose expansion only depends on the weekday of
+              dtstart (DAILY/WEEKLY/sub-daily rules without UNTIL or
+              month/year parts) the date is reduced to its weekday, so the
+              entry is reused across days; other rules are keyed by date.
+
+Offsets are wall-clock timedeltas, which is exactly how `rrule` builds its
+occurrences, so `dtstart + offset` reproduces them including tzinfo.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Hashable, List, Tuple
+
+from dateutil.rrule import rrulestr
+
+RULE_CACHE_SIZE = int(os.environ.get("RRULE_CACHE_SIZE", 256))
+OFFSETS_CACHE_SIZE = int(os.environ.get("RRULE_OFFSETS_CACHE_SIZE", 1024))
+
+# RRULE parts under which an expansion is invariant to shifting dtstart by whole weeks.
+_WEEKDAY_INVARIANT_FREQS = {"DAILY", "WEEKLY", "HOURLY", "MINUTELY", "SECONDLY"}
+_WEEKDAY_INVARIANT_PARTS = {"FREQ", "INTERVAL", "COUNT", "BYDAY", "WKST", "BYHOUR", "BYMINUTE", "BYSECOND"}
+
+
+class _LRU:
+    """A small thread-safe LRU map with hit/miss/eviction counters."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def _date_anchor(rule_str: str, dtstart: datetime) -> Hashable:
+    """The part of dtstart's date an expansion of `rule_str` depends on."""
+    text = rule_str.strip()
+    if "\n" not in text and text.upper().startswith("RRULE:"):
+        parts = {}
+        for item in text[len("RRULE:"):].split(";"):
+            name, _, value = item.partition("=")
+            parts[name.strip().upper()] = value.strip().upper()
+        if parts.get("FREQ") in _WEEKDAY_INVARIANT_FREQS and set(parts) <= _WEEKDAY_INVARIANT_PARTS:
+            return ("weekday", dtstart.weekday())
+    return ("date", dtstart.date())
+
+
+class RecurrenceCache:
+    """Bounded LRU caches of parsed rules and expanded occurrence offsets."""
+
+    def __init__(self, rule_maxsize: int = RULE_CACHE_SIZE, offsets_maxsize: int = OFFSETS_CACHE_SIZE):
+        self._rules = _LRU(rule_maxsize)
+        self._offsets = _LRU(offsets_maxsize)
+
+    def rule(self, rule_str: str, dtstart: datetime):
+        """
+        Returns `rrulestr(rule_str, dtstart=dtstart)`, parsing it only once.
+
+        Raises:
+            ValueError: If the rule string cannot be parsed (never cached).
+        """
+        # Aware datetimes compare equal across timezones, so key on wall time + zone.
+        key = (rule_str, dtstart.replace(tzinfo=None), str(dtstart.tzinfo), dtstart.utcoffset())
+        rule = self._rules.get(key)
+        if rule is None:
+            rule = rrulestr(rule_str, dtstart=dtstart)
+            self._rules.put(key, rule)
+        return rule
+
+    def occurrences(self, rule_str: str, dtstart: datetime, after: datetime, before: datetime) -> List[datetime]:
+        """
+        Equivalent to `rrulestr(rule_str, dtstart=dtstart).between(after, before, inc=True)`.
+
+        Raises:
+            ValueError: If the rule string cannot be parsed.
+        """
+        key = (
+            rule_str,
+            dtstart.time(),
+            (str(dtstart.tzinfo), dtstart.utcoffset()),
+            after - dtstart,
+            before - dtstart,
+            _date_anchor(rule_str, dtstart),
+        )
+        offsets: Tuple = self._offsets.get(key)
+        if offsets is None:
+            occurrences = self.rule(rule_str, dtstart).between(after, before, inc=True)
+            self._offsets.put(key, tuple(start - dtstart for start in occurrences))
+            return occurrences
+        return [dtstart + offset for offset in offsets]
+
+    def clear(self) -> None:
+        self._rules.clear()
+        self._offsets.clear()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {"rules": self._rules.stats(), "offsets": self._offsets.stats()}
+
+
+# Shared by every scheduler call in this process.
+RECURRENCE_CACHE = RecurrenceCache()
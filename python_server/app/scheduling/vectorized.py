@@ -0,0 +1,170 @@
+"""
+Vectorized occurrence expansion on NumPy `datetime64` arrays.
+
+Simple `FREQ=DAILY` and `FREQ=WEEKLY` rules (optionally with INTERVAL, COUNT
+and plain BYDAY) cover nearly all of our tasks. Their occurrences are
+`dtstart + k days` for an arithmetic/weekday pattern of k, so they are
+computed in one step as arrays of naive wall-clock times. Every other rule
+goes through dateutil (via the shared recurrence cache) and is converted to
+the same representation.
+
+Wall-clock arithmetic is what `rrule` itself does: it combines each date with
+dtstart's time and tzinfo. Re-attaching dtstart's tzinfo when formatting
+therefore reproduces `rrulestr` exactly, DST changes included.
+"""
+
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.log import logger
+from app.scheduling.rrule_cache import RECURRENCE_CACHE
+
+_WEEKDAYS = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+_DAY = np.timedelta64(1, "D")
+
+# (freq, interval, count, weekdays)
+RuleSpec = Tuple[str, int, Optional[int], Tuple[int, ...]]
+
+
+@lru_cache(maxsize=1024)
+def simple_rule(rule_str: str) -> Optional[RuleSpec]:
+    """
+    Parses a rule the fast path supports, or returns None.
+
+    Supported: a single `RRULE:FREQ=DAILY|WEEKLY` line with optional
+    INTERVAL, COUNT and BYDAY (weekday names only, no ordinals).
+    """
+    text = rule_str.strip().upper()
+    if "\n" in text:
+        return None
+    if text.startswith("RRULE:"):
+        text = text[len("RRULE:"):]
+
+    parts: Dict[str, str] = {}
+    for item in text.split(";"):
+        name, sep, value = item.partition("=")
+        if not sep or name in parts:
+            return None
+        parts[name] = value
+
+    freq = parts.pop("FREQ", None)
+    if freq not in ("DAILY", "WEEKLY"):
+        return None
+    try:
+        interval = int(parts.pop("INTERVAL", "1"))
+        count = int(parts["COUNT"]) if "COUNT" in parts else None
+    except ValueError:
+        return None
+    parts.pop("COUNT", None)
+    weekdays: Tuple[int, ...] = ()
+    if "BYDAY" in parts:
+        names = parts.pop("BYDAY").split(",")
+        if not all(name in _WEEKDAYS for name in names):
+            return None
+        weekdays = tuple(sorted({_WEEKDAYS[name] for name in names}))
+    if parts or interval < 1 or (count is not None and count < 1):
+        return None
+    return freq, interval, count, weekdays
+
+
+def expand_simple(spec: RuleSpec, dtstart: datetime, after: datetime, before: datetime) -> np.ndarray:
+    """
+    Occurrences of a `simple_rule` spec in [after, before] as naive wall-clock `datetime64[us]`.
+    `after` and `before` must share dtstart's tzinfo.
+    """
+    freq, interval, count, weekdays = spec
+    start = np.datetime64(dtstart.replace(tzinfo=None), "us")
+    lo = np.datetime64(after.replace(tzinfo=None), "us")
+    hi = np.datetime64(before.replace(tzinfo=None), "us")
+    if hi < start:
+        return np.empty(0, dtype="datetime64[us]")
+
+    span_days = int((hi - start) // _DAY)
+    start_weekday = dtstart.weekday()
+    if freq == "DAILY":
+        offsets = np.arange(0, span_days + 1, interval)
+        if weekdays:
+            offsets = offsets[np.isin((start_weekday + offsets) % 7, weekdays)]
+    else:
+        # Weeks start on Monday (WKST default); days before dtstart are dropped.
+        days = np.asarray(weekdays or (start_weekday,)) - start_weekday
+        weeks = np.arange(0, span_days // 7 + 2, interval) * 7
+        offsets = (weeks[:, None] + days[None, :]).ravel()
+        offsets = offsets[(offsets >= 0) & (offsets <= span_days)]
+    if count is not None:
+        offsets = offsets[:count]
+
+    starts = start + offsets.astype("timedelta64[D]")
+    return starts[(starts >= lo) & (starts <= hi)]
+
+
+def expand_tasks(
+    tasks: Sequence[Dict[str, Any]],
+    dtstart: datetime,
+    after: datetime,
+    before: datetime,
+) -> Tuple[List[int], np.ndarray, np.ndarray]:
+    """
+    Expands every task's rule between `after` and `before` (inclusive), task by task.
+
+    Returns:
+        (task index per event, start times, end times); times are naive
+        wall-clock `datetime64[us]` in dtstart's timezone.
+    """
+    task_index: List[int] = []
+    start_parts: List[np.ndarray] = []
+    end_parts: List[np.ndarray] = []
+    same_zone = after.tzinfo is dtstart.tzinfo and before.tzinfo is dtstart.tzinfo
+
+    for idx, task in enumerate(tasks):
+        try:
+            rule_str = task["recurrence_rule"]
+            spec = simple_rule(rule_str) if same_zone and isinstance(rule_str, str) else None
+            if spec is not None:
+                starts = expand_simple(spec, dtstart, after, before)
+            else:
+                occurrences = RECURRENCE_CACHE.occurrences(rule_str, dtstart, after, before)
+                starts = np.array([o.replace(tzinfo=None) for o in occurrences], dtype="datetime64[us]")
+        except (ValueError, KeyError) as e:
+            logger.warning(f"Could not parse rrule for task {task.get('task_id')}: {e}")
+            continue
+
+        duration = np.timedelta64(timedelta(minutes=task.get("estimated_minutes", 60)), "us")
+        task_index.extend([idx] * len(starts))
+        start_parts.append(starts)
+        end_parts.append(starts + duration)
+
+    if not start_parts:
+        empty = np.empty(0, dtype="datetime64[us]")
+        return task_index, empty, empty
+    return task_index, np.concatenate(start_parts), np.concatenate(end_parts)
+
+
+def _fixed_offset_suffix(dtstart: datetime) -> Optional[str]:
+    """The isoformat() offset suffix shared by every time in dtstart's zone, if it is fixed."""
+    tz = dtstart.tzinfo
+    if tz is None:
+        return ""
+    # pytz zones attached via localize()/replace() and datetime.timezone have a
+    # single offset for every datetime carrying them.
+    if isinstance(tz, timezone) or hasattr(tz, "_utcoffset"):
+        return dtstart.isoformat()[len(dtstart.replace(tzinfo=None).isoformat()):]
+    return None
+
+
+def format_iso(times: np.ndarray, dtstart: datetime) -> List[str]:
+    """
+    Formats wall-clock times exactly like `datetime.isoformat()` on the
+    equivalent aware datetimes carrying dtstart's tzinfo.
+    """
+    if len(times) == 0:
+        return []
+    suffix = _fixed_offset_suffix(dtstart)
+    whole_seconds = not (times.astype("int64") % 1_000_000).any()
+    if suffix is not None and whole_seconds:
+        return [text + suffix for text in np.datetime_as_string(times, unit="s").tolist()]
+    tz = dtstart.tzinfo
+    return [value.replace(tzinfo=tz).isoformat() for value in times.astype(object)]
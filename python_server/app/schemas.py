@@ -0,0 +1,97 @@
+"""
+Output JSON schemas of the agents.
+
+The scheduler and the adaptation agent share one schedule layout; the only
+difference is that a freshly generated schedule can only contain
+"scheduled" or "conflict" events, while an adapted one may also carry
+"skipped" and other states.
+"""
+
+from typing import Any, Dict, List, Optional
+
+# --- GoalParserAgent ---
+GOAL_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "type": {"type": "string", "enum": ["fitness", "skill", "project", "other"]},
+        "description": {"type": "string"},
+        "deadline": {"type": ["string", "null"], "format": "date"},
+        "constraints": {
+            "type": "object",
+            "properties": {
+                "days_available": {"type": "array", "items": {"type": "string"}},
+                "time_windows": {"type": "array", "items": {"type": "string"}}
+            },
+            "required": ["days_available", "time_windows"]
+        },
+        "preferences": {"type": "object"}
+    },
+    "required": ["type", "description", "deadline", "constraints", "preferences"]
+}
+
+# --- TaskDecomposerAgent ---
+TASK_LIST_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "tasks": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "task_id": {"type": "string", "format": "uuid"},
+                    "goal_id": {"type": ["string", "null"], "format": "uuid"},
+                    "description": {"type": "string"},
+                    "recurrence_rule": {"type": "string"},
+                    "estimated_minutes": {"type": "number"},
+                    "dependencies": {"type": "array", "items": {"type": "string", "format": "uuid"}}
+                },
+                "required": ["task_id", "goal_id", "description", "recurrence_rule", "estimated_minutes", "dependencies"]
+            }
+        }
+    },
+    "required": ["tasks"]
+}
+
+
+# --- SchedulerAgent / AdaptationAgent ---
+def _schedule_schema(status_enum: Optional[List[str]] = None) -> Dict[str, Any]:
+    status: Dict[str, Any] = {"type": "string"}
+    if status_enum:
+        status["enum"] = status_enum
+    return {
+        "type": "object",
+        "properties": {
+            "events": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "session_id": {"type": "string", "format": "uuid"},
+                        "task_id": {"type": "string"},
+                        "start_time": {"type": "string", "format": "date-time"},
+                        "end_time": {"type": "string", "format": "date-time"},
+                        "status": status,
+                    },
+                    "required": ["session_id", "task_id", "start_time", "end_time", "status"],
+                },
+            },
+            "conflicts": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "task_id": {"type": "string"},
+                        "conflict_with": {"type": "string", "format": "uuid"},
+                        "reason": {"type": "string"},
+                    },
+                    "required": ["task_id", "conflict_with", "reason"],
+                },
+            },
+            "exceptions": {"type": "array"},
+        },
+        "required": ["events", "conflicts", "exceptions"],
+    }
+
+
+SCHEDULE_SCHEMA = _schedule_schema(["scheduled", "conflict"])
+ADAPTED_SCHEDULE_SCHEMA = _schedule_schema()
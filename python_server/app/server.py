@@ -0,0 +1,225 @@
+"""
+Server launcher.
+
+    python -m app.server            # settings from the environment, see app.config
+    python -m app.server --production --workers 8
+
+Development mode runs uvicorn with the file-watching reloader and one worker,
+as before. Production mode:
+
+  1. Imports `app.main` once in the parent (SERVER_PRELOAD), warms up every
+     agent (or the AGENT_PRELOAD subset) and binds the listening socket.
+  2. Forks SERVER_WORKERS workers. Each one runs uvicorn on the shared socket
+     with uvloop and httptools, so modules, prompt templates and model weights
+     imported in step 1 are shared copy-on-write instead of loaded N times.
+  3. Restarts a worker that dies unexpectedly, backing off exponentially
+     while it keeps crashing soon after starting; after _MAX_QUICK_CRASHES
+     such crashes in a row the server shuts down instead.
+  4. On SIGTERM or SIGINT, forwards SIGTERM to the workers. Each one stops
+     accepting connections and waits up to SERVER_GRACEFUL_TIMEOUT_SECONDS
+     for in-flight requests. Its lifespan shutdown then gives the late LLM
+     calls still warming caches up to SERVER_GRACEFUL_TIMEOUT_SECONDS more
+     and closes the Ollama connections. Workers still running after both
+     stages (plus a grace period) are killed.
+
+Without SERVER_PRELOAD, or on platforms without fork(), production mode uses
+uvicorn's own multi-process supervisor, which imports the app in each worker.
+"""
+
+import argparse
+import math
+import os
+import signal
+import time
+from dataclasses import replace
+from typing import Dict, List, Optional, Tuple
+
+import uvicorn
+
+from app import log
+from app.config import SETTINGS, ServerSettings
+from app.log import logger
+
+APP = "app.main:app"
+# Slack on top of the two shutdown stages (requests, then late LLM calls)
+# before a worker that has not exited is killed.
+_KILL_GRACE_SECONDS = 5.0
+# Restart backoff: doubles per quick crash, up to the maximum. A worker that
+# ran for _STABLE_SECONDS resets it.
+_RESTART_DELAY_SECONDS = 1.0
+_MAX_RESTART_DELAY_SECONDS = 30.0
+_STABLE_SECONDS = 60.0
+_MAX_QUICK_CRASHES = 5
+
+
+def _uvicorn_options(settings: ServerSettings) -> Dict:
+    return {
+        "host": settings.host,
+        "port": settings.port,
+        "loop": settings.loop,
+        "http": settings.http,
+        "backlog": settings.backlog,
+        "timeout_keep_alive": settings.keepalive_seconds,
+        # uvicorn takes whole seconds; round up so 0.5 still drains in-flight requests.
+        "timeout_graceful_shutdown": math.ceil(settings.graceful_timeout_seconds),
+    }
+
+
+def _serve_worker(config: uvicorn.Config, sockets: List) -> None:
+    """Runs one forked worker until uvicorn exits, then leaves without running the parent's exit hooks."""
+    code = 0
+    try:
+        uvicorn.Server(config).run(sockets=sockets)
+    except BaseException as exc:
+        logger.error(f"Worker {os.getpid()} crashed: {exc!r}")
+        code = 1
+    finally:
+        log.stop()
+        os._exit(code)
+
+
+class _Supervisor:
+    """Forks workers on a shared socket, restarts crashed ones and stops them on a signal."""
+
+    def __init__(self, config: uvicorn.Config, workers: int, graceful_timeout_seconds: float):
+        self.config = config
+        self.workers = workers
+        self.stop_deadline: Optional[float] = None
+        # uvicorn's graceful shutdown (rounded up to whole seconds), then the
+        # lifespan's drain of late LLM calls, each up to the timeout.
+        self.kill_after = math.ceil(graceful_timeout_seconds) + graceful_timeout_seconds + _KILL_GRACE_SECONDS
+        self.children: Dict[int, Tuple[int, float]] = {}  # pid -> (worker slot, started at)
+        self.quick_crashes: Dict[int, int] = {}  # slot -> crashes in a row, each soon after starting
+        self.restarts: Dict[int, float] = {}  # slot -> when to respawn it
+        self.failed = False
+        self.sockets: List = []
+
+    def _spawn(self, slot: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            _serve_worker(self.config, self.sockets)
+        self.children[pid] = (slot, time.monotonic())
+
+    def _stop(self, signum, frame) -> None:
+        if self.stop_deadline is not None:
+            return
+        logger.info(f"Received {signal.Signals(signum).name}; draining {len(self.children)} worker(s).")
+        self._drain()
+
+    def _drain(self) -> None:
+        self.stop_deadline = time.monotonic() + self.kill_after
+        self.restarts.clear()
+        for pid in self.children:
+            # SIGTERM, even for Ctrl-C: workers in the terminal's process group
+            # already got SIGINT, and a second SIGINT would make uvicorn skip the drain.
+            _signal(pid, signal.SIGTERM)
+
+    def _reap(self, pid: int, status: int) -> None:
+        """Schedules the restart of a worker that exited while the server was running."""
+        slot, started = self.children.pop(pid)
+        if self.stop_deadline is not None:
+            return
+        crashes = self.quick_crashes.get(slot, 0) + 1 if time.monotonic() - started < _STABLE_SECONDS else 0
+        self.quick_crashes[slot] = crashes
+        code = os.waitstatus_to_exitcode(status)
+        if crashes >= _MAX_QUICK_CRASHES:
+            logger.error(
+                f"Worker {pid} exited with status {code} after {crashes} quick crashes in a row; stopping the server."
+            )
+            self.failed = True
+            self._drain()
+            return
+        delay = min(_RESTART_DELAY_SECONDS * 2 ** max(crashes - 1, 0), _MAX_RESTART_DELAY_SECONDS)
+        logger.error(f"Worker {pid} exited with status {code}; restarting it in {delay:.0f}s.")
+        self.restarts[slot] = time.monotonic() + delay
+
+    def run(self) -> bool:
+        """Serves until stopped. Returns False if the server stopped because workers kept crashing."""
+        self.sockets = [self.config.bind_socket()]
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for slot in range(self.workers):
+            self._spawn(slot)
+        logger.info(f"Started {self.workers} worker(s) on http://{self.config.host}:{self.config.port}")
+
+        while self.children or self.restarts:
+            pid, status = os.waitpid(-1, os.WNOHANG) if self.children else (0, 0)
+            if pid in self.children:
+                self._reap(pid, status)
+                continue
+            now = time.monotonic()
+            for slot, restart_at in list(self.restarts.items()):
+                if restart_at <= now:
+                    del self.restarts[slot]
+                    self._spawn(slot)
+            if self.stop_deadline is not None and now > self.stop_deadline:
+                logger.warning(f"Killing {len(self.children)} worker(s) that did not drain in time.")
+                for child in self.children:
+                    _signal(child, signal.SIGKILL)
+                self.stop_deadline = float("inf")
+            time.sleep(0.1)
+        logger.info("All workers stopped.")
+        return not self.failed
+
+
+def _signal(pid: int, signum: int) -> None:
+    try:
+        os.kill(pid, signum)
+    except ProcessLookupError:
+        pass
+
+
+def serve(settings: ServerSettings = SETTINGS) -> None:
+    """Runs the server in the configured mode. Blocks until it stops."""
+    resolved = settings.resolved()
+    for name, wanted, got in (("event loop", settings.loop, resolved.loop), ("HTTP parser", settings.http, resolved.http)):
+        if wanted != got:
+            logger.warning(f"{wanted} is not installed; using the {got} {name}.")
+
+    if resolved.mode == "development":
+        if resolved.workers:
+            logger.warning(f"SERVER_WORKERS={resolved.workers} is ignored in development mode; running one worker.")
+        logger.info(f"Starting development server on http://{resolved.host}:{resolved.port}")
+        uvicorn.run(APP, reload=True, **_uvicorn_options(resolved))
+        return
+
+    workers = resolved.worker_count
+    if not resolved.preload or not hasattr(os, "fork"):
+        logger.info(f"Starting {workers} worker(s) on http://{resolved.host}:{resolved.port} (no preload)")
+        uvicorn.run(APP, workers=workers, **_uvicorn_options(resolved))
+        return
+
+    from app import main as app_main  # preload: imported once, shared by every forked worker
+
+    app_main.warm_up(app_main.AGENT_PRELOAD or "all")  # lazy imports in a worker would not be shared
+    config = uvicorn.Config(app_main.app, lifespan="on", **_uvicorn_options(resolved))
+    if not _Supervisor(config, workers, resolved.graceful_timeout_seconds).run():
+        raise SystemExit(1)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run the Kira inference server.")
+    parser.add_argument("--production", action="store_true", help="Production mode (overrides SERVER_MODE).")
+    parser.add_argument("--workers", type=int, help="Worker processes (overrides SERVER_WORKERS).")
+    parser.add_argument("--host", help="Bind host (overrides HOST).")
+    parser.add_argument("--port", type=int, help="Bind port (overrides PORT).")
+    args = parser.parse_args(argv)
+
+    try:
+        settings = ServerSettings.from_env()  # strict, unlike SETTINGS
+        overrides = {"host": args.host, "port": args.port, "workers": args.workers}
+        if args.production:
+            overrides["mode"] = "production"
+        settings = replace(settings, **{k: v for k, v in overrides.items() if v is not None})
+        settings.validate()
+    except ValueError as e:
+        parser.error(str(e))
+    if args.workers is not None and settings.mode == "development":
+        parser.error("--workers needs production mode (--production or SERVER_MODE=production).")
+    serve(settings)
+
+
+if __name__ == "__main__":
+    main()
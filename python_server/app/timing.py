@@ -0,0 +1,59 @@
+"""
+Per-request timing spans.
+
+Agents wrap their expensive steps in `span("<agent>.<step>")` (for example
+`decompose.llm`, `schedule.conflicts`). A span is recorded only while a trace
+is active: the API starts one per agent call with `start_trace()`, so agents
+called from benchmarks or scripts pay one context-variable lookup per span.
+
+The trace lives in a context variable, so spans recorded in tasks spawned by
+the agent (the hedged LLM call) land in the caller's trace. A span that ends
+after the response was built (a late LLM answer warming a cache) is not
+reported.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+Spans = List[Tuple[str, float]]  # (name, duration in ms)
+
+_trace: ContextVar[Optional[Spans]] = ContextVar("timing_spans", default=None)
+
+
+def start_trace() -> Spans:
+    """Starts collecting spans in the current context and returns the list they are appended to."""
+    spans: Spans = []
+    _trace.set(spans)
+    return spans
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Times the enclosed block as `name` if a trace is active."""
+    spans = _trace.get()
+    if spans is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        spans.append((name, (time.perf_counter() - started) * 1000))
+
+
+def summarize(spans: Spans) -> List[Dict[str, Any]]:
+    """Spans merged by name (durations summed), in the order they first ended."""
+    totals: Dict[str, float] = {}
+    for name, duration_ms in list(spans):
+        totals[name] = totals.get(name, 0.0) + duration_ms
+    return [{"name": name, "duration_ms": round(duration_ms, 3)} for name, duration_ms in totals.items()]
+
+
+def server_timing(spans: Spans, total_ms: Optional[float] = None) -> str:
+    """A `Server-Timing` header value, e.g. `parse.llm;dur=812.4, total;dur=815.0`."""
+    entries = [f"{s['name']};dur={s['duration_ms']:.3f}" for s in summarize(spans)]
+    if total_ms is not None:
+        entries.append(f"total;dur={total_ms:.3f}")
+    return ", ".join(entries)
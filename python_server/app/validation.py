@@ -0,0 +1,114 @@
+"""
+Shared, precompiled output validation for all agents.
+
+Each agent's schema is checked and compiled into a validator once, when this
+module is imported at startup, instead of on every `jsonschema.validate` call.
+
+`SCHEMA_VALIDATION_MODE` selects how much work is done per response:
+  * full    - validate every payload (default).
+  * sampled - validate 1 in `SCHEMA_VALIDATION_SAMPLE_RATE` trusted payloads.
+  * trusted - skip trusted payloads entirely.
+
+"Trusted" payloads are the ones the server builds itself (the scheduler's
+event list, the rule-based fallbacks). Payloads derived from the LLM or from
+client input are validated in every mode.
+"""
+
+import itertools
+import os
+from typing import Any, Dict
+
+from jsonschema import ValidationError
+from jsonschema.exceptions import best_match
+from jsonschema.validators import validator_for
+
+from app.metrics import VALIDATIONS
+from app.schemas import ADAPTED_SCHEDULE_SCHEMA, GOAL_SCHEMA, SCHEDULE_SCHEMA, TASK_LIST_SCHEMA
+
+MODES = ("full", "sampled", "trusted")
+
+AGENT_SCHEMAS: Dict[str, Dict[str, Any]] = {
+    "GoalParserAgent": GOAL_SCHEMA,
+    "TaskDecomposerAgent": TASK_LIST_SCHEMA,
+    "SchedulerAgent": SCHEDULE_SCHEMA,
+    "AdaptationAgent": ADAPTED_SCHEDULE_SCHEMA,
+}
+
+
+def _compile(schema: Dict[str, Any]):
+    cls = validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema)
+
+
+_VALIDATORS = {name: _compile(schema) for name, schema in AGENT_SCHEMAS.items()}
+_COUNTERS = {name: itertools.count() for name in AGENT_SCHEMAS}
+_STATS = {name: {"validated": 0, "skipped": 0, "failed": 0} for name in AGENT_SCHEMAS}
+
+_mode = "full"
+_sample_rate = 10
+
+
+def configure(mode: str, sample_rate: int = 10) -> None:
+    """Sets the validation mode and the 1-in-N sample rate for `sampled` mode."""
+    global _mode, _sample_rate
+    if mode not in MODES:
+        raise ValueError(f"Unknown schema validation mode '{mode}'; expected one of {', '.join(MODES)}.")
+    if sample_rate < 1:
+        raise ValueError("Schema validation sample rate must be at least 1.")
+    _mode = mode
+    _sample_rate = sample_rate
+
+
+def mode() -> str:
+    return _mode
+
+
+def _should_validate(agent_name: str, trusted: bool) -> bool:
+    if not trusted or _mode == "full":
+        return True
+    if _mode == "trusted":
+        return False
+    return next(_COUNTERS[agent_name]) % _sample_rate == 0
+
+
+def validate_output(agent_name: str, instance: Any, trusted: bool = False) -> None:
+    """
+    Validates an agent's output against its precompiled schema.
+
+    Args:
+        agent_name: Key into `AGENT_SCHEMAS`.
+        instance: The payload to check.
+        trusted: True for payloads the server built itself; these may be
+                 sampled or skipped depending on the configured mode.
+
+    Raises:
+        ValidationError: The same error `jsonschema.validate` would raise.
+    """
+    stats = _STATS[agent_name]
+    if not _should_validate(agent_name, trusted):
+        stats["skipped"] += 1
+        VALIDATIONS.labels(agent_name, "skipped").inc()
+        return
+
+    validator = _VALIDATORS[agent_name]
+    stats["validated"] += 1
+    if validator.is_valid(instance):
+        VALIDATIONS.labels(agent_name, "passed").inc()
+        return
+    stats["failed"] += 1
+    VALIDATIONS.labels(agent_name, "failed").inc()
+    error = best_match(validator.iter_errors(instance))
+    if error is not None:
+        raise error
+
+
+def stats() -> Dict[str, Any]:
+    """Per-agent counts of validated, skipped and failed payloads."""
+    return {"mode": _mode, "sample_rate": _sample_rate, "agents": {k: dict(v) for k, v in _STATS.items()}}
+
+
+configure(
+    os.environ.get("SCHEMA_VALIDATION_MODE", "full").lower(),
+    int(os.environ.get("SCHEMA_VALIDATION_SAMPLE_RATE", 10)),
+)
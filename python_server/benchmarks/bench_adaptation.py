@@ -0,0 +1,115 @@
+"""
+Benchmark: per-adaptation conflict maintenance as the schedule grows.
+
+Compares, for one "postpone" adaptation on schedules of increasing size:
+  * pairwise  - the old full recompute (isoparse everything + O(n^2) scan)
+  * sweep     - full recompute with the sweep line (`_recompute_conflicts`)
+  * cold      - the whole adapt() call on a schedule this process never
+                returned: full recompute and full validation
+  * warm      - the whole adapt() call on the schedule the previous call
+                returned, resuming from the stored conflict state
+
+Run from python_server/:
+    python -m benchmarks.bench_adaptation
+"""
+
+import asyncio
+import copy
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pytz
+from dateutil.parser import isoparse
+
+from app.agents.adaptation import _recompute_conflicts, adapt
+from app.scheduling.conflicts import naive_overlapping_pairs
+
+SIZES = [250, 500, 1000, 2000, 5000, 10000]
+PAIRWISE_LIMIT = 2000  # the O(n^2) scan takes minutes beyond this
+
+
+def _build_schedule(size: int) -> dict:
+    """Hourly-ish events with occasional overlaps, already conflict-annotated."""
+    tz = pytz.timezone("America/Mexico_City")
+    base = tz.localize(datetime(2025, 1, 6, 6, 0))
+    events = []
+    for n in range(size):
+        start = base + timedelta(minutes=70 * n)
+        minutes = 90 if n % 10 == 0 else 45
+        events.append({
+            "session_id": str(uuid.uuid4()),
+            "task_id": f"task_{n % 25}",
+            "start_time": start.isoformat(),
+            "end_time": (start + timedelta(minutes=minutes)).isoformat(),
+            "status": "scheduled",
+        })
+    sched = {"events": events, "conflicts": [], "exceptions": []}
+    _recompute_conflicts(sched)
+    return sched
+
+
+def _pairwise_recompute(sched: dict) -> None:
+    """The pre-index implementation, reproduced for comparison."""
+    events = sched["events"]
+    active = [e for e in events if e["status"] != "skipped"]
+    intervals = [(isoparse(e["start_time"]), isoparse(e["end_time"])) for e in active]
+    naive_overlapping_pairs(intervals)
+
+
+def _request(sched: dict, pos: int, minutes: int) -> dict:
+    return {
+        "action": "change_duration",
+        "session_id": sched["events"][pos]["session_id"],
+        "new_estimated_minutes": minutes,
+    }
+
+
+def _time(func, repeat=5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main():
+    print(f"{'events':>7} {'pairwise ms':>12} {'sweep ms':>9} {'cold adapt ms':>14} {'warm adapt ms':>14}")
+    for size in SIZES:
+        base = _build_schedule(size)
+        pos = size // 2
+
+        pairwise = "-"
+        if size <= PAIRWISE_LIMIT:
+            pairwise = f"{_time(lambda: _pairwise_recompute(base), repeat=1):.2f}"
+
+        sweep_sched = copy.deepcopy(base)
+        sweep = _time(lambda: _recompute_conflicts(sweep_sched))
+
+        # Cold: a schedule this process never returned, so adapt() rebuilds the
+        # conflict state and validates everything.
+        cold_ms = float("inf")
+        for _ in range(5):
+            payload = {"schedule": copy.deepcopy(base), "adaptation_request": _request(base, pos, 45)}
+            cold_ms = min(cold_ms, _time(lambda: asyncio.run(adapt(payload)), repeat=1))
+
+        # Warm: each call gets the schedule the previous call returned, like a
+        # client applying a series of edits.
+        current = [asyncio.run(adapt({"schedule": copy.deepcopy(base), "adaptation_request": _request(base, pos, 45)}))]
+        step = [0]
+
+        def run_warm():
+            minutes = 30 + 15 * (step[0] % 3)
+            step[0] += 1
+            current[0] = asyncio.run(adapt({
+                "schedule": current[0],
+                "adaptation_request": _request(current[0], pos + step[0] % 3, minutes),
+            }))
+
+        warm_ms = _time(run_warm, repeat=20)
+        print(f"{size:>7} {pairwise:>12} {sweep:>9.2f} {cold_ms:>14.2f} {warm_ms:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark: sweep-line conflict detection vs. the old pairwise loop.
+
+Builds a schedule of N daily tasks over the scheduler's 30-day horizon and
+times both detectors on the same intervals.
+
+Run from python_server/:
+    python -m benchmarks.bench_conflicts
+"""
+
+import time
+from datetime import datetime, timedelta
+
+import pytz
+
+from app.scheduling.conflicts import naive_overlapping_pairs, overlapping_pairs
+
+HORIZON_DAYS = 30
+TASK_COUNTS = [5, 10, 25, 50, 100]
+
+
+def _build_intervals(task_count: int):
+    """One event per task per day, staggered so some of them overlap."""
+    tz = pytz.timezone("America/Mexico_City")
+    today = tz.localize(datetime(2025, 1, 6))
+    intervals = []
+    for task in range(task_count):
+        for day in range(HORIZON_DAYS):
+            start = today + timedelta(days=day, hours=6 + (task % 12), minutes=(task * 7) % 60)
+            intervals.append((start, start + timedelta(minutes=30 + 15 * (task % 4))))
+    return intervals
+
+
+def _best_of(func, intervals, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func(intervals)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    print(f"{'tasks':>6} {'events':>7} {'pairs':>8} {'pairwise ms':>12} {'sweep ms':>9} {'speedup':>8}")
+    for task_count in TASK_COUNTS:
+        intervals = _build_intervals(task_count)
+        naive_s, naive_pairs = _best_of(naive_overlapping_pairs, intervals)
+        sweep_s, sweep_pairs = _best_of(overlapping_pairs, intervals)
+        assert naive_pairs == sweep_pairs, "sweep line disagrees with pairwise scan"
+        print(
+            f"{task_count:>6} {len(intervals):>7} {len(sweep_pairs):>8} "
+            f"{naive_s * 1000:>12.2f} {sweep_s * 1000:>9.2f} {naive_s / sweep_s:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark: vectorized datetime64 expansion vs. per-occurrence dateutil expansion.
+
+For N tasks with the rules our decomposers produce, times building the event
+list (ISO strings included) plus conflict detection:
+  * dateutil - rrulestr(...).between(...) per task, datetimes, heap sweep
+  * numpy    - expand_tasks + format_iso + overlapping_pairs_array
+
+Run from python_server/:
+    python -m benchmarks.bench_expansion
+"""
+
+import time
+from datetime import datetime, timedelta
+
+import pytz
+from dateutil.rrule import rrulestr
+
+from app.scheduling.conflicts import overlapping_pairs, overlapping_pairs_array
+from app.scheduling.vectorized import expand_tasks, format_iso
+
+RULES = [
+    "RRULE:FREQ=DAILY",
+    "RRULE:FREQ=WEEKLY;BYDAY=MO,WE,FR",
+    "RRULE:FREQ=WEEKLY;BYDAY=TU,TH",
+    "RRULE:FREQ=WEEKLY;BYDAY=SA,SU",
+]
+CASES = [(10, 30), (50, 30), (50, 180), (200, 366)]
+
+
+def _tasks(count):
+    return [
+        {"task_id": f"task_{n}", "recurrence_rule": RULES[n % len(RULES)], "estimated_minutes": 15 + (n % 5) * 5}
+        for n in range(count)
+    ]
+
+
+def _dateutil_path(tasks, dtstart, today, until):
+    events, intervals = [], []
+    for task in tasks:
+        duration = timedelta(minutes=task["estimated_minutes"])
+        for start in rrulestr(task["recurrence_rule"], dtstart=dtstart).between(today, until, inc=True):
+            end = start + duration
+            intervals.append((start, end))
+            events.append((task["task_id"], start.isoformat(), end.isoformat()))
+    return events, overlapping_pairs(intervals)
+
+
+def _numpy_path(tasks, dtstart, today, until):
+    task_index, starts, ends = expand_tasks(tasks, dtstart, today, until)
+    events = [
+        (tasks[idx]["task_id"], start, end)
+        for idx, start, end in zip(task_index, format_iso(starts, dtstart), format_iso(ends, dtstart))
+    ]
+    return events, overlapping_pairs_array(starts, ends)
+
+
+def _best_of(func, *args, repeat=3):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000, result
+
+
+def main():
+    today = pytz.timezone("America/Mexico_City").localize(datetime(2025, 1, 6))
+    dtstart = today.replace(hour=9)
+    print(f"{'tasks':>6} {'days':>5} {'events':>7} {'pairs':>8} {'dateutil ms':>12} {'numpy ms':>9} {'speedup':>8}")
+    for count, days in CASES:
+        tasks = _tasks(count)
+        until = today + timedelta(days=days)
+        slow_ms, slow = _best_of(_dateutil_path, tasks, dtstart, today, until)
+        fast_ms, fast = _best_of(_numpy_path, tasks, dtstart, today, until)
+        assert slow == fast, "vectorized expansion disagrees with dateutil"
+        print(
+            f"{count:>6} {days:>5} {len(fast[0]):>7} {len(fast[1]):>8} "
+            f"{slow_ms:>12.1f} {fast_ms:>9.1f} {slow_ms / fast_ms:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark: rule-based goal extraction throughput and coverage.
+
+Compares, on a set of typical goal inputs:
+  * legacy - the previous `_fallback_parser`: one regex per weekday, a
+             relative-date regex, then dateutil fuzzy parsing of the whole text
+  * rules  - app.agents.goal_rules.extract, one precompiled scan
+
+and, for each, how many inputs got a goal type other than "other", a
+deadline, available days and time windows, and (rules only) how many are
+simple enough for GOAL_PARSER_RULES_FIRST to skip the LLM.
+
+Run from python_server/:
+    python -m benchmarks.bench_goal_rules
+"""
+
+import re
+import time
+from datetime import date, datetime
+
+from dateutil.parser import parse as parse_date
+from dateutil.relativedelta import relativedelta
+
+from app.agents import goal_rules
+
+GOALS = [
+    "I want to run a 10k in 3 months. I can train on Mondays, Wednesdays, and Saturdays in the evenings.",
+    "Help me learn Python. I have no deadline, just want to start. I can study on weekends.",
+    "I need to build a portfolio website by the end of August. I want an encouraging tone from you.",
+    "I want to run a 5k in 2 months, training on Tuesdays and Thursdays.",
+    "I need to finish my website project by October 1st.",
+    "Let's learn to play piano.",
+    "I want to be able to do 20 pushups in a row in 2 months.",
+    "My goal is to run a half-marathon by the end of the year.",
+    "I will go to the gym on Monday, Wednesday, and Friday mornings.",
+    "My objective is to become conversational in Spanish in one year.",
+    "I will practice drawing for 30 minutes every day.",
+    "I need to build a new PC for gaming by Christmas.",
+    "I'm going to write a short story this month.",
+    "Plan and execute a small garden project in the backyard.",
+    "I want to be more mindful and meditate daily.",
+    "Swim Monday to Friday at 6am before work until March 3rd 2026.",
+    "Write my thesis by 12/24 on weeknights.",
+    "I'd like to learn the cello on weekends after work.",
+    "I want to lose 10 pounds in three months.",
+    "Get my AWS certification by next month, studying at lunchtime.",
+]
+ROUNDS = 200
+
+
+def _legacy_fallback_parser(text):
+    """The previous goal_parser._fallback_parser, verbatim."""
+    deadline = None
+    days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+    days_available = [day for day in days if re.search(r'\b' + day + r's?\b', text, re.IGNORECASE)]
+
+    match = re.search(r'in (\d+) (weeks?|months?|days?)', text, re.IGNORECASE)
+    if match:
+        num, unit = match.groups()
+        delta_args = {unit.rstrip('s') + 's': int(num)}
+        deadline = (datetime.now() + relativedelta(**delta_args)).strftime('%Y-%m-%d')
+    else:
+        try:
+            parsed = parse_date(text, fuzzy=True)
+            if parsed.year != datetime.now().year or parsed.month != datetime.now().month or parsed.day != datetime.now().day:
+                deadline = parsed.strftime('%Y-%m-%d')
+        except (ValueError, TypeError):
+            pass
+
+    return {
+        "type": "other",
+        "description": text,
+        "deadline": deadline,
+        "constraints": {"days_available": days_available, "time_windows": []},
+        "preferences": {},
+    }
+
+
+def _rules(text):
+    return goal_rules.extract(text, date.today()).goal
+
+
+def _throughput(func):
+    t0 = time.perf_counter()
+    for _ in range(ROUNDS):
+        for text in GOALS:
+            func(text)
+    elapsed = time.perf_counter() - t0
+    return ROUNDS * len(GOALS) / elapsed, elapsed * 1e6 / (ROUNDS * len(GOALS))
+
+
+def _coverage(func):
+    goals = [func(text) for text in GOALS]
+    return (
+        sum(g["type"] != "other" for g in goals),
+        sum(g["deadline"] is not None for g in goals),
+        sum(bool(g["constraints"]["days_available"]) for g in goals),
+        sum(bool(g["constraints"]["time_windows"]) for g in goals),
+    )
+
+
+def main():
+    print(f"{len(GOALS)} goals x {ROUNDS} rounds\n")
+    print(f"{'parser':<8} {'goals/s':>9} {'us/goal':>8} {'typed':>6} {'deadline':>9} {'days':>5} {'windows':>8}")
+    results = {}
+    for name, func in (("legacy", _legacy_fallback_parser), ("rules", _rules)):
+        per_second, micros = _throughput(func)
+        results[name] = per_second
+        typed, deadlines, days, windows = _coverage(func)
+        print(f"{name:<8} {per_second:>9.0f} {micros:>8.1f} {typed:>6} {deadlines:>9} {days:>5} {windows:>8}")
+    confident = sum(goal_rules.extract(text, date.today()).confident for text in GOALS)
+    print(f"\nspeedup: {results['rules'] / results['legacy']:.1f}x")
+    print(f"simple enough to skip the LLM (GOAL_PARSER_RULES_FIRST): {confident}/{len(GOALS)}")
+
+
+if __name__ == "__main__":
+    main()
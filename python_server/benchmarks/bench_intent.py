@@ -0,0 +1,162 @@
+"""
+Benchmark: confidence-tiered intent classification on a labelled set.
+
+Compares accuracy and per-request latency of:
+  * heuristics - the scored regex/keyword tier alone
+  * model      - the local n-gram model alone, one input per call and batched
+  * llm        - thresholds above 1, every input goes to Gemma (the old behaviour)
+  * tiered     - heuristics then LLM, without the model tier
+  * tiered     - the configured INTENT_CONFIDENCE_THRESHOLD and INTENT_MODEL_THRESHOLD
+
+and sweeps the threshold to show how many inputs the heuristic tier would
+answer on its own and how accurate those answers are.
+
+The LLM cache is bypassed so every LLM-tier request really reaches Ollama.
+If Ollama is not running, the "llm" tier count stays at 0 and those rows
+measure the failed call plus the fallback.
+
+Run from python_server/:
+    python -m benchmarks.bench_intent
+"""
+
+import asyncio
+import statistics
+import time
+
+from app.agents import intent_classifier
+from app.llm.cache import LLMCache
+
+LABELLED = [
+    ("I want to run a 5k by the end of spring.", "new_goal"),
+    ("My goal is to lose 10 pounds in three months.", "new_goal"),
+    ("I'd like to learn to play the piano.", "new_goal"),
+    ("I plan to write a novel this year.", "new_goal"),
+    ("Help me get better at chess.", "new_goal"),
+    ("I will meditate for ten minutes every day.", "new_goal"),
+    ("I'm going to build a mobile app by December.", "new_goal"),
+    ("I want to save money for a trip to Japan.", "new_goal"),
+    ("I need to finish my thesis in 6 weeks.", "new_goal"),
+    ("I hope to become fluent in French.", "new_goal"),
+    ("Learning to swim this summer.", "new_goal"),
+    ("I want to practice yoga three times a week.", "new_goal"),
+    ("Train for a triathlon.", "new_goal"),
+    ("I'd love to start drawing again.", "new_goal"),
+    ("Can we skip today's workout? I'm sick.", "adaptation_request"),
+    ("Please postpone my study session to tomorrow.", "adaptation_request"),
+    ("Reschedule my run to Saturday morning.", "adaptation_request"),
+    ("Move tonight's practice to Thursday.", "adaptation_request"),
+    ("Can you push back the deadline by a week?", "adaptation_request"),
+    ("Cancel tomorrow's session.", "adaptation_request"),
+    ("I can't make it to the gym today.", "adaptation_request"),
+    ("Let's shorten my workouts to 20 minutes.", "adaptation_request"),
+    ("Swap Monday's session with Wednesday's.", "adaptation_request"),
+    ("I need to delay my piano lessons for a month.", "adaptation_request"),
+    ("Change my study time to the evening.", "adaptation_request"),
+    ("I'm too tired for today's run.", "adaptation_request"),
+    ("Hi there!", "general_chat"),
+    ("Thanks, that was helpful.", "general_chat"),
+    ("What's the date today?", "general_chat"),
+    ("Tell me a joke.", "general_chat"),
+    ("Who made you?", "general_chat"),
+    ("Good morning!", "general_chat"),
+    ("How does this app work?", "general_chat"),
+    ("What can you do?", "general_chat"),
+    ("Hello, how are you?", "general_chat"),
+    ("Nice.", "general_chat"),
+    ("Do you like music?", "general_chat"),
+    ("Ok cool", "general_chat"),
+]
+THRESHOLDS = [0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9]
+
+
+async def _warm_up():
+    """Pays the one-off client import and connection cost outside the timed runs."""
+    try:
+        await intent_classifier._llm_intent("warm up")
+    except Exception:
+        pass
+
+
+async def _run(threshold, model_threshold):
+    intent_classifier.CONFIDENCE_THRESHOLD = threshold
+    intent_classifier.MODEL_THRESHOLD = model_threshold
+    before = intent_classifier.stats()["counts"]
+    latencies, correct = [], 0
+    for text, expected in LABELLED:
+        t0 = time.perf_counter()
+        result = await intent_classifier.classify(text)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        correct += result["intent"] == expected
+    after = intent_classifier.stats()["counts"]
+    tiers = {tier: after[tier] - before[tier] for tier in after}
+    return correct / len(LABELLED), latencies, tiers
+
+
+def _heuristics():
+    latencies, correct = [], 0
+    for text, expected in LABELLED:
+        t0 = time.perf_counter()
+        intent, _ = intent_classifier.heuristic_intent(text)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        correct += intent == expected
+    return correct / len(LABELLED), latencies
+
+
+def _model():
+    model = intent_classifier._INTENT_MODEL
+    latencies, correct = [], 0
+    for text, expected in LABELLED:
+        t0 = time.perf_counter()
+        [(intent, _)] = model.predict([text])
+        latencies.append((time.perf_counter() - t0) * 1000)
+        correct += intent == expected
+    return correct / len(LABELLED), latencies
+
+
+def _model_batched(repeat=20):
+    """Whole set in one `predict` call; latency is per input."""
+    model = intent_classifier._INTENT_MODEL
+    texts = [text for text, _ in LABELLED]
+    latencies = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        predictions = model.predict(texts)
+        latencies.append((time.perf_counter() - t0) * 1000 / len(texts))
+    correct = sum(intent == expected for (intent, _), (_, expected) in zip(predictions, LABELLED))
+    return correct / len(LABELLED), latencies
+
+
+def _row(name, accuracy, latencies, tiers=None):
+    p95 = sorted(latencies)[int(len(latencies) * 0.95) - 1]
+    tier_text = " ".join(f"{k}={v}" for k, v in tiers.items()) if tiers else "-"
+    print(f"{name:<16} {accuracy:>8.1%} {statistics.mean(latencies):>9.3f} {p95:>9.3f}  {tier_text}")
+
+
+def main():
+    default_threshold = intent_classifier.CONFIDENCE_THRESHOLD
+    default_model_threshold = intent_classifier.MODEL_THRESHOLD
+    intent_classifier.LLM_CACHE = LLMCache(maxsize=1, ttl_seconds=0, path=None)
+    asyncio.run(_warm_up())
+
+    print(f"{len(LABELLED)} labelled inputs\n")
+    print(f"{'mode':<16} {'accuracy':>8} {'mean ms':>9} {'p95 ms':>9}  tiers")
+    _row("heuristics", *_heuristics())
+    if intent_classifier._INTENT_MODEL is not None:
+        _row("model", *_model())
+        _row("model, batched", *_model_batched())
+    _row("llm", *asyncio.run(_run(1.01, 1.01)))
+    _row("tiered, no model", *asyncio.run(_run(default_threshold, 1.01)))
+    _row("tiered", *asyncio.run(_run(default_threshold, default_model_threshold)))
+    intent_classifier.CONFIDENCE_THRESHOLD = default_threshold
+    intent_classifier.MODEL_THRESHOLD = default_model_threshold
+
+    print(f"\n{'threshold':>9} {'answered':>9} {'accuracy of answered':>21}")
+    guesses = [(intent_classifier.heuristic_intent(text), expected) for text, expected in LABELLED]
+    for threshold in THRESHOLDS:
+        answered = [intent == expected for (intent, confidence), expected in guesses if confidence >= threshold]
+        accuracy = sum(answered) / len(answered) if answered else 0.0
+        print(f"{threshold:>9.1f} {len(answered) / len(LABELLED):>9.1%} {accuracy:>21.1%}")
+
+
+if __name__ == "__main__":
+    main()
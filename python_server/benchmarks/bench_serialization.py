@@ -0,0 +1,85 @@
+"""
+Benchmark: /invoke_agent response serialization on large schedules.
+
+Compares, per SchedulerAgent response:
+  * pydantic + json - what /invoke_agent used to do: validate an
+                      AgentSuccessResponse, let FastAPI revalidate and dump it
+                      against the response model, then JSONResponse (json.dumps)
+  * orjson          - the current path: AgentSuccessResponse.model_construct,
+                      main._envelope, ORJSONResponse
+
+and checks that both produce the same JSON document.
+
+Run from python_server/:
+    python -m benchmarks.bench_serialization
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.main import AgentSuccessResponse, _envelope
+
+SIZES = [1000, 10000]
+CALLS = 20
+
+_RESPONSE_FIELD = create_model_field("Response_invoke_agent", AgentSuccessResponse, mode="serialization")
+
+
+def _schedule(size):
+    base = datetime(2025, 1, 6, 9, 0)
+    events = [
+        {
+            "session_id": str(uuid.uuid4()),
+            "task_id": f"task_{n % 20}",
+            "start_time": (base + timedelta(hours=n)).isoformat() + "-06:00",
+            "end_time": (base + timedelta(hours=n, minutes=45)).isoformat() + "-06:00",
+            "status": "scheduled",
+        }
+        for n in range(size)
+    ]
+    return {"events": events, "conflicts": [], "exceptions": []}
+
+
+async def _legacy(schedule):
+    envelope = AgentSuccessResponse(agent_name="SchedulerAgent", output_data=schedule, source=None)
+    content = await serialize_response(field=_RESPONSE_FIELD, response_content=envelope)
+    return JSONResponse(content=content).body
+
+
+async def _fast(schedule):
+    envelope = AgentSuccessResponse.model_construct(agent_name="SchedulerAgent", output_data=schedule, source=None)
+    return ORJSONResponse(content=_envelope(envelope)).body
+
+
+async def _per_call_ms(func, schedule):
+    t0 = time.perf_counter()
+    for _ in range(CALLS):
+        await func(schedule)
+    return (time.perf_counter() - t0) * 1000 / CALLS
+
+
+async def _main():
+    print(f"{'events':>7} {'pydantic+json ms':>17} {'orjson ms':>10} {'speedup':>8} {'KiB':>6}")
+    for size in SIZES:
+        schedule = _schedule(size)
+        legacy_body, fast_body = await _legacy(schedule), await _fast(schedule)
+        assert json.loads(legacy_body) == json.loads(fast_body)
+
+        legacy = await _per_call_ms(_legacy, schedule)
+        fast = await _per_call_ms(_fast, schedule)
+        print(f"{size:>7} {legacy:>17.2f} {fast:>10.2f} {legacy / fast:>7.1f}x {len(fast_body) / 1024:>6.0f}")
+
+
+def main():
+    asyncio.run(_main())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark: cold-start import time, overall and per agent.
+
+Every measurement runs in a fresh interpreter, so nothing is already imported:
+  * app.main       - importing the app; agents stay lazy
+  * + <agent>      - then loading one agent through the AGENTS registry, which
+                     is the extra latency of that agent's first request
+  * + all (eager)  - AGENT_PRELOAD=all: every agent warmed up at startup,
+                     which is what every worker paid before the registry
+
+Reports the median of ROUNDS runs.
+
+Run from python_server/:
+    python -m benchmarks.bench_startup
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROUNDS = 5
+ROOT = Path(__file__).resolve().parent.parent
+
+_CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import app.main as main
+imported = time.perf_counter()
+agents = main.AGENTS.warm_up(None if sys.argv[1:] == ["all"] else sys.argv[1:])
+print(json.dumps({
+    "main_ms": (imported - started) * 1000,
+    "agents_ms": (time.perf_counter() - imported) * 1000,
+    "per_agent_ms": agents,
+}))
+"""
+
+
+def _run(args):
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD, *args], cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def _median(args):
+    runs = [_run(args) for _ in range(ROUNDS)]
+    per_agent = {name: statistics.median(r["per_agent_ms"][name] for r in runs) for name in runs[0]["per_agent_ms"]}
+    return statistics.median(r["main_ms"] for r in runs), statistics.median(r["agents_ms"] for r in runs), per_agent
+
+
+def main():
+    from app.main import AGENTS
+
+    print(f"median of {ROUNDS} fresh interpreters\n")
+    print(f"{'':<24} {'app.main ms':>12} {'agents ms':>10} {'total ms':>9}")
+    main_ms, _, _ = _median([])
+    print(f"{'app.main (lazy)':<24} {main_ms:>12.0f} {0:>10.0f} {main_ms:>9.0f}")
+    for name in AGENTS:
+        main_ms, agents_ms, _ = _median([name])
+        print(f"{'+ ' + name:<24} {main_ms:>12.0f} {agents_ms:>10.0f} {main_ms + agents_ms:>9.0f}")
+    main_ms, agents_ms, per_agent = _median(["all"])
+    print(f"{'+ all (eager)':<24} {main_ms:>12.0f} {agents_ms:>10.0f} {main_ms + agents_ms:>9.0f}")
+    print("\neager warm-up order (later agents reuse shared imports):")
+    for name, ms in per_agent.items():
+        print(f"  {name:<22} {ms:>6.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
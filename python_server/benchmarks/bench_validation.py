@@ -0,0 +1,66 @@
+"""
+Benchmark: output validation cost on large schedules.
+
+Compares, per response:
+  * jsonschema.validate - what every agent used to call (rebuilds the validator)
+  * full                - the precompiled validator
+  * sampled (1 in 10)   - amortized over 10 trusted responses
+  * trusted             - internally built payload, validation skipped
+
+Run from python_server/:
+    python -m benchmarks.bench_validation
+"""
+
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from jsonschema import validate
+
+from app import validation
+from app.schemas import SCHEDULE_SCHEMA
+
+SIZES = [1000, 10000]
+SAMPLE_RATE = 10
+
+
+def _schedule(size):
+    base = datetime(2025, 1, 6, 9, 0)
+    events = [
+        {
+            "session_id": str(uuid.uuid4()),
+            "task_id": f"task_{n % 20}",
+            "start_time": (base + timedelta(hours=n)).isoformat() + "-06:00",
+            "end_time": (base + timedelta(hours=n, minutes=45)).isoformat() + "-06:00",
+            "status": "scheduled",
+        }
+        for n in range(size)
+    ]
+    return {"events": events, "conflicts": [], "exceptions": []}
+
+
+def _per_call_ms(func, calls):
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - t0) * 1000 / calls
+
+
+def main():
+    print(f"{'events':>7} {'jsonschema ms':>14} {'full ms':>8} {'sampled ms':>11} {'trusted ms':>11}")
+    for size in SIZES:
+        payload = _schedule(size)
+        legacy = _per_call_ms(lambda: validate(instance=payload, schema=SCHEDULE_SCHEMA), 5)
+
+        results = []
+        for mode in ("full", "sampled", "trusted"):
+            validation.configure(mode, SAMPLE_RATE)
+            results.append(_per_call_ms(
+                lambda: validation.validate_output("SchedulerAgent", payload, trusted=True), SAMPLE_RATE * 2
+            ))
+        print(f"{size:>7} {legacy:>14.2f} {results[0]:>8.2f} {results[1]:>11.2f} {results[2]:>11.4f}")
+    validation.configure("full")
+
+
+if __name__ == "__main__":
+    main()
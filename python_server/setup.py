@@ -4,4 +4,5 @@ setup(
     name="kira-python-server",
     version="0.1.0",
     packages=find_packages(),
+    package_data={"app.agents": ["data/*.tsv", "data/*.npz"]},
 )
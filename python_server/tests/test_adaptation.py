@@ -1,14 +1,17 @@
 import pytest
 import os
 import asyncio
+import copy
+import random
 import uuid
 from datetime import datetime, timedelta
 
 import pytz
+from dateutil.parser import isoparse
 from jsonschema import validate, ValidationError
 
 from app.agents.scheduler import schedule
-from app.agents.adaptation import adapt, SCHEDULE_SCHEMA
+from app.agents.adaptation import adapt, _recompute_conflicts, SCHEDULE_SCHEMA
 
 # --- Test Configuration ---
 ADAPT_DISABLED = os.getenv("ADAPT_DISABLED", "false").lower() == "true"
@@ -93,3 +96,161 @@ async def test_adaptation_agent_skip_action(sample_tasks):
         validate(instance=adapted_schedule, schema=SCHEDULE_SCHEMA)
     except ValidationError as e:
         pytest.fail(f"Adapted schedule failed schema validation: {e.message}")
+
+@pytest.mark.xfail(ADAPT_DISABLED, reason="Adaptation tests are disabled via environment variable.")
+@pytest.mark.asyncio
+async def test_incremental_conflicts_match_full_recompute():
+    """
+    Runs a random sequence of adaptations and checks after each one that the
+    incrementally maintained conflicts equal a from-scratch recompute.
+    """
+    rng = random.Random(7)
+    tasks = {
+        "tasks": [
+            {
+                "task_id": f"task_{n}",
+                "description": f"Task {n}",
+                "recurrence_rule": rrule,
+                "estimated_minutes": minutes,
+                "dependencies": [],
+            }
+            for n, (rrule, minutes) in enumerate([
+                ("RRULE:FREQ=DAILY", 60),
+                ("RRULE:FREQ=WEEKLY;BYDAY=MO,WE,FR", 90),
+                ("RRULE:FREQ=WEEKLY;BYDAY=TU,TH", 30),
+                ("RRULE:FREQ=DAILY;INTERVAL=2", 120),
+            ])
+        ]
+    }
+    current = await schedule(tasks)
+    assert current["conflicts"], "Test precondition failed: schedule should start with conflicts."
+
+    for _ in range(40):
+        event = rng.choice(current["events"])
+        action = rng.choice(["skip", "postpone", "change_duration"])
+        request = {"action": action, "session_id": event["session_id"]}
+        if action == "postpone":
+            start = isoparse(event["start_time"]) + timedelta(minutes=rng.choice([-90, -30, 30, 60, 24 * 60]))
+            request["new_start_time"] = start.isoformat()
+        elif action == "change_duration":
+            request["new_estimated_minutes"] = rng.choice([15, 45, 180])
+
+        current = await adapt({"schedule": current, "adaptation_request": request})
+
+        expected = copy.deepcopy(current)
+        _recompute_conflicts(expected)
+        assert current["events"] == expected["events"]
+        assert current["conflicts"] == expected["conflicts"]
+
+
+@pytest.mark.xfail(ADAPT_DISABLED, reason="Adaptation tests are disabled via environment variable.")
+@pytest.mark.asyncio
+async def test_missing_conflicts_fall_back_to_full_recompute():
+    """
+    A client schedule that leaves out existing overlaps must not be trusted:
+    the result has to equal a full recompute.
+    """
+    start = datetime(2025, 1, 6, 9, 0, tzinfo=pytz.utc)
+
+    def event(n, offset_minutes, minutes):
+        begin = start + timedelta(minutes=offset_minutes)
+        return {
+            "session_id": f"sess_{n}",
+            "task_id": f"task_{n}",
+            "start_time": begin.isoformat(),
+            "end_time": (begin + timedelta(minutes=minutes)).isoformat(),
+            "status": "scheduled",
+        }
+
+    current = {
+        "events": [event(0, 0, 60), event(1, 30, 90), event(2, 24 * 60, 30)],
+        "conflicts": [],
+        "exceptions": [],
+    }
+    adapted = await adapt({"schedule": current, "adaptation_request": {"action": "skip", "session_id": "sess_2"}})
+
+    assert [e["status"] for e in adapted["events"]] == ["conflict", "conflict", "skipped"]
+    assert len(adapted["conflicts"]) == 2
+
+
+def _overlapping_schedule():
+    start = datetime(2025, 1, 6, 9, 0, tzinfo=pytz.utc)
+    events = []
+    for n, (offset, minutes) in enumerate([(0, 60), (30, 90), (24 * 60, 30), (24 * 60 + 60, 30)]):
+        begin = start + timedelta(minutes=offset)
+        events.append({
+            "session_id": str(uuid.uuid4()),
+            "task_id": f"task_{n}",
+            "start_time": begin.isoformat(),
+            "end_time": (begin + timedelta(minutes=minutes)).isoformat(),
+            "status": "scheduled",
+        })
+    return {"events": events, "conflicts": [], "exceptions": []}
+
+
+@pytest.mark.xfail(ADAPT_DISABLED, reason="Adaptation tests are disabled via environment variable.")
+@pytest.mark.asyncio
+async def test_returned_schedule_resumes_without_recompute(monkeypatch):
+    """
+    Adapting the schedule a previous call returned reuses the stored conflict
+    state instead of recomputing from scratch.
+    """
+    from app.agents import adaptation
+
+    sched = _overlapping_schedule()
+    current = await adapt({
+        "schedule": sched,
+        "adaptation_request": {"action": "change_duration", "session_id": sched["events"][2]["session_id"], "new_estimated_minutes": 30},
+    })
+    current = copy.deepcopy(current)  # as if it went over the wire and back
+
+    def fail(schedule):
+        raise AssertionError("expected the stored conflict state to be reused")
+
+    monkeypatch.setattr(adaptation, "_recompute_conflicts", fail)
+    moved = isoparse(current["events"][3]["start_time"]) - timedelta(minutes=45)
+    adapted = await adapt({
+        "schedule": current,
+        "adaptation_request": {
+            "action": "postpone",
+            "session_id": current["events"][3]["session_id"],
+            "new_start_time": moved.isoformat(),
+        },
+    })
+    monkeypatch.undo()
+
+    expected = copy.deepcopy(adapted)
+    _recompute_conflicts(expected)
+    assert adapted["events"] == expected["events"]
+    assert adapted["conflicts"] == expected["conflicts"]
+    assert [e["status"] for e in adapted["events"]] == ["conflict", "conflict", "conflict", "conflict"]
+
+
+@pytest.mark.xfail(ADAPT_DISABLED, reason="Adaptation tests are disabled via environment variable.")
+@pytest.mark.asyncio
+async def test_edited_schedule_is_recomputed():
+    """
+    A returned schedule the client changed by hand no longer matches the
+    stored state, so its conflicts are recomputed rather than carried over.
+    """
+    sched = _overlapping_schedule()
+    current = await adapt({
+        "schedule": sched,
+        "adaptation_request": {"action": "change_duration", "session_id": sched["events"][2]["session_id"], "new_estimated_minutes": 30},
+    })
+    assert current["conflicts"]
+
+    # Move the second event away by hand, leaving the stale conflicts in place.
+    current = copy.deepcopy(current)
+    current["events"][1]["start_time"] = current["events"][2]["start_time"]
+    current["events"][1]["end_time"] = current["events"][2]["end_time"]
+    adapted = await adapt({
+        "schedule": current,
+        "adaptation_request": {"action": "skip", "session_id": current["events"][3]["session_id"]},
+    })
+
+    expected = copy.deepcopy(adapted)
+    _recompute_conflicts(expected)
+    assert adapted["events"] == expected["events"]
+    assert adapted["conflicts"] == expected["conflicts"]
+    assert [e["status"] for e in adapted["events"]] == ["scheduled", "conflict", "conflict", "skipped"]
@@ -0,0 +1,57 @@
+import sys
+
+import pytest
+
+from app import main
+from app.agents.registry import AgentRegistry
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    (tmp_path / "lazy_demo_agent.py").write_text("async def run(payload):\n    return {'echo': payload}\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "lazy_demo_agent", raising=False)
+    return AgentRegistry({"DemoAgent": "lazy_demo_agent:run"})
+
+
+@pytest.mark.asyncio
+async def test_agents_are_imported_on_first_use(registry):
+    assert "DemoAgent" in registry and "MissingAgent" not in registry
+    assert list(registry) == ["DemoAgent"]
+    assert "lazy_demo_agent" not in sys.modules
+    assert registry.stats() == {"loaded": {}, "pending": ["DemoAgent"]}
+
+    assert await registry["DemoAgent"]({"n": 1}) == {"echo": {"n": 1}}
+    assert "lazy_demo_agent" in sys.modules
+    assert list(registry.stats()["loaded"]) == ["DemoAgent"]
+    with pytest.raises(KeyError):
+        registry["MissingAgent"]
+
+
+def test_warm_up_loads_eagerly_and_rejects_unknown_agents(registry):
+    assert list(registry.warm_up()) == ["DemoAgent"]
+    assert "lazy_demo_agent" in sys.modules
+    assert registry.warm_up(["DemoAgent"]) == {"DemoAgent": 0.0}  # already loaded
+    with pytest.raises(ValueError):
+        registry.warm_up(["MissingAgent"])
+    with pytest.raises(ValueError):
+        AgentRegistry({"BadAgent": "no_function_here"})
+
+
+def test_agents_can_be_swapped_and_restored(registry, monkeypatch):
+    async def fake(payload):
+        return {}
+
+    with monkeypatch.context() as patch:
+        patch.setitem(registry, "DemoAgent", fake)
+        patch.setitem(registry, "ExtraAgent", fake)
+        assert registry["DemoAgent"] is fake and "ExtraAgent" in registry
+    assert registry["DemoAgent"] is not fake
+    assert "ExtraAgent" not in registry
+
+
+def test_main_warm_up_reads_agent_names():
+    assert main.warm_up("") == {}
+    assert list(main.warm_up("SchedulerAgent, AdaptationAgent")) == ["SchedulerAgent", "AdaptationAgent"]
+    with pytest.raises(ValueError):
+        main.warm_up("SchedulerAgent,NoSuchAgent")
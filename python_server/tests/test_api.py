@@ -0,0 +1,178 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.llm.hedge import report_source
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+def test_batch_preserves_order_and_limits_concurrency(client, monkeypatch):
+    """Results come back in request order, errors stay per-item, and concurrency is capped."""
+    running = {"now": 0, "peak": 0}
+
+    async def slow_echo(payload):
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        await asyncio.sleep(0.01 * (5 - payload["n"] % 5))
+        running["now"] -= 1
+        if payload["n"] == 3:
+            raise ValueError("bad input")
+        return {"n": payload["n"]}
+
+    monkeypatch.setitem(main.AGENTS, "SchedulerAgent", slow_echo)
+    requests = [{"agent_name": "SchedulerAgent", "input_data": {"n": n}} for n in range(8)]
+    requests.append({"agent_name": "MissingAgent", "input_data": {}})
+
+    response = client.post("/invoke_agents", json={"requests": requests, "max_concurrency": 3})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == ["success"] * 3 + ["error"] + ["success"] * 4 + ["error"]
+    assert [r["output_data"]["n"] for r in results if r["status"] == "success"] == [0, 1, 2, 4, 5, 6, 7]
+    assert results[3]["error"] == {"code": "ScheduleFailure", "message": "bad input"}
+    assert results[8]["error"]["code"] == "agent_not_found"
+    assert running["peak"] == 3
+
+
+def test_goal_pipeline_chains_stages_and_stops_early(client, monkeypatch):
+    """Each stage gets the previous stage's output; non-goal intents stop after classification."""
+    seen = []
+
+    async def intent(text):
+        return {"intent": "new_goal" if "learn" in text else "general_chat"}
+
+    async def parse(text):
+        return {"description": text}
+
+    async def decompose(goal):
+        seen.append(goal)
+        return {"tasks": [{"task_id": "t1"}]}
+
+    async def schedule(task_list):
+        seen.append(task_list)
+        return {"events": [], "conflicts": [], "exceptions": []}
+
+    for name, func in [("IntentClassifierAgent", intent), ("GoalParserAgent", parse),
+                       ("TaskDecomposerAgent", decompose), ("SchedulerAgent", schedule)]:
+        monkeypatch.setitem(main.AGENTS, name, func)
+
+    response = client.post("/goal_pipeline", json={"text": "learn guitar"})
+    body = response.json()
+    assert response.status_code == 200
+    assert body["intent"] == "new_goal"
+    assert body["output_data"]["schedule"] == {"events": [], "conflicts": [], "exceptions": []}
+    assert seen == [{"description": "learn guitar"}, {"tasks": [{"task_id": "t1"}]}]
+    assert [s["agent_name"] for s in body["stages"]] == [
+        "IntentClassifierAgent", "GoalParserAgent", "TaskDecomposerAgent", "SchedulerAgent"
+    ]
+
+    response = client.post("/goal_pipeline", json={"text": "hello"})
+    assert response.json()["output_data"] == {"intent": "general_chat"}
+    assert len(response.json()["stages"]) == 1
+
+    async def failing(goal):
+        raise ValueError("no tasks")
+
+    monkeypatch.setitem(main.AGENTS, "TaskDecomposerAgent", failing)
+    response = client.post("/goal_pipeline", json={"text": "learn guitar"})
+    assert response.status_code == 400
+    assert response.json()["error"] == {"code": "DecomposeFailure", "message": "no tasks"}
+    assert len(response.json()["stages"]) == 3
+
+
+def test_envelope_reports_the_source_of_the_result(client, monkeypatch):
+    async def intent(text):
+        report_source("budget")
+        return {"intent": "general_chat"}
+
+    monkeypatch.setitem(main.AGENTS, "IntentClassifierAgent", intent)
+    response = client.post("/invoke_agent", json={"agent_name": "IntentClassifierAgent", "input_data": {"text": "hm"}})
+    assert response.json()["source"] == "budget"
+
+    response = client.post("/goal_pipeline", json={"text": "hm"})
+    assert response.json()["stages"][0]["source"] == "budget"
+
+
+def test_envelopes_are_serialized_without_revalidating_output_data(client, monkeypatch):
+    """The orjson path returns the same document the response model describes."""
+    output = {"events": [{"n": n, "at": f"2025-01-{n % 28 + 1:02d}"} for n in range(2000)], "ids": {1: "int keys"}}
+
+    async def schedule(payload):
+        return output
+
+    monkeypatch.setitem(main.AGENTS, "SchedulerAgent", schedule)
+    response = client.post("/invoke_agent", json={"agent_name": "SchedulerAgent", "input_data": {}})
+
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == {
+        "status": "success",
+        "agent_name": "SchedulerAgent",
+        "output_data": {"events": output["events"], "ids": {"1": "int keys"}},
+        "source": None,
+        "debug": None,
+    }
+    response = client.post("/invoke_agent", json={"agent_name": "MissingAgent", "input_data": {}})
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == "agent_not_found"
+
+
+def test_oversized_integers_fall_back_to_the_stdlib_encoder(client):
+    """orjson rejects integers wider than 64 bits; those responses still get a proper envelope."""
+    schedule = {
+        "events": [{
+            "session_id": "0b5c7f4e-6a55-4f4c-9d0c-2d1f8a8e8c11",
+            "task_id": "task_A",
+            "start_time": "2025-01-06T09:00:00+00:00",
+            "end_time": "2025-01-06T10:00:00+00:00",
+            "status": "scheduled",
+        }],
+        "conflicts": [],
+        "exceptions": [{"n": 2**70}],
+    }
+    request = {
+        "agent_name": "AdaptationAgent",
+        "input_data": {
+            "schedule": schedule,
+            "adaptation_request": {"action": "skip", "session_id": schedule["events"][0]["session_id"]},
+        },
+    }
+
+    response = client.post("/invoke_agent", json=request)
+    assert response.status_code == 200
+    assert response.json()["output_data"]["exceptions"][0] == {"n": 2**70}
+
+    response = client.post("/invoke_agents", json={"requests": [request]})
+    assert response.status_code == 200
+    assert response.json()["results"][0]["status"] == "success"
+
+
+def test_unencodable_output_gets_an_error_envelope(client, monkeypatch):
+    """Output neither encoder can write is reported as a 500 envelope, per call in a batch."""
+    async def schedule(payload):
+        return payload
+
+    monkeypatch.setitem(main.AGENTS, "SchedulerAgent", schedule)
+    # A wide integer sends the response to the stdlib encoder, which rejects NaN.
+    body = b'{"agent_name": "SchedulerAgent", "input_data": {"n": 1180591620717411303424, "x": NaN}}'
+    response = client.post("/invoke_agent", content=body, headers={"content-type": "application/json"})
+
+    assert response.status_code == 500
+    assert response.json()["status"] == "error"
+    assert response.json()["error"]["code"] == "internal_server_error"
+
+    body = (
+        b'{"requests": [{"agent_name": "SchedulerAgent", "input_data": {"n": 1}},'
+        b' {"agent_name": "SchedulerAgent", "input_data": {"n": 1180591620717411303424, "x": NaN}}]}'
+    )
+    response = client.post("/invoke_agents", content=body, headers={"content-type": "application/json"})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results[0] == {"status": "success", "agent_name": "SchedulerAgent", "output_data": {"n": 1}, "source": None, "debug": None}
+    assert results[1]["error"]["code"] == "internal_server_error"
@@ -0,0 +1,61 @@
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytz
+
+from app.scheduling.conflicts import mark_conflicts, naive_overlapping_pairs, overlapping_pairs, overlapping_pairs_array
+
+
+def _random_intervals(n, seed):
+    rng = random.Random(seed)
+    base = pytz.timezone("America/Mexico_City").localize(datetime(2025, 3, 1, 9, 0))
+    intervals = []
+    for _ in range(n):
+        start = base + timedelta(minutes=15 * rng.randint(0, 400))
+        # Include zero-length and a few inverted intervals to cover edge cases.
+        end = start + timedelta(minutes=rng.choice([-15, 0, 15, 30, 60, 120, 240]))
+        intervals.append((start, end))
+    return intervals
+
+
+def test_sweep_matches_pairwise_scan():
+    """The sweep line must report exactly the pairs the O(n^2) loop reports, in the same order."""
+    for seed in range(20):
+        intervals = _random_intervals(150, seed)
+        assert overlapping_pairs(intervals) == naive_overlapping_pairs(intervals)
+
+
+def test_mark_conflicts_matches_legacy_output():
+    """
+    Statuses and the conflicts list must be identical to the nested loop
+    that used to live in the scheduler.
+    """
+    intervals = _random_intervals(200, seed=42)
+    events = [
+        {"session_id": f"sess_{i}", "task_id": f"task_{i % 7}", "status": "scheduled"}
+        for i in range(len(intervals))
+    ]
+    expected_events = [dict(e) for e in events]
+    expected_conflicts = []
+    for i, j in naive_overlapping_pairs(intervals):
+        expected_events[i]["status"] = "conflict"
+        expected_events[j]["status"] = "conflict"
+        expected_conflicts.append({"task_id": events[i]["task_id"], "conflict_with": events[j]["session_id"], "reason": "overlap"})
+        expected_conflicts.append({"task_id": events[j]["task_id"], "conflict_with": events[i]["session_id"], "reason": "overlap"})
+
+    conflicts = mark_conflicts(events, intervals)
+
+    assert conflicts == expected_conflicts
+    assert events == expected_events
+
+
+def test_array_sweep_matches_pairwise_scan():
+    """The NumPy detector must agree with the pairwise loop, including on zero-length intervals."""
+    for seed in range(20):
+        intervals = _random_intervals(150, seed)
+        if seed % 2:
+            intervals = [(s, e) for s, e in intervals if e > s]
+        starts = np.array([s.replace(tzinfo=None) for s, _ in intervals], dtype="datetime64[us]")
+        ends = np.array([e.replace(tzinfo=None) for _, e in intervals], dtype="datetime64[us]")
+        assert overlapping_pairs_array(starts, ends) == naive_overlapping_pairs(intervals)
@@ -0,0 +1,109 @@
+import json
+import uuid
+from datetime import date
+
+import pytest
+
+from app.agents import task_decomposer
+from app.agents.task_decomposer import goal_signature
+from app.llm.cache import LLMCache
+from app.llm.hedge import reported_source, reset_source
+
+TODAY = date(2025, 1, 15)
+
+
+def _goal(description="Learn Python", days=("Saturday", "Sunday"), deadline=None, **extra):
+    return {
+        "type": "skill",
+        "description": description,
+        "deadline": deadline,
+        "constraints": {"days_available": list(days), "time_windows": ["evening"]},
+        "preferences": {},
+        **extra,
+    }
+
+
+def test_signature_ignores_cosmetic_differences_but_not_the_deadline_horizon():
+    base = goal_signature(_goal(), TODAY)
+    assert goal_signature(_goal("learn  python!", days=("sunday", "Saturday")), TODAY) == base
+    assert goal_signature(_goal("Learn the Python"), TODAY) == base
+    assert goal_signature(_goal(deadline="2025-01-20"), TODAY)["deadline"] == "1w"
+    assert goal_signature(_goal(deadline="2025-04-01"), TODAY)["deadline"] == "3m"
+    assert goal_signature(_goal("Learn Rust"), TODAY) != base
+    assert goal_signature(_goal(preferences={"session_minutes": 30}), TODAY) != base
+    assert goal_signature(_goal(preferences={"tone": " Gentle"}), TODAY) == goal_signature(
+        _goal(preferences={"tone": "gentle"}), TODAY)
+
+
+@pytest.mark.asyncio
+async def test_reused_decomposition_takes_until_from_its_own_deadline(monkeypatch):
+    monkeypatch.setattr(task_decomposer, "DECOMPOSITION_CACHE", LLMCache(maxsize=2, ttl_seconds=60, path=None))
+
+    async def fake_chat_json(model, messages, options=None):
+        answer = {"tasks": [
+            {"task_id": "t1", "description": "Practice", "estimated_minutes": 60, "dependencies": [],
+             "recurrence_rule": "RRULE:FREQ=WEEKLY;BYDAY=SA;UNTIL=20250228T235959Z"},  # a day before the deadline
+        ]}
+        return {"message": {"content": json.dumps(answer)}}
+
+    monkeypatch.setattr(task_decomposer.LLM_CLIENT, "chat_json", fake_chat_json)
+    first = await task_decomposer.decompose(_goal(deadline="2025-03-01", goal_id=str(uuid.uuid4())))
+    reset_source()
+    second = await task_decomposer.decompose(_goal(deadline="2025-03-10", goal_id=str(uuid.uuid4())))
+
+    assert reported_source() == "cache"
+    assert first["tasks"][0]["recurrence_rule"].endswith("UNTIL=20250228T235959Z")
+    assert second["tasks"][0]["recurrence_rule"] == "RRULE:FREQ=WEEKLY;BYDAY=SA;UNTIL=20250309T235959Z"
+    assert "until_offset_days" not in second["tasks"][0]
+
+
+@pytest.mark.asyncio
+async def test_similar_goals_reuse_the_decomposition_with_fresh_ids(monkeypatch):
+    cache = LLMCache(maxsize=2, ttl_seconds=60, path=None, table="decomposition_cache")
+    monkeypatch.setattr(task_decomposer, "DECOMPOSITION_CACHE", cache)
+    calls = []
+
+    async def fake_chat_json(model, messages, options=None):
+        calls.append(messages)
+        answer = {"tasks": [
+            {"task_id": "t1", "description": "Install Python", "recurrence_rule": "RRULE:FREQ=ONCE",
+             "estimated_minutes": 30, "dependencies": []},
+            {"task_id": "t2", "description": "Practice", "recurrence_rule": "RRULE:FREQ=WEEKLY;BYDAY=SA,SU",
+             "estimated_minutes": 60, "dependencies": ["t1", "unknown"]},
+        ]}
+        return {"message": {"content": json.dumps(answer)}}
+
+    monkeypatch.setattr(task_decomposer.LLM_CLIENT, "chat_json", fake_chat_json)
+
+    first_goal_id, second_goal_id = str(uuid.uuid4()), str(uuid.uuid4())
+    reset_source()
+    first = await task_decomposer.decompose(_goal(goal_id=first_goal_id))
+    assert reported_source() == "llm"
+    assert first["tasks"][1]["dependencies"] == [first["tasks"][0]["task_id"]]
+
+    reset_source()
+    second = await task_decomposer.decompose(_goal("learn python.", days=("Sunday", "Saturday"), goal_id=second_goal_id))
+    assert reported_source() == "cache"
+    assert len(calls) == 1
+    assert [t["description"] for t in second["tasks"]] == ["Install Python", "Practice"]
+    assert {t["goal_id"] for t in second["tasks"]} == {second_goal_id}
+    assert not {t["task_id"] for t in second["tasks"]} & {t["task_id"] for t in first["tasks"]}
+    assert second["tasks"][1]["dependencies"] == [second["tasks"][0]["task_id"]]
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+
+def test_caches_sharing_a_file_keep_separate_tables(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    llm = LLMCache(maxsize=8, ttl_seconds=60, path=path)
+    decompositions = LLMCache(maxsize=8, ttl_seconds=60, path=path, table="decomposition_cache")
+    llm.put("k", "intent")
+    llm.flush()
+    decompositions.put("k", {"tasks": []})
+    decompositions.clear()
+
+    assert LLMCache(maxsize=8, ttl_seconds=60, path=path).get("k") == "intent"
+    assert LLMCache(maxsize=8, ttl_seconds=60, path=path, table="decomposition_cache").get("k") is None
+    with pytest.raises(ValueError):
+        LLMCache(path=None, table="bad name; DROP")
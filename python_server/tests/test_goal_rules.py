@@ -0,0 +1,116 @@
+from datetime import date
+
+import pytest
+from jsonschema import validate
+
+from app.agents import goal_parser
+from app.agents.goal_rules import extract
+from app.llm.hedge import reported_source, reset_source
+from app.schemas import GOAL_SCHEMA
+
+TODAY = date(2025, 1, 15)  # a Wednesday
+
+CASES = [
+    # text, type, description, deadline, days, windows
+    ("I want to run a 10k in 3 months. I can train on Mondays, Wednesdays, and Saturdays in the evenings.",
+     "fitness", "Run a 10k", "2025-04-15", ["Monday", "Wednesday", "Saturday"], ["evening"]),
+    ("Help me learn Python. I have no deadline, just want to start. I can study on weekends.",
+     "skill", "Learn Python", None, ["Saturday", "Sunday"], []),
+    ("I need to build a portfolio website by the end of August.",
+     "project", "Build a portfolio website", "2025-08-31", [], []),
+    ("My goal is to run a half-marathon by the end of the year.",
+     "fitness", "Run a half-marathon", "2025-12-31", [], []),
+    ("I will go to the gym on Monday, Wednesday, and Friday mornings.",
+     "fitness", "Go to the gym", None, ["Monday", "Wednesday", "Friday"], ["morning"]),
+    ("I need to finish my website project by October 1st.",
+     "project", "Finish my website project", "2025-10-01", [], []),
+    ("Swim Monday to Friday at 6am until March 3rd 2026",
+     "fitness", "Swim", "2026-03-03", ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"], ["morning"]),
+    ("Write my thesis by 12/24 on weeknights.",
+     "project", "Write my thesis", "2025-12-24", ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"],
+     ["evening"]),
+    ("Learn French within a fortnight.", "skill", "Learn French", "2025-01-29", [], []),
+    ("Get fit by next Friday.", "fitness", "Get fit", "2025-01-17", [], []),
+    ("I'd love to finish the novel by 10th of January.", "project", "Finish the novel", "2026-01-10", [], []),
+    ("I want to be more mindful.", "other", "Be more mindful", None, [], []),
+]
+
+
+@pytest.mark.parametrize("text, goal_type, description, deadline, days, windows", CASES)
+def test_extracts_type_description_deadline_days_and_windows(text, goal_type, description, deadline, days, windows):
+    goal = extract(text, TODAY).goal
+    validate(instance=goal, schema=GOAL_SCHEMA)
+    assert goal["type"] == goal_type
+    assert goal["description"] == description
+    assert goal["deadline"] == deadline
+    assert goal["constraints"] == {"days_available": days, "time_windows": windows}
+
+
+def test_preferences_and_confidence():
+    extraction = extract("I will practice drawing for 30 minutes every day with an encouraging tone.", TODAY)
+    assert extraction.goal["preferences"] == {"session_minutes": 30, "tone": "encouraging"}
+    assert extraction.goal["constraints"]["days_available"] == [
+        "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+    assert extraction.confident
+    assert not extract("Run a 5k. Mornings only.", TODAY).confident  # more than one sentence
+    assert not extract("Be happier.", TODAY).confident  # no recognised type
+
+
+@pytest.mark.parametrize("text", [
+    "I want to run a 5k in 99999999999 days",
+    "I want to run a 5k in 999 years",
+    "I will practice drawing for 99999999999999999999 minutes",
+    "I will practice drawing for 999 hours by 0000-01-01",
+])
+def test_absurd_numbers_are_ignored_not_raised(text):
+    goal = extract(text, TODAY).goal
+    validate(instance=goal, schema=GOAL_SCHEMA)
+    assert goal["deadline"] is None
+    assert "session_minutes" not in goal["preferences"]
+
+
+def test_large_but_sane_numbers_still_count():
+    assert extract("Run a 5k in 999 days", TODAY).goal["deadline"] == "2027-10-11"
+    assert extract("Practice piano for 12 hours", TODAY).goal["preferences"] == {"session_minutes": 720}
+
+
+@pytest.mark.asyncio
+async def test_rules_first_answers_simple_goals_without_the_llm(monkeypatch):
+    async def no_llm(*args, **kwargs):
+        raise AssertionError("the LLM should not be called")
+
+    monkeypatch.setattr(goal_parser, "RULES_FIRST", True)
+    monkeypatch.setattr(goal_parser, "_llm_parse", no_llm)
+
+    reset_source()
+    goal = await goal_parser.parse("I want to learn the cello on weekends.")
+    assert reported_source() == "rules"
+    assert goal["type"] == "skill" and goal["constraints"]["days_available"] == ["Saturday", "Sunday"]
+
+
+@pytest.mark.parametrize("text", [
+    "Run a 5k at 13pm",
+    "Run a 5k at 0pm",
+    "Run a 5k at 7:75pm",
+    "By 2020-01-01 learn guitar",
+    "Learn guitar by 1/1/2020",
+    "Finish the novel by 31st of February",
+    "Finish the novel by 31st of February 2026",
+    "Finish the novel by February 29th 2025",
+])
+def test_impossible_times_and_dates_defer_to_the_llm(text):
+    extraction = extract(text, TODAY)
+    validate(instance=extraction.goal, schema=GOAL_SCHEMA)
+    assert extraction.goal["deadline"] is None
+    assert extraction.goal["constraints"]["time_windows"] == []
+    assert not extraction.confident
+
+
+def test_leading_deadline_is_left_out_of_the_description():
+    extraction = extract("By 2025-06-01 learn guitar", TODAY)
+    assert extraction.goal["description"] == "Learn guitar"
+    assert extraction.goal["deadline"] == "2025-06-01"
+    assert extraction.confident
+    # A February 29th without a year is the next one that exists.
+    assert extract("Finish the novel by February 29th", TODAY).goal["deadline"] == "2028-02-29"
+    assert extract("Run a 5k at 12am", TODAY).goal["constraints"]["time_windows"] == ["morning"]
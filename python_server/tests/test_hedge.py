@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from app.agents import intent_classifier
+from app.llm.cache import LLMCache
+from app.llm.hedge import drain, hedged, reported_source, reset_source
+
+
+async def _answer(value, delay, events=None):
+    try:
+        await asyncio.sleep(delay)
+    except asyncio.CancelledError:
+        if events is not None:
+            events.append("cancelled")
+        raise
+    if isinstance(value, Exception):
+        raise value
+    if events is not None:
+        events.append("finished")
+    return value
+
+
+@pytest.mark.asyncio
+async def test_llm_within_budget_wins():
+    assert await hedged(_answer("llm", 0), lambda: "rules", 0.5) == ("llm", "llm", None)
+    assert await hedged(_answer("llm", 0.01), lambda: "rules", None) == ("llm", "llm", None)
+
+
+@pytest.mark.asyncio
+async def test_failures_and_late_answers_fall_back():
+    boom = ConnectionError("refused")
+    assert await hedged(_answer(boom, 0), lambda: "rules", None) == ("rules", "fallback", boom)
+
+    events = []
+    result = await hedged(_answer("llm", 0.05, events), lambda: "rules", 0.01, keep_late=False)
+    assert result == ("rules", "budget", None)
+    await asyncio.sleep(0)
+    assert events == ["cancelled"]
+
+    events = []
+    result = await hedged(_answer("llm", 0.03, events), lambda: "rules", 0.01, keep_late=True)
+    assert result.source == "budget"
+    await asyncio.sleep(0.05)
+    assert events == ["finished"]
+
+
+@pytest.mark.asyncio
+async def test_late_intent_answer_warms_the_cache(monkeypatch):
+    """A missed budget returns the heuristic guess now and the LLM's label next time."""
+    cache = LLMCache(maxsize=8, ttl_seconds=60, path=None)
+    monkeypatch.setattr(intent_classifier, "LLM_CACHE", cache)
+    monkeypatch.setattr(intent_classifier, "BUDGET_SECONDS", 0.01)
+
+    async def slow_llm(text):
+        await asyncio.sleep(0.03)
+        return "new_goal"
+
+    monkeypatch.setattr(intent_classifier, "_llm_intent", slow_llm)
+
+    reset_source()
+    assert await intent_classifier.classify("Pottery.") == {"intent": "general_chat"}
+    assert reported_source() == "budget"
+
+    await asyncio.sleep(0.05)
+    assert await intent_classifier.classify("Pottery.") == {"intent": "new_goal"}
+    assert reported_source() == "cache"
+
+
+@pytest.mark.asyncio
+async def test_drain_waits_for_late_calls_then_cancels_the_rest():
+    events = []
+    await hedged(_answer("llm", 0.02, events), lambda: "rules", 0.001, keep_late=True)
+    await hedged(_answer("llm", 5, events), lambda: "rules", 0.001, keep_late=True)
+
+    assert await drain(0.2) == 1
+    await asyncio.sleep(0)
+    assert events == ["finished", "cancelled"]
+    assert await drain(0.2) == 0
+
+
+@pytest.mark.asyncio
+async def test_failing_fallback_waits_for_the_llm():
+    """A broken fallback must not turn a healthy LLM answer into an error or leak the call."""
+    def broken():
+        raise OverflowError("date value out of range")
+
+    before = asyncio.all_tasks()
+    assert await hedged(_answer("llm", 0.02), broken, 0.001) == ("llm", "llm", None)
+
+    with pytest.raises(OverflowError):
+        await hedged(_answer(ConnectionError("refused"), 0.01), broken, 0.001)
+    await asyncio.sleep(0)
+    assert asyncio.all_tasks() == before
@@ -1,6 +1,8 @@
 
 import pytest
 import asyncio
+from app.agents import intent_classifier
+from app.llm.cache import LLMCache
 from app.agents.intent_classifier import classify, INTENT_NEW_GOAL, INTENT_ADAPTATION_REQUEST, INTENT_GENERAL_CHAT
 
 # --- Test Data ---
@@ -52,3 +54,28 @@ async def test_intent_classifier_accuracy():
 
     assert accuracy >= 0.95, f"Accuracy ({accuracy:.2f}) is below the 95% threshold."
 
+
+@pytest.mark.asyncio
+async def test_confident_inputs_skip_the_llm(monkeypatch):
+    """Only inputs below the confidence threshold reach the LLM tier."""
+    calls = []
+
+    async def fake_llm(text):
+        calls.append(text)
+        return INTENT_NEW_GOAL
+
+    monkeypatch.setattr(intent_classifier, "_llm_intent", fake_llm)
+    monkeypatch.setattr(intent_classifier, "LLM_CACHE", LLMCache(maxsize=8, ttl_seconds=60, path=None))
+    before = intent_classifier.stats()["counts"]
+
+    assert await classify("Can we skip today's workout?") == {"intent": INTENT_ADAPTATION_REQUEST}
+    assert await classify("Thanks for your help!") == {"intent": INTENT_GENERAL_CHAT}
+    assert calls == []
+
+    # No signal at all: ambiguous, so the LLM decides.
+    assert await classify("Pottery.") == {"intent": INTENT_NEW_GOAL}
+    assert calls == ["Pottery."]
+
+    after = intent_classifier.stats()["counts"]
+    assert after["heuristic"] - before["heuristic"] == 2
+    assert after["llm"] - before["llm"] == 1
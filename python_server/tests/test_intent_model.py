@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from app.agents import intent_classifier, intent_model
+from app.agents.intent_model import IntentModel
+from app.llm.cache import LLMCache
+from app.llm.hedge import reported_source, reset_source
+
+
+def test_sparse_inference_matches_the_dense_features():
+    model = IntentModel.load()
+    texts = ["I want to learn guitar", "Skip tomorrow's run", "hello", ""]
+    dense = intent_model._softmax((intent_model.features(texts) @ model.weights + model.bias) / model.temperature)
+    assert np.allclose(model.predict_proba(texts), dense, atol=1e-5)
+    assert model.labels == intent_classifier._LABELS
+
+
+def test_training_round_trips_through_the_weights_file(tmp_path):
+    examples = intent_model.load_corpus()
+    model = intent_model.train(examples, intent_classifier._LABELS, epochs=100)
+    path = tmp_path / "model.npz"
+    model.save(path)
+    loaded = IntentModel.load(path)
+
+    texts = [text for text, _ in examples]
+    assert [label for label, _ in loaded.predict(texts)] == [label for label, _ in model.predict(texts)]
+    assert path.stat().st_size < 64 * 1024
+
+
+def test_missing_weights_disable_the_tier(tmp_path):
+    assert intent_model.load_default(tmp_path / "missing.npz") is None
+
+
+@pytest.mark.asyncio
+async def test_confident_model_answers_skip_the_llm(monkeypatch):
+    calls = []
+
+    async def fake_llm(text):
+        calls.append(text)
+        return "general_chat"
+
+    monkeypatch.setattr(intent_classifier, "_llm_intent", fake_llm)
+    monkeypatch.setattr(intent_classifier, "CONFIDENCE_THRESHOLD", 1.01)  # bypass the heuristics
+    before = intent_classifier.stats()["counts"]["model"]
+
+    assert await intent_classifier.classify("I'd like to learn the cello.") == {"intent": "new_goal"}
+    assert calls == []
+    assert intent_classifier.stats()["counts"]["model"] == before + 1
+
+
+@pytest.mark.asyncio
+async def test_inputs_the_model_does_not_know_go_to_the_llm(monkeypatch):
+    """Gibberish and empty text get a confident-looking bias-only prediction; it must not be trusted."""
+    model = IntentModel.load()
+    assert model.known_features(["asdf", "", "I'd like to learn the cello."])[:2] == [0, 0]
+    assert model.known_features(["I'd like to learn the cello."])[0] >= intent_classifier.MODEL_MIN_KNOWN_FEATURES
+    calls = []
+
+    async def fake_llm(text):
+        calls.append(text)
+        return "general_chat"
+
+    monkeypatch.setattr(intent_classifier, "_llm_intent", fake_llm)
+    monkeypatch.setattr(intent_classifier, "LLM_CACHE", LLMCache(maxsize=8, ttl_seconds=60, path=None))
+    monkeypatch.setattr(intent_classifier, "CONFIDENCE_THRESHOLD", 1.01)  # bypass the heuristics
+
+    for text in ["asdf", ""]:
+        reset_source()
+        await intent_classifier.classify(text)
+        assert reported_source() == "llm"
+    assert calls == ["asdf", ""]
+
+
+def test_calibration_fits_a_temperature_on_held_out_folds():
+    examples = intent_model.load_corpus()
+    temperature = intent_model.calibrate(examples, intent_classifier._LABELS, folds=3, epochs=50)
+    assert 0.25 <= temperature <= 5.0
+    assert IntentModel.load().temperature > 0
@@ -0,0 +1,118 @@
+import json
+import random
+
+import pytest
+
+from app.llm import client as llm_client
+from app.llm.client import OllamaPool
+from app.llm.json_stream import JsonObjectScanner
+from app.llm.prompts import PromptTemplate
+
+ANSWER = 'Sure! {"type": "skill", "note": "braces } and \\" quotes {", "tasks": [{"n": 1}]}\n```\nHope this helps.'
+OBJECT = ANSWER[ANSWER.index("{"):ANSWER.index("\n")]
+
+
+def _pieces(text, rng):
+    cuts = sorted(rng.sample(range(1, len(text)), 12))
+    return [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+
+
+def test_scanner_finds_the_object_however_the_stream_is_chunked():
+    rng = random.Random(7)
+    for _ in range(50):
+        scanner = JsonObjectScanner()
+        found = [scanner.feed(piece) for piece in _pieces(ANSWER, rng)]
+        complete = [text for text in found if text is not None]
+        assert complete[0] == OBJECT
+        assert json.loads(complete[0])["tasks"] == [{"n": 1}]
+
+
+def test_scanner_skips_balanced_text_that_is_not_json():
+    scanner = JsonObjectScanner()
+    assert scanner.feed("Use {placeholder} like ") is None
+    assert scanner.feed('{"a": 1}') == '{"a": 1}'
+
+
+class _Stream:
+    def __init__(self, pieces):
+        self.pieces = pieces
+        self.sent = 0
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.sent == len(self.pieces):
+            raise StopAsyncIteration
+        self.sent += 1
+        done = self.sent == len(self.pieces)
+        chunk = {"message": {"role": "assistant", "content": self.pieces[self.sent - 1]}, "done": done}
+        if done:
+            chunk.update(prompt_eval_count=40, eval_count=len(self.pieces))
+        return chunk
+
+    async def aclose(self):
+        self.closed = True
+
+
+class _StreamingClient:
+    def __init__(self):
+        self.streams = []
+        self.answer = [c for c in ANSWER]  # one character per "token"
+
+    async def chat(self, model, messages, options=None, keep_alive=None, stream=False):
+        assert stream
+        self.streams.append(_Stream(list(self.answer)))
+        return self.streams[-1]
+
+
+@pytest.mark.asyncio
+async def test_chat_json_stops_the_stream_after_the_object(monkeypatch):
+    monkeypatch.setattr(llm_client, "LLM_STREAM_AUDIT_RATE", 0)
+    fake = _StreamingClient()
+    pool = OllamaPool(model_concurrency=1, timeout_seconds=1, client_factory=lambda: fake)
+
+    response = await pool.chat_json("m", [{"role": "user", "content": "goal"}])
+
+    assert response["message"]["content"] == OBJECT
+    assert response["stopped_early"] and fake.streams[0].closed
+    # One token past the object is read to tell a cut-short answer from a finished one.
+    assert fake.streams[0].sent == ANSWER.index("\n") + 1 == response["streamed_tokens"]
+    assert response["trailing_tokens"] is None and response["prompt_eval_count"] is None
+
+
+@pytest.mark.asyncio
+async def test_audited_calls_read_to_the_end_and_feed_the_savings_estimate(monkeypatch):
+    monkeypatch.setattr(llm_client, "LLM_STREAM_AUDIT_RATE", 1)
+    fake = _StreamingClient()
+    pool = OllamaPool(model_concurrency=1, timeout_seconds=1, client_factory=lambda: fake)
+
+    audited = await pool.chat_json("m", [{"role": "user", "content": "goal"}])
+
+    assert audited["message"]["content"] == OBJECT
+    assert not audited["stopped_early"] and fake.streams[0].sent == len(ANSWER)
+    assert audited["trailing_tokens"] == len(ANSWER) - len(ANSWER[:ANSWER.index("\n")])
+    assert audited["prompt_eval_count"] == 40
+
+    template = PromptTemplate("test_stream_template", "1", prefix="p", suffix="{text}")
+    template.record("p x", audited)
+    template.record("p x", dict(audited, stopped_early=True, trailing_tokens=None, trailing_ms=None))
+    template.record("p x", dict(audited, stopped_early=True, trailing_tokens=None, trailing_ms=None))
+    stats = template.stats()
+    assert stats["streamed_calls"] == 3 and stats["early_stops"] == 2 and stats["audited_calls"] == 1
+    assert stats["estimated_tokens_saved"] == 2 * (audited["trailing_tokens"] - 1)
+
+
+@pytest.mark.asyncio
+async def test_object_closing_on_the_last_token_is_not_an_early_stop(monkeypatch):
+    monkeypatch.setattr(llm_client, "LLM_STREAM_AUDIT_RATE", 0)
+    fake = _StreamingClient()
+    fake.answer = [c for c in OBJECT] + [""]  # then Ollama's final, empty `done` chunk
+    pool = OllamaPool(model_concurrency=1, timeout_seconds=1, client_factory=lambda: fake)
+
+    response = await pool.chat_json("m", [{"role": "user", "content": "goal"}])
+
+    assert response["message"]["content"] == OBJECT
+    assert not response["stopped_early"]
+    assert response["streamed_tokens"] == len(OBJECT) and response["prompt_eval_count"] == 40
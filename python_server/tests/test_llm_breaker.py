@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from app.llm.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from app.llm.client import OllamaPool
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_opens_on_failure_rate_and_recovers_through_a_probe():
+    clock = _Clock()
+    breaker = CircuitBreaker("m", window=10, min_calls=4, failure_rate=0.5, slow_call_seconds=5, open_seconds=30, clock=clock)
+
+    for ok, seconds in [(True, 0.1), (False, 0.1), (True, 0.1)]:
+        breaker.before_call()
+        breaker.record(ok, seconds)
+    assert breaker.state() == CLOSED
+
+    breaker.before_call()
+    breaker.record(True, 6.0)  # slow calls count as failures: 2 of 4
+    assert breaker.state() == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock.now += 30
+    breaker.before_call()  # the probe
+    assert breaker.state() == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # only one probe at a time
+    breaker.record(False, 0.1)
+    assert breaker.state() == OPEN
+
+    clock.now += 30
+    breaker.before_call()
+    breaker.record(True, 0.1)
+    assert breaker.state() == CLOSED
+    stats = breaker.stats()
+    assert stats["rejected"] == 2
+    assert [(t["from"], t["to"]) for t in stats["transitions"]] == [
+        (CLOSED, OPEN), (OPEN, HALF_OPEN), (HALF_OPEN, OPEN), (OPEN, HALF_OPEN), (HALF_OPEN, CLOSED)
+    ]
+
+
+class _DownClient:
+    def __init__(self):
+        self.calls = 0
+
+    async def chat(self, **kwargs):
+        self.calls += 1
+        raise ConnectionError("refused")
+
+
+@pytest.mark.asyncio
+async def test_pool_skips_ollama_while_the_circuit_is_open():
+    clock = _Clock()
+    client = _DownClient()
+    pool = OllamaPool(
+        model_concurrency=2,
+        timeout_seconds=1,
+        client_factory=lambda: client,
+        breaker_factory=lambda model: CircuitBreaker(model, window=4, min_calls=2, failure_rate=0.5, open_seconds=10, clock=clock),
+    )
+    for n in range(2):
+        with pytest.raises(ConnectionError):
+            await pool.chat("m", [{"role": "user", "content": str(n)}])
+
+    with pytest.raises(CircuitOpenError):
+        await pool.chat("m", [{"role": "user", "content": "fast"}])
+    assert client.calls == 2
+
+    clock.now += 10
+    with pytest.raises(ConnectionError):
+        await pool.chat("m", [{"role": "user", "content": "probe"}])
+    assert client.calls == 3
+    assert pool.breaker_stats()["models"]["m"]["state"] == OPEN
@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+
+from app.agents import intent_classifier
+from app.llm.cache import LLMCache, cache_key, flush_all
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_key_normalizes_text_but_not_model_or_version():
+    key = cache_key("intent", "Skip today's workout.", "gemma:3n", "1")
+    assert cache_key("intent", "  skip   TODAY'S workout ", "gemma:3n", "1") == key
+    assert cache_key("intent", "Skip today's workout.", "gemma:3n", "2") != key
+    assert cache_key("intent", "Skip today's workout.", "llama3", "1") != key
+    assert cache_key("goal", "Skip today's workout.", "gemma:3n", "1") != key
+
+
+def test_lru_eviction_ttl_and_counters():
+    clock = _Clock()
+    cache = LLMCache(maxsize=2, ttl_seconds=60, path=None, clock=clock)
+    cache.put("a", {"n": 1})
+    cache.put("b", {"n": 2})
+    assert cache.get("a") == {"n": 1}
+    cache.put("c", {"n": 3})  # evicts "b", the least recently used
+    assert cache.get("b") is None
+
+    value = cache.get("a")
+    value["n"] = 99  # callers get their own copy
+    assert cache.get("a") == {"n": 1}
+
+    clock.now += 61
+    assert cache.get("c") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["expirations"]) == (3, 2, 1, 1)
+
+
+def test_sqlite_persistence_survives_restart(tmp_path):
+    clock = _Clock()
+    path = str(tmp_path / "llm_cache.sqlite3")
+    cache = LLMCache(maxsize=8, ttl_seconds=60, path=path, clock=clock)
+    cache.put("k", {"intent": "new_goal"})
+    cache.flush()
+
+    restarted = LLMCache(maxsize=8, ttl_seconds=60, path=path, clock=clock)
+    assert restarted.get("k") == {"intent": "new_goal"}
+    assert restarted.get("k") == {"intent": "new_goal"}
+    assert (restarted.stats()["disk_hits"], restarted.stats()["hits"]) == (1, 1)
+
+    clock.now += 61
+    assert LLMCache(maxsize=8, ttl_seconds=60, path=path, clock=clock).get("k") is None
+
+
+def test_forked_workers_reopen_the_sqlite_file(tmp_path):
+    path = str(tmp_path / "llm_cache.sqlite3")
+    writer = LLMCache(maxsize=8, ttl_seconds=60, path=path)
+    writer.put("k", "v")
+    writer.flush()
+    cache = LLMCache(maxsize=8, ttl_seconds=60, path=path)
+    inherited = cache._db
+    cache._pid = -1  # as seen from a worker forked after the cache was created
+
+    assert cache.get("k") == "v"
+    assert cache._db is not inherited and cache.stats()["disk_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_writes_are_queued_and_reads_leave_the_event_loop(tmp_path, monkeypatch):
+    path = str(tmp_path / "llm_cache.sqlite3")
+    cache = LLMCache(maxsize=8, ttl_seconds=60, path=path)
+    for n in range(50):
+        cache.put(f"k{n}", n)
+    assert cache.get("k49") == 49  # served from memory while the writer catches up
+    flush_all()
+
+    threads = []
+    real_to_thread = asyncio.to_thread
+
+    async def to_thread(func, *args):
+        threads.append(func.__name__)
+        return await real_to_thread(func, *args)
+
+    monkeypatch.setattr(asyncio, "to_thread", to_thread)
+    restarted = LLMCache(maxsize=8, ttl_seconds=60, path=path)
+    assert await restarted.aget("k49") == 49
+    assert await restarted.aget("k49") == 49  # memory hit, no thread
+    assert await restarted.aget("missing") is None
+    assert threads == ["_from_disk", "_from_disk"]
+
+
+@pytest.mark.asyncio
+async def test_classifier_only_calls_llm_once_per_phrase(monkeypatch):
+    cache = LLMCache(maxsize=8, ttl_seconds=60, path=None)
+    monkeypatch.setattr(intent_classifier, "LLM_CACHE", cache)
+    monkeypatch.setattr(intent_classifier, "CONFIDENCE_THRESHOLD", 1.01)  # always ask the LLM
+    monkeypatch.setattr(intent_classifier, "MODEL_THRESHOLD", 1.01)
+    calls = []
+
+    async def fake_llm(text):
+        calls.append(text)
+        return "adaptation_request" if "skip" in text.lower() else "not-a-label"
+
+    monkeypatch.setattr(intent_classifier, "_llm_intent", fake_llm)
+
+    for text in ["Skip today's workout", "skip today's workout!", "SKIP today's   workout"]:
+        assert await intent_classifier.classify(text) == {"intent": "adaptation_request"}
+    assert len(calls) == 1
+
+    # Out-of-set labels go to the regex fallback and are never cached.
+    await intent_classifier.classify("hello there")
+    await intent_classifier.classify("hello there")
+    assert len(calls) == 3
+    assert cache.stats()["size"] == 1
@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from app.llm.client import OllamaPool
+
+
+class _FakeClient:
+    """Stands in for ollama.AsyncClient and records how many calls overlap per model."""
+
+    def __init__(self):
+        self.running = {}
+        self.peak = {}
+
+    async def chat(self, model, messages, options=None, keep_alive=None):
+        self.running[model] = self.running.get(model, 0) + 1
+        self.peak[model] = max(self.peak.get(model, 0), self.running[model])
+        try:
+            await asyncio.sleep(0.02)
+        finally:
+            self.running[model] -= 1
+        if messages[0]["content"] == "boom":
+            raise ConnectionError("refused")
+        return {"message": {"content": messages[0]["content"]}}
+
+
+@pytest.mark.asyncio
+async def test_calls_overlap_up_to_the_per_model_limit():
+    clients = []
+    pool = OllamaPool(model_concurrency=2, timeout_seconds=1, client_factory=lambda: clients.append(_FakeClient()) or clients[-1])
+
+    calls = [pool.chat("a", [{"role": "user", "content": str(n)}]) for n in range(6)]
+    calls += [pool.chat("b", [{"role": "user", "content": str(n)}]) for n in range(2)]
+    started = asyncio.get_running_loop().time()
+    results = await asyncio.gather(*calls)
+    elapsed = asyncio.get_running_loop().time() - started
+
+    assert [r["message"]["content"] for r in results] == [str(n) for n in range(6)] + ["0", "1"]
+    assert len(clients) == 1  # one pooled client shared by every call
+    assert clients[0].peak == {"a": 2, "b": 2}
+    assert elapsed < 0.02 * 6  # three waves for "a", overlapping with "b"
+    assert pool.stats()["models"]["a"] == {"calls": 6, "coalesced": 0, "errors": 0, "in_flight": 0, "waiting": 0}
+
+
+@pytest.mark.asyncio
+async def test_errors_and_timeouts_are_counted_and_raised():
+    pool = OllamaPool(model_concurrency=1, timeout_seconds=0.005, client_factory=_FakeClient)
+    with pytest.raises(asyncio.TimeoutError):
+        await pool.chat("a", [{"role": "user", "content": "slow"}])
+
+    pool.timeout_seconds = 1
+    with pytest.raises(ConnectionError):
+        await pool.chat("a", [{"role": "user", "content": "boom"}])
+    assert pool.stats()["models"]["a"]["errors"] == 2
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_prompts_share_one_generation():
+    fake = _FakeClient()
+    pool = OllamaPool(model_concurrency=4, timeout_seconds=1, client_factory=lambda: fake)
+    same = [{"role": "user", "content": "skip today"}]
+
+    first = asyncio.ensure_future(pool.chat("a", same, options={"temperature": 0.0}))
+    second = asyncio.ensure_future(pool.chat("a", same, options={"temperature": 0.0}))
+    other = asyncio.ensure_future(pool.chat("a", same, options={"temperature": 0.1}))
+    await asyncio.sleep(0)
+    second.cancel()  # a caller giving up does not cancel the shared generation
+    third = pool.chat("a", same, options={"temperature": 0.0})
+
+    results = await asyncio.gather(first, third, other)
+    assert results[0] is results[1]
+    assert pool.stats()["models"]["a"]["calls"] == 2
+    assert pool.stats()["models"]["a"]["coalesced"] == 2
+
+    # Once the generation has landed, the same prompt starts a new one.
+    await pool.chat("a", same, options={"temperature": 0.0})
+    assert pool.stats()["models"]["a"]["calls"] == 3
+
+    # Failures reach every waiter.
+    boom = [{"role": "user", "content": "boom"}]
+    outcomes = await asyncio.gather(pool.chat("a", boom), pool.chat("a", boom), return_exceptions=True)
+    assert all(isinstance(o, ConnectionError) for o in outcomes)
+    assert pool.stats()["models"]["a"]["errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_generation_is_cancelled_once_every_caller_gives_up():
+    fake = _FakeClient()
+    pool = OllamaPool(model_concurrency=1, timeout_seconds=1, client_factory=lambda: fake)
+    prompt = [{"role": "user", "content": "slow"}]
+
+    callers = [asyncio.ensure_future(pool.chat("a", prompt)) for _ in range(2)]
+    await asyncio.sleep(0.005)
+    for caller in callers:
+        caller.cancel()
+    await asyncio.gather(*callers, return_exceptions=True)
+    await asyncio.sleep(0.005)  # let the cancellation reach the request
+
+    assert fake.running["a"] == 0
+    assert pool.stats()["models"]["a"]["in_flight"] == 0
+    assert pool.breaker("a").stats()["recent_calls"] == 0  # a cancellation is not a failure
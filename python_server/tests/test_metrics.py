@@ -0,0 +1,71 @@
+import io
+import time
+
+from fastapi.testclient import TestClient
+
+from app import log, main
+from app.llm.hedge import report_source
+from app.log import logger
+from app.metrics import Registry
+
+
+def test_histograms_render_cumulative_buckets():
+    registry = Registry()
+    latency = registry.histogram("demo_seconds", "Demo latency.", ("agent",), buckets=(0.1, 1.0))
+    calls = registry.counter("demo_total", "Demo calls.", ("agent",))
+    for value in (0.05, 0.5, 5.0):
+        latency.labels('say "hi"').observe(value)
+    calls.labels("a").inc(2)
+
+    text = registry.render()
+    assert "# TYPE demo_seconds histogram" in text
+    assert 'demo_seconds_bucket{agent="say \\"hi\\"",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{agent="say \\"hi\\"",le="1"} 2' in text
+    assert 'demo_seconds_bucket{agent="say \\"hi\\"",le="+Inf"} 3' in text
+    assert 'demo_seconds_sum{agent="say \\"hi\\""} 5.55' in text
+    assert 'demo_seconds_count{agent="say \\"hi\\""} 3' in text
+    assert 'demo_total{agent="a"} 2' in text
+
+
+def test_metrics_endpoint_reports_agent_latency_and_sources(monkeypatch):
+    async def fake_scheduler(payload):
+        report_source("heuristic")
+        if payload.get("fail"):
+            raise ValueError("bad input")
+        return {"events": []}
+
+    monkeypatch.setitem(main.AGENTS, "SchedulerAgent", fake_scheduler)
+    client = TestClient(main.app)
+
+    def sample(text, line):
+        matches = [l for l in text.splitlines() if l.startswith(line + " ")]
+        return float(matches[0].split()[-1]) if matches else 0.0
+
+    before = client.get("/metrics").text
+    client.post("/invoke_agent", json={"agent_name": "SchedulerAgent", "input_data": {}})
+    client.post("/invoke_agent", json={"agent_name": "SchedulerAgent", "input_data": {"fail": True}})
+    response = client.get("/metrics")
+
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    after = response.text
+    count = 'kira_agent_duration_seconds_count{agent="SchedulerAgent"}'
+    ok = 'kira_agent_results_total{agent="SchedulerAgent",status="success",source="heuristic"}'
+    failed = 'kira_agent_results_total{agent="SchedulerAgent",status="error",source="heuristic"}'
+    assert sample(after, count) - sample(before, count) == 2
+    assert sample(after, ok) - sample(before, ok) == 1
+    assert sample(after, failed) - sample(before, failed) == 1
+    assert sample(after, 'kira_agent_in_flight{agent="SchedulerAgent"}') == 0
+    assert "kira_log_queue_depth" in after
+
+
+def test_log_lines_are_written_by_the_background_listener():
+    stream = io.StringIO()
+    previous = log._stream.setStream(stream)
+    try:
+        logger.info("metrics test line")
+        deadline = time.monotonic() + 2
+        while "metrics test line" not in stream.getvalue() and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        log._stream.setStream(previous)
+    assert "[python_inference] [INFO] metrics test line" in stream.getvalue()
@@ -0,0 +1,50 @@
+import json
+from datetime import date
+
+from app.agents import goal_parser, intent_classifier, task_decomposer
+from app.llm.prompts import PromptTemplate
+
+
+def test_agent_prompts_share_a_static_prefix_and_end_with_the_input():
+    goal = {"type": "skill", "description": "Learn {braces}", "deadline": None}
+    rendered = [
+        (intent_classifier.PROMPT, intent_classifier.PROMPT.render(text="I want to {learn} piano")),
+        (goal_parser.PROMPT, goal_parser.PROMPT.render(today=date.today().isoformat(), text="Run a 5k")),
+        (task_decomposer.PROMPT, task_decomposer.PROMPT.render(goal_json=json.dumps(goal, indent=2))),
+    ]
+    for template, prompt in rendered:
+        assert prompt.startswith(template.prefix)
+    assert rendered[0][1].endswith("USER: I want to {learn} piano\nASSISTANT:")
+    assert '"description": "Learn {braces}"' in rendered[2][1]
+    assert date.today().isoformat() not in goal_parser.PROMPT.prefix
+
+
+def test_stats_count_prefix_hits_from_prompt_eval_count():
+    template = PromptTemplate("test_template", "1", prefix="one two three four five six. ", suffix="{text}")
+    assert template.prefix_tokens == 7
+    first = template.render(text="hello")
+    template.record(first, {"prompt_eval_count": 8})  # cold: whole prompt evaluated
+    template.record(first, {"prompt_eval_count": 1})  # warm: only the suffix
+    template.record(first, None)
+
+    stats = template.stats()
+    assert stats["calls"] == 3
+    assert stats["calls_with_eval_count"] == 2
+    assert stats["prefix_reuse_rate"] == 0.5
+    assert stats["avg_prompt_tokens_estimate"] == 8.0
+    assert stats["prefix_tokens_measured"] == 7
+    assert PromptTemplate("test_template_2", "1", prefix="other", suffix="").cache_version != template.cache_version
+
+
+def test_prefix_hits_use_the_measured_prefix_not_the_estimate():
+    """The model's tokenizer (plus chat-template tokens) can count far more tokens than the estimate."""
+    template = PromptTemplate("test_template_3", "1", prefix="one two three four five six. ", suffix="{text}")
+    prompt = template.render(text="hello")
+    template.record(prompt, {"prompt_eval_count": 9})  # warm call before any cold one: undercounted
+    template.record(prompt, {"prompt_eval_count": 24})  # cold: 3 real tokens per estimated token
+    template.record(prompt, {"prompt_eval_count": 9})  # warm: more than the estimate, less than the prefix
+    template.record(prompt, {"prompt_eval_count": 23})  # cold again
+
+    stats = template.stats()
+    assert stats["prefix_tokens_measured"] == 21
+    assert stats["prefix_hits"] == 1
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytz
+from dateutil.rrule import rrulestr
+
+from app.scheduling.rrule_cache import RecurrenceCache
+
+RULES = [
+    "RRULE:FREQ=DAILY",
+    "RRULE:FREQ=DAILY;COUNT=2",
+    "RRULE:FREQ=DAILY;INTERVAL=3;BYDAY=MO,TU,SA",
+    "RRULE:FREQ=WEEKLY;BYDAY=MO",
+    "RRULE:FREQ=WEEKLY;BYDAY=MO,WE,FR",
+    "RRULE:FREQ=WEEKLY;INTERVAL=2;BYDAY=TU,TH",
+    "RRULE:FREQ=MONTHLY;BYMONTHDAY=1,15",
+    "RRULE:FREQ=WEEKLY;BYDAY=SA;UNTIL=20250420T000000Z",
+]
+
+
+def _day_starts():
+    """Midnights over ~7 weeks, across the US DST change, in pytz and zoneinfo flavours."""
+    ny_pytz = pytz.timezone("America/New_York")
+    ny_zi = ZoneInfo("America/New_York")
+    mx = pytz.timezone("America/Mexico_City")
+    for day in range(50):
+        date = datetime(2025, 2, 20) + timedelta(days=day)
+        yield ny_pytz.localize(date)
+        yield date.replace(tzinfo=ny_zi)
+        yield mx.localize(date)
+
+
+def test_cached_occurrences_match_rrulestr():
+    """Cache hits must reproduce `rrulestr(...).between(...)` exactly, tzinfo included."""
+    cache = RecurrenceCache()
+    for today in _day_starts():
+        dtstart = today.replace(hour=9, minute=0)
+        until = today + timedelta(days=30)
+        for rule_str in RULES:
+            expected = rrulestr(rule_str, dtstart=dtstart).between(today, until, inc=True)
+            for _ in range(2):
+                got = cache.occurrences(rule_str, dtstart, today, until)
+                assert got == expected
+                assert [d.utcoffset() for d in got] == [d.utcoffset() for d in expected]
+                assert [d.isoformat() for d in got] == [d.isoformat() for d in expected]
+
+    stats = cache.stats()["offsets"]
+    assert stats["hits"] > stats["misses"]
+
+
+def test_cache_is_bounded_and_counts_evictions():
+    cache = RecurrenceCache(rule_maxsize=2, offsets_maxsize=2)
+    today = pytz.timezone("America/Mexico_City").localize(datetime(2025, 3, 3))
+    dtstart = today.replace(hour=9)
+    for rule_str in RULES[:4]:
+        cache.occurrences(rule_str, dtstart, today, today + timedelta(days=30))
+    cache.occurrences(RULES[3], dtstart, today, today + timedelta(days=30))
+
+    stats = cache.stats()
+    assert stats["offsets"]["size"] == 2
+    assert stats["offsets"]["evictions"] == 2
+    assert stats["offsets"]["hits"] == 1
+    assert stats["offsets"]["misses"] == 4
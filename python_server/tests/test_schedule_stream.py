@@ -0,0 +1,112 @@
+import base64
+import json
+import os
+
+import pytest
+
+from app.agents.scheduler import schedule, stream_schedule
+
+# --- Test Configuration ---
+SCHED_DISABLED = os.getenv("SCHED_DISABLED", "false").lower() == "true"
+
+# --- Test Fixtures ---
+@pytest.fixture
+def overlapping_tasks():
+    """Several recurring tasks that overlap on some days."""
+    return {
+        "tasks": [
+            {"task_id": "task_daily", "description": "Daily", "recurrence_rule": "RRULE:FREQ=DAILY", "estimated_minutes": 60, "dependencies": []},
+            {"task_id": "task_mwf", "description": "MWF", "recurrence_rule": "RRULE:FREQ=WEEKLY;BYDAY=MO,WE,FR", "estimated_minutes": 90, "dependencies": []},
+            {"task_id": "task_tu", "description": "Tuesday", "recurrence_rule": "RRULE:FREQ=WEEKLY;BYDAY=TU", "estimated_minutes": 30, "dependencies": []},
+        ]
+    }
+
+
+def _collect(records):
+    events, conflicts, pages = [], [], []
+    for record in records:
+        {"event": events, "conflict": conflicts, "page": pages}[record["type"]].append(record["data"])
+    return events, conflicts, pages
+
+
+# --- Tests ---
+@pytest.mark.xfail(SCHED_DISABLED, reason="Scheduler tests are disabled via environment variable.")
+@pytest.mark.asyncio
+async def test_stream_matches_schedule(overlapping_tasks):
+    """The streamed events, statuses and conflict pairs must match the in-memory scheduler."""
+    expected = await schedule(overlapping_tasks)
+    events, conflicts, pages = _collect(stream_schedule(overlapping_tasks))
+
+    assert pages == [{"count": len(events), "next_cursor": None}]
+    assert [e["start_time"] for e in events] == sorted(e["start_time"] for e in events)
+
+    def keyed(evts):
+        return {(e["task_id"], e["start_time"]): (e["end_time"], e["status"]) for e in evts}
+
+    assert keyed(events) == keyed(expected["events"])
+
+    def pairs(evts, confs):
+        by_session = {e["session_id"]: (e["task_id"], e["start_time"]) for e in evts}
+        return sorted(
+            tuple(sorted([by_session[confs[k + 1]["conflict_with"]], by_session[confs[k]["conflict_with"]]]))
+            for k in range(0, len(confs), 2)
+        )
+
+    assert pairs(events, conflicts) == pairs(expected["events"], expected["conflicts"])
+
+
+@pytest.mark.xfail(SCHED_DISABLED, reason="Scheduler tests are disabled via environment variable.")
+def test_stream_pages_resume_from_cursor(overlapping_tasks):
+    """Following cursors page by page must reproduce the unpaged stream exactly."""
+    request = dict(overlapping_tasks, horizon_days=120)
+    full_events, full_conflicts, _ = _collect(stream_schedule(request))
+
+    events, conflicts = [], []
+    cursor = None
+    while True:
+        page_events, page_conflicts, pages = _collect(
+            stream_schedule(dict(request, page_size=7, cursor=cursor))
+        )
+        assert len(page_events) == pages[0]["count"] <= 7
+        events += page_events
+        conflicts += page_conflicts
+        cursor = pages[0]["next_cursor"]
+        if cursor is None:
+            break
+
+    assert events == full_events
+    assert conflicts == full_conflicts
+
+
+def test_stream_rejects_foreign_cursor(overlapping_tasks):
+    """A cursor issued for one task list must not be replayed against another."""
+    _, _, pages = _collect(stream_schedule(dict(overlapping_tasks, page_size=3)))
+    other = {"tasks": overlapping_tasks["tasks"][:1]}
+    with pytest.raises(ValueError):
+        stream_schedule(dict(other, cursor=pages[0]["next_cursor"]))
+
+
+def test_stream_rejects_cursor_beyond_horizon_and_huge_pages(overlapping_tasks):
+    """A hand-made cursor cannot widen the window past MAX_HORIZON_DAYS."""
+    _, _, pages = _collect(stream_schedule(dict(overlapping_tasks, page_size=3)))
+    state = json.loads(base64.urlsafe_b64decode(pages[0]["next_cursor"]))
+    state["until"] = "9999-12-31T00:00:00-06:00"
+    forged = base64.urlsafe_b64encode(json.dumps(state).encode()).decode()
+    with pytest.raises(ValueError, match="366"):
+        stream_schedule(dict(overlapping_tasks, cursor=forged))
+    with pytest.raises(ValueError):
+        stream_schedule(dict(overlapping_tasks, page_size=10**9))
+
+
+@pytest.mark.parametrize("minutes", [10**9, 24 * 60 + 1, 0, -30, "60", True])
+def test_stream_rejects_out_of_range_durations(overlapping_tasks, minutes):
+    """A huge duration would keep every later event in the look-ahead buffer, so it is refused up front."""
+    overlapping_tasks["tasks"][1]["estimated_minutes"] = minutes
+    with pytest.raises(ValueError, match="estimated_minutes"):
+        stream_schedule(overlapping_tasks)
+
+
+def test_stream_accepts_day_long_sessions(overlapping_tasks):
+    overlapping_tasks["tasks"][1]["estimated_minutes"] = 24 * 60
+    events, _, pages = _collect(stream_schedule(dict(overlapping_tasks, horizon_days=7)))
+    assert pages[0]["count"] == len(events) > 0
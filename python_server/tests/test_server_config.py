@@ -0,0 +1,78 @@
+import pytest
+
+from app import config, server
+from app.config import ServerSettings
+
+
+def test_settings_come_from_the_environment():
+    settings = ServerSettings.from_env({
+        "SERVER_MODE": "Production", "PORT": "9000", "SERVER_WORKERS": "3", "SERVER_LOOP": "asyncio",
+        "SERVER_PRELOAD": "false", "SERVER_GRACEFUL_TIMEOUT_SECONDS": "12.5",
+    })
+    assert (settings.mode, settings.port, settings.worker_count, settings.loop) == ("production", 9000, 3, "asyncio")
+    assert settings.http == "httptools" and not settings.preload
+    assert settings.graceful_timeout_seconds == 12.5
+
+    development = ServerSettings.from_env({"SERVER_WORKERS": "8"})
+    assert development.mode == "development" and development.worker_count == 1
+    assert ServerSettings.from_env({"SERVER_MODE": "production"}).worker_count >= 1
+
+
+@pytest.mark.parametrize("env", [
+    {"SERVER_MODE": "staging"}, {"SERVER_LOOP": "trio"}, {"SERVER_HTTP": "h2"}, {"SERVER_WORKERS": "-1"},
+])
+def test_invalid_settings_are_rejected(env):
+    with pytest.raises(ValueError):
+        ServerSettings.from_env(env)
+
+
+def test_fractional_graceful_timeouts_round_up_for_uvicorn():
+    settings = ServerSettings(graceful_timeout_seconds=0.5)
+    assert server._uvicorn_options(settings)["timeout_graceful_shutdown"] == 1
+    assert server._uvicorn_options(ServerSettings(graceful_timeout_seconds=30))["timeout_graceful_shutdown"] == 30
+    assert server._Supervisor(None, 1, 0.5).kill_after == 1 + 0.5 + server._KILL_GRACE_SECONDS
+
+
+def test_missing_uvloop_and_httptools_fall_back(monkeypatch):
+    monkeypatch.setattr(config.importlib.util, "find_spec", lambda name: None)
+    resolved = ServerSettings().resolved()
+    assert (resolved.loop, resolved.http) == ("asyncio", "h11")
+    assert ServerSettings(loop="auto").resolved().loop == "auto"
+
+
+def test_bad_environment_falls_back_to_defaults_but_the_launcher_rejects_it(monkeypatch):
+    monkeypatch.setenv("SERVER_MODE", "staging")
+    assert config._load_settings() == ServerSettings()
+    with pytest.raises(SystemExit):
+        server.main([])
+
+
+def test_workers_flag_needs_production_mode(monkeypatch):
+    monkeypatch.delenv("SERVER_MODE", raising=False)
+    monkeypatch.setattr(server, "serve", lambda settings: pytest.fail("should not start"))
+    with pytest.raises(SystemExit):
+        server.main(["--workers", "4"])
+
+
+def test_crashing_workers_back_off_then_stop_the_server(monkeypatch):
+    supervisor = server._Supervisor(config=None, workers=1, graceful_timeout_seconds=10)
+    assert supervisor.kill_after == 2 * 10 + server._KILL_GRACE_SECONDS  # requests, then late LLM calls
+    exited = 1 << 8  # wait status of a process that exited with code 1
+    monkeypatch.setattr(server.time, "monotonic", lambda: 1000.0)
+
+    delays = []
+    for pid in range(1, server._MAX_QUICK_CRASHES):
+        supervisor.children[pid] = (0, 999.0)  # started a second ago
+        supervisor._reap(pid, exited)
+        delays.append(supervisor.restarts.pop(0) - 1000.0)
+    assert delays == [1.0, 2.0, 4.0, 8.0]
+
+    supervisor.children[99] = (0, 999.0)
+    supervisor._reap(99, exited)
+    assert supervisor.failed and supervisor.stop_deadline is not None and not supervisor.restarts
+
+    stable = server._Supervisor(config=None, workers=1, graceful_timeout_seconds=10)
+    stable.quick_crashes[0] = 3
+    stable.children[7] = (0, 1000.0 - server._STABLE_SECONDS)  # ran long enough to reset the backoff
+    stable._reap(7, exited)
+    assert stable.restarts[0] - 1000.0 == server._RESTART_DELAY_SECONDS and not stable.failed
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.timing import server_timing, span, start_trace, summarize
+
+TASKS = {
+    "tasks": [
+        {"task_id": "t1", "goal_id": "g1", "description": "Run", "recurrence_rule": "RRULE:FREQ=DAILY",
+         "estimated_minutes": 30, "dependencies": []},
+    ]
+}
+
+
+@pytest.mark.asyncio
+async def test_spans_are_recorded_only_inside_a_trace_including_spawned_tasks():
+    async def step():
+        with span("demo.llm"):
+            await asyncio.sleep(0)
+
+    await asyncio.create_task(step())  # no trace: nothing to record into
+
+    spans = start_trace()
+    with span("demo.rules"):
+        pass
+    await asyncio.create_task(step())
+    with span("demo.rules"):
+        pass
+
+    assert [s["name"] for s in summarize(spans)] == ["demo.rules", "demo.llm"]
+    header = server_timing(spans, total_ms=1.5)
+    assert header.startswith("demo.rules;dur=") and header.endswith("total;dur=1.500")
+
+
+def test_invoke_agent_returns_server_timing_and_opt_in_debug_spans():
+    client = TestClient(main.app)
+
+    plain = client.post("/invoke_agent", json={"agent_name": "SchedulerAgent", "input_data": TASKS})
+    assert plain.status_code == 200
+    assert plain.json()["debug"] is None
+    names = [entry.split(";")[0] for entry in plain.headers["server-timing"].split(", ")]
+    assert names == ["schedule.expand", "schedule.events", "schedule.conflicts", "schedule.validate", "total"]
+
+    debug = client.post(
+        "/invoke_agent", json={"agent_name": "SchedulerAgent", "input_data": TASKS, "debug": True}
+    ).json()["debug"]
+    assert [s["name"] for s in debug["spans"]] == names[:-1]
+    assert debug["total_ms"] >= sum(s["duration_ms"] for s in debug["spans"]) - 0.01
+
+    failed = client.post("/invoke_agent", json={"agent_name": "SchedulerAgent", "input_data": {"horizon_days": -1}})
+    assert failed.status_code == 400
+    assert "total;dur=" in failed.headers["server-timing"]
@@ -0,0 +1,44 @@
+import pytest
+from jsonschema import validate, ValidationError
+
+from app import validation
+from app.schemas import SCHEDULE_SCHEMA
+
+
+@pytest.fixture(autouse=True)
+def restore_mode():
+    mode = validation.mode()
+    yield
+    validation.configure(mode)
+
+
+def _bad_schedule():
+    return {"events": [{"session_id": "s", "task_id": "t", "start_time": "x", "end_time": "y", "status": "bogus"}],
+            "conflicts": [], "exceptions": []}
+
+
+def test_compiled_validator_raises_same_error_as_jsonschema():
+    with pytest.raises(ValidationError) as expected:
+        validate(instance=_bad_schedule(), schema=SCHEDULE_SCHEMA)
+    with pytest.raises(ValidationError) as got:
+        validation.validate_output("SchedulerAgent", _bad_schedule())
+    assert got.value.message == expected.value.message
+
+
+def test_modes_only_relax_trusted_payloads():
+    validation.configure("trusted")
+    validation.validate_output("SchedulerAgent", _bad_schedule(), trusted=True)
+    with pytest.raises(ValidationError):
+        validation.validate_output("SchedulerAgent", _bad_schedule(), trusted=False)
+
+    validation.configure("sampled", sample_rate=4)
+    failures = 0
+    for _ in range(8):
+        try:
+            validation.validate_output("SchedulerAgent", _bad_schedule(), trusted=True)
+        except ValidationError:
+            failures += 1
+    assert failures == 2
+
+    with pytest.raises(ValueError):
+        validation.configure("sometimes")
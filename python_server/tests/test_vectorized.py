@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+import pytz
+from dateutil.rrule import rrulestr
+
+from app.agents.scheduler import schedule
+from app.scheduling.conflicts import naive_overlapping_pairs
+from app.scheduling.vectorized import expand_tasks, format_iso, simple_rule
+
+SIMPLE_RULES = [
+    "RRULE:FREQ=DAILY",
+    "RRULE:FREQ=DAILY;COUNT=2",
+    "RRULE:FREQ=DAILY;INTERVAL=2",
+    "RRULE:FREQ=DAILY;INTERVAL=3;BYDAY=MO,TU,SA;COUNT=5",
+    "RRULE:FREQ=WEEKLY",
+    "RRULE:FREQ=WEEKLY;BYDAY=MO",
+    "RRULE:FREQ=WEEKLY;BYDAY=MO,WE,FR",
+    "RRULE:FREQ=WEEKLY;BYDAY=SU,SA",
+    "RRULE:FREQ=WEEKLY;INTERVAL=2;BYDAY=TU,TH;COUNT=7",
+]
+OTHER_RULES = [
+    "RRULE:FREQ=MONTHLY;BYMONTHDAY=1,15",
+    "RRULE:FREQ=WEEKLY;BYDAY=1MO",
+    "RRULE:FREQ=WEEKLY;BYDAY=SA;UNTIL=20250420T000000Z",
+]
+
+
+def _zones():
+    return [
+        ("pytz America/New_York", lambda d: pytz.timezone("America/New_York").localize(d)),
+        ("zoneinfo America/New_York", lambda d: d.replace(tzinfo=ZoneInfo("America/New_York"))),
+        ("pytz America/Mexico_City", lambda d: pytz.timezone("America/Mexico_City").localize(d)),
+        ("naive", lambda d: d),
+    ]
+
+
+def test_simple_rules_take_the_fast_path():
+    assert all(simple_rule(rule) is not None for rule in SIMPLE_RULES)
+    assert all(simple_rule(rule) is None for rule in OTHER_RULES)
+
+
+@pytest.mark.parametrize("zone_name,localize", _zones())
+def test_vectorized_expansion_matches_rrulestr(zone_name, localize):
+    """Every rule, every start day across the spring DST change, must equal rrulestr output."""
+    rules = SIMPLE_RULES + OTHER_RULES
+    tasks = [{"task_id": str(n), "recurrence_rule": rule, "estimated_minutes": 45} for n, rule in enumerate(rules)]
+    for day in range(0, 50, 3):
+        today = localize(datetime(2025, 2, 20) + timedelta(days=day))
+        dtstart = today.replace(hour=9, minute=0)
+        until = today + timedelta(days=40)
+
+        task_index, starts, ends = expand_tasks(tasks, dtstart, today, until)
+        got_starts = format_iso(starts, dtstart)
+        got_ends = format_iso(ends, dtstart)
+
+        expected = []
+        for n, rule in enumerate(rules):
+            try:
+                occurrences = rrulestr(rule, dtstart=dtstart).between(today, until, inc=True)
+            except ValueError:
+                continue  # e.g. a UTC UNTIL with a naive dtstart; skipped by the scheduler too
+            for occurrence in occurrences:
+                expected.append((n, occurrence.isoformat(), (occurrence + timedelta(minutes=45)).isoformat()))
+
+        assert list(zip(task_index, got_starts, got_ends)) == expected, zone_name
+
+
+@pytest.mark.asyncio
+async def test_schedule_matches_legacy_expansion():
+    """The array-based scheduler must produce the same events and conflicts as the per-event loop."""
+    tasks = {
+        "tasks": [
+            {"task_id": "a", "recurrence_rule": "RRULE:FREQ=DAILY", "estimated_minutes": 60},
+            {"task_id": "b", "recurrence_rule": "RRULE:FREQ=WEEKLY;BYDAY=MO,WE,FR", "estimated_minutes": 90},
+            {"task_id": "c", "recurrence_rule": "RRULE:FREQ=MONTHLY;BYMONTHDAY=1,15", "estimated_minutes": 30},
+            {"task_id": "d", "recurrence_rule": "RRULE:FREQ=ONCE", "estimated_minutes": 30},
+            {"task_id": "e", "recurrence_rule": "RRULE:FREQ=DAILY;INTERVAL=2", "estimated_minutes": 0},
+        ]
+    }
+    result = await schedule(tasks)
+
+    tz = pytz.timezone("America/Mexico_City")
+    today = datetime.now(tz).replace(hour=0, minute=0, second=0, microsecond=0)
+    dtstart = today.replace(hour=9, minute=0)
+    legacy = []
+    for task in tasks["tasks"]:
+        try:
+            occurrences = rrulestr(task["recurrence_rule"], dtstart=dtstart).between(today, today + timedelta(days=30), inc=True)
+        except ValueError:
+            continue
+        for start in occurrences:
+            legacy.append((task["task_id"], start, start + timedelta(minutes=task["estimated_minutes"])))
+
+    assert [(e["task_id"], e["start_time"], e["end_time"]) for e in result["events"]] == [
+        (task_id, start.isoformat(), end.isoformat()) for task_id, start, end in legacy
+    ]
+    pairs = naive_overlapping_pairs([(start, end) for _, start, end in legacy])
+    sessions = [e["session_id"] for e in result["events"]]
+    assert [(c["task_id"], c["conflict_with"]) for c in result["conflicts"]] == [
+        entry
+        for i, j in pairs
+        for entry in ((legacy[i][0], sessions[j]), (legacy[j][0], sessions[i]))
+    ]
+    in_pairs = {n for pair in pairs for n in pair}
+    assert [e["status"] for e in result["events"]] == [
+        "conflict" if n in in_pairs else "scheduled" for n in range(len(legacy))
+    ]